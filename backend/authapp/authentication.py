@@ -0,0 +1,155 @@
+"""
+JWT authentication without a database query on the common path.
+
+Every process keeps two things in memory:
+
+* the revoked token ids (jti -> expiry), loaded from simplejwt's
+  BlacklistedToken table and topped up with the rows added since;
+* the users that recently authenticated, for AUTH_USER_CACHE_TIMEOUT
+  seconds.
+
+Both are refreshed at most every AUTH_STATE_SYNC_INTERVAL seconds: new
+blacklist rows are read, and the users are dropped if the shared cache
+says a user changed. A change made in this process takes effect here at
+once; other workers pick it up within the interval. Requests that can
+write (anything but GET, HEAD and OPTIONS) always load the user from the
+database, so a stale copy is never saved back or trusted for a change.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+USERS_VERSION_KEY = 'auth_users_version'
+
+
+class AuthState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next request reloads from the database."""
+        self.revoked = {}  # jti -> expiry (epoch seconds)
+        self.last_blacklist_id = None
+        self.users = {}  # str(user id) -> (user, monotonic expiry); tokens carry the id as a string
+        self.users_version = None
+        self.next_sync = 0.0
+
+    def sync(self, force=False):
+        """Pull new revocations and user changes if the interval has passed."""
+        now = time.monotonic()
+        if not force and now < self.next_sync:
+            return
+        with self.lock:
+            if not force and now < self.next_sync:
+                return
+            self.next_sync = now + settings.AUTH_STATE_SYNC_INTERVAL
+            rows = BlacklistedToken.objects.values_list('id', 'token__jti', 'token__expires_at').order_by('id')
+            if self.last_blacklist_id is None:
+                rows = rows.filter(token__expires_at__gt=timezone.now())
+            else:
+                rows = rows.filter(id__gt=self.last_blacklist_id)
+            for row_id, jti, expires_at in rows:
+                self.revoked[jti] = expires_at.timestamp()
+                self.last_blacklist_id = row_id
+            if self.last_blacklist_id is None:
+                self.last_blacklist_id = 0
+            # Expired tokens fail signature checks anyway; no need to remember them.
+            epoch = time.time()
+            self.revoked = {jti: exp for jti, exp in self.revoked.items() if exp > epoch}
+
+            version = cache.get(USERS_VERSION_KEY)
+            if version != self.users_version:
+                self.users.clear()
+                self.users_version = version
+
+    def is_revoked(self, jti):
+        self.sync()
+        return jti in self.revoked
+
+    def add_revoked(self, jti, exp):
+        with self.lock:
+            self.revoked[jti] = exp
+
+    def get_user(self, user_id):
+        entry = self.users.get(str(user_id))
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set_user(self, user_id, user):
+        self.users[str(user_id)] = (user, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT)
+
+    def forget_user(self, user_id):
+        self.users.pop(str(user_id), None)
+
+
+state = AuthState()
+
+
+def invalidate_user(user_id):
+    """Drop a changed user here, and tell the other workers to drop theirs."""
+    state.forget_user(user_id)
+    cache.set(USERS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def revoke_token(token):
+    """
+    Blacklist any simplejwt token (access or refresh) until it expires. The
+    jti is recorded in the database and takes effect in this process now.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'user_id': token.get(api_settings.USER_ID_CLAIM),
+            'token': str(token),
+            'created_at': token.current_time,
+            'expires_at': datetime_from_epoch(token['exp']),
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+    state.add_revoked(jti, token['exp'])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that checks the in-memory revocation set and reuses loaded users."""
+
+    fresh_user = False
+
+    def authenticate(self, request):
+        # DRF builds the authenticators per request, so this is per request too.
+        self.fresh_user = request.method not in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if state.is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token is blacklisted"))
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = None if self.fresh_user else state.get_user(user_id)
+        if user is None:
+            # Runs the stock checks (exists, is_active, password-change claim).
+            user = super().get_user(validated_token)
+            state.set_user(user_id, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        # A copy per request, so a view changing request.user never touches the cached one.
+        return copy.copy(user)
@@ -4,10 +4,16 @@ from django.contrib.auth.models import AbstractUser
 class User(AbstractUser):
     email = models.EmailField(unique=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True)  # see invoice.images
     username = models.CharField(max_length=150, unique=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+    def save(self, *args, **kwargs):
+        from invoice.images import AVATAR_VARIANTS, refresh_variants
+        super().save(*args, **kwargs)
+        refresh_variants(self, 'avatar', 'avatar_variants', AVATAR_VARIANTS)
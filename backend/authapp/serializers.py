@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import User
 from django.contrib.auth import authenticate
+from invoice.images import variant_urls
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -20,11 +21,23 @@ class LoginSerializer(serializers.Serializer):
         raise serializers.ValidationError("Invalid credentials")
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'email', 'username', 'first_name', 'last_name', 'avatar')
+        fields = ('id', 'email', 'username', 'first_name', 'last_name', 'avatar', 'avatar_variants')
         read_only_fields = ('id',)
 
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar, obj.avatar_variants, self.context.get('request'))
+
+    def update(self, instance, validated_data):
+        # Only the submitted fields, so a concurrent password change is never overwritten.
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 class ForgotPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
@@ -1,3 +1,99 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from .authentication import state
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        state.reset()
+        self.addCleanup(state.reset)
+        self.user = get_user_model().objects.create_user(
+            username='ann', email='ann@example.com', password='old-password', first_name='Ann'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+        self.auth = {'Authorization': f'Bearer {self.access}'}
+
+    def profile(self):
+        return self.client.get(reverse('profile'), headers=self.auth)
+
+    def test_authentication_needs_no_queries_once_warm(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.profile()
+        self.assertEqual(response.json()['email'], 'ann@example.com')
+
+    def test_profile_update_is_seen_by_the_next_request(self):
+        self.profile()
+        response = self.client.put(reverse('profile'), {'first_name': 'Annie'}, content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profile().json()['first_name'], 'Annie')
+
+    def test_user_changes_in_another_worker_drop_the_cached_users(self):
+        self.profile()
+        # Another worker deactivates the user; this process only learns it at the next sync.
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user.save(update_fields=['first_name'])
+        state.users_version = 'stale'
+        state.next_sync = 0
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        response = self.client.post(reverse('logout'), {'refresh': str(self.refresh)}, content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.profile().status_code, 401)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+    def test_logout_needs_a_refresh_token(self):
+        response = self.client.post(reverse('logout'), {}, content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_revocations_from_other_workers_arrive_at_sync(self):
+        self.assertEqual(self.profile().status_code, 200)
+        access = self.access
+        outstanding = OutstandingToken.objects.create(
+            user=self.user, jti=access['jti'], token=str(access), expires_at=self.refresh.current_time.replace(year=2100)
+        )
+        BlacklistedToken.objects.create(token=outstanding)
+        self.assertEqual(self.profile().status_code, 200)
+        state.next_sync = 0
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_expired_revocations_are_pruned(self):
+        state.add_revoked('old', 1)
+        state.sync(force=True)
+        self.assertNotIn('old', state.revoked)
+
+    def test_password_change_drops_the_cached_user(self):
+        self.profile()
+        response = self.client.post(
+            reverse('change_password'),
+            {'current_password': 'old-password', 'new_password': 'N3w-password!', 'confirm_new_password': 'N3w-password!'},
+            content_type='application/json', headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIsNone(state.get_user(self.user.pk))
+
+    def test_writes_never_use_a_stale_cached_user(self):
+        self.profile()
+        # Another worker changes the password; this process still caches the old row.
+        User = get_user_model()
+        other = User.objects.get(pk=self.user.pk)
+        other.set_password('changed-elsewhere')
+        User.objects.filter(pk=self.user.pk).update(password=other.password)
+
+        self.client.put(reverse('profile'), {'first_name': 'Annie'}, content_type='application/json', headers=self.auth)
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('changed-elsewhere'))
+        response = self.client.post(
+            reverse('change_password'),
+            {'current_password': 'old-password', 'new_password': 'N3w-password!', 'confirm_new_password': 'N3w-password!'},
+            content_type='application/json', headers=self.auth,
+        )
+        self.assertNotEqual(response.status_code, 200)
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('changed-elsewhere'))
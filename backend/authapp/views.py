@@ -11,9 +11,15 @@ from .serializers import (
 from django.core.cache import cache
 from django.utils.crypto import get_random_string
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
+from .authentication import revoke_token
+from mailer.outbox import enqueue
 from django.conf import settings 
+from datetime import timedelta
+
+# Seconds a password-reset OTP stays valid; its email must go out within the same time.
+OTP_TTL = 300
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
@@ -40,12 +46,13 @@ class LogoutView(APIView):
 
     def post(self, request):
         try:
-            refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
-            token.blacklist()
-            return Response(status=status.HTTP_205_RESET_CONTENT)
-        except Exception as e:
+            refresh_token = RefreshToken(request.data["refresh"])
+        except (KeyError, TypeError, TokenError):
             return Response(status=status.HTTP_400_BAD_REQUEST)
+        # The access token used for this request is revoked too, so it stops working now rather than at expiry.
+        revoke_token(refresh_token)
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_205_RESET_CONTENT)
 
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
@@ -55,11 +62,12 @@ class ProfileView(APIView):
         return Response(serializer.data)
 
     def put(self, request):
-        user = request.user
+        # A fresh row, so fields this request does not change are never written back from an old copy.
+        user = User.objects.get(pk=request.user.pk)
         serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            return Response({'message': 'Profile updated successfully'})
+            return Response({'message': 'Profile updated successfully', **serializer.data})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ForgotPasswordView(APIView):
@@ -72,27 +80,13 @@ class ForgotPasswordView(APIView):
             try:
                 user = User.objects.get(email=email)
                 otp = get_random_string(length=6, allowed_chars='0123456789')
-                cache.set(f"otp_{email}", otp, timeout=300)
+                cache.set(f"otp_{email}", otp, timeout=OTP_TTL)
 
                 subject = 'Your OTP for Password Reset'
                 message = f'Your OTP to reset your password is: {otp}\nThis OTP is valid for 5 minutes.'
-                from_email = settings.DEFAULT_FROM_EMAIL
-                recipient_list = [email]
-
-                try:
-                    send_mail(
-                        subject,
-                        message,
-                        from_email,
-                        recipient_list,
-                        fail_silently=False,
-                    )
-                    return Response({'message': 'OTP sent to your email'}, status=status.HTTP_200_OK)
-                except Exception as e:
-                    return Response(
-                        {'error': f'Failed to send email: {str(e)}'},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
+                # Delivered by the send_queued_mail worker; the request never waits on SMTP.
+                enqueue(subject, message, [email], kind='otp', send_within=timedelta(seconds=OTP_TTL))
+                return Response({'message': 'OTP sent to your email'}, status=status.HTTP_200_OK)
             except User.DoesNotExist:
                 return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -124,7 +118,7 @@ class ResetPasswordView(APIView):
             try:
                 user = User.objects.get(email=email)
                 user.set_password(serializer.validated_data['new_password'])
-                user.save()
+                user.save(update_fields=['password'])
                 cache.delete(f"verified_{email}")
                 cache.delete(f"otp_{email}")
                 return Response({'message': 'Password reset successfully'}, status=status.HTTP_200_OK)
@@ -138,8 +132,9 @@ class ChangePasswordView(APIView):
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            request.user.set_password(serializer.validated_data['new_password'])
-            request.user.save()
+            user = User.objects.get(pk=request.user.pk)
+            user.set_password(serializer.validated_data['new_password'])
+            user.save(update_fields=['password'])
             return Response({'message': 'Password changed successfully'}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
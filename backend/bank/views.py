@@ -2,9 +2,11 @@ from rest_framework import generics
 from .models import BankAccount
 from .serializers import BankAccountSerializer
 from rest_framework.permissions import AllowAny
+from reference.mixins import ConditionalListMixin
  
-class BankAccountListCreateView(generics.ListCreateAPIView):
+class BankAccountListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
+    change_kind = 'bank_accounts'
     queryset = BankAccount.objects.all()
     serializer_class = BankAccountSerializer
  
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 18:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    Branch = apps.get_model('branch', 'Branch')
+    InvoiceSequence = apps.get_model('branch', 'InvoiceSequence')
+    sequences = []
+    for branch in Branch.objects.exclude(last_reset_date=None):
+        start_year = branch.last_reset_date.year
+        sequences.append(InvoiceSequence(
+            branch=branch,
+            financial_year=f"{start_year}-{start_year + 1}",
+            last_number=branch.last_invoice_number,
+        ))
+    InvoiceSequence.objects.bulk_create(sequences)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '0004_alter_branch_branch_address_alter_branch_branch_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.CharField(max_length=20)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_sequences', to='branch.branch')),
+            ],
+            options={
+                'unique_together': {('branch', 'financial_year')},
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
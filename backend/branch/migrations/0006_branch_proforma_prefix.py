@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '0005_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='branch',
+            name='proforma_prefix',
+            field=models.CharField(blank=True, default='MB', max_length=10),
+        ),
+    ]
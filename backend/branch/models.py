@@ -1,6 +1,16 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 
+
+def get_financial_year(day=None):
+    """Return (start_year, end_year) of the April-March financial year."""
+    day = day or timezone.now().date()
+    if day.month >= 4:
+        return day.year, day.year + 1
+    return day.year - 1, day.year
+
+
 class Branch(models.Model):
     branch_name = models.CharField(max_length=500, blank=True, null=True)
     branch_address = models.TextField(blank=True, null=True)
@@ -14,34 +24,80 @@ class Branch(models.Model):
     last_invoice_number = models.IntegerField(default=0)
     last_reset_date = models.DateField(null=True, blank=True)
     pincode = models.CharField(max_length=10, blank=True, null=True)
+    proforma_prefix = models.CharField(max_length=10, blank=True, default='MB')
     
     def __str__(self):
         return f"{self.branch_address}, {self.city}, {self.state}"
 
     def get_next_invoice_number(self):
-        today = timezone.now().date()
-        # Financial year starts April 1st
-        if today.month >= 4:
-            start_year = today.year
-            end_year = today.year + 1
-        else:
-            start_year = today.year - 1
-            end_year = today.year
-        
-        financial_year_start = timezone.datetime(start_year, 4, 1).date()
-
-        # Reset if last reset was before this FY start
-        if not self.last_reset_date or self.last_reset_date < financial_year_start:
-            self.last_invoice_number = 0
-            self.last_reset_date = financial_year_start
-            self.save()
-
-        self.last_invoice_number += 1
-        self.save()
+        return self.get_next_invoice_numbers(1)[0]
+
+    def get_next_invoice_numbers(self, count):
+        """
+        Reserve `count` consecutive final invoice numbers for the current
+        financial year in one allocator round trip.
+        """
+        start_year, end_year = get_financial_year()
+        numbers = InvoiceSequence.reserve(self, f"{start_year}-{end_year}", count)
+
+        self.last_invoice_number = numbers[-1]
+        self.last_reset_date = timezone.datetime(start_year, 4, 1).date()
 
         # Format: MBC/25-26/001
         fy_part = f"{str(start_year)[-2:]}-{str(end_year)[-2:]}"
-        seq_part = str(self.last_invoice_number).zfill(2)
         prefix = self.series_prefix if self.series_prefix else "MBC"
-        
-        return f"{prefix}/{fy_part}/{seq_part}"
\ No newline at end of file
+
+        return [f"{prefix}/{fy_part}/{str(number).zfill(2)}" for number in numbers]
+
+
+class SequenceCounter(models.Model):
+    """Base for counter rows that are advanced with an atomic UPDATE."""
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def advance(cls, count=1, **lookup):
+        """
+        Atomically advance the counter matching `lookup` by `count` and
+        return the reserved numbers. The UPDATE takes the row lock, so
+        concurrent workers queue behind each other instead of reading the
+        same value. Must be called inside a transaction.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        counter = cls.objects.filter(**lookup)
+        if not counter.update(last_number=F('last_number') + count):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(last_number=count, **lookup)
+            except IntegrityError:
+                # Another worker created the row first
+                counter.update(last_number=F('last_number') + count)
+        last_number = counter.values_list('last_number', flat=True).get()
+        return list(range(last_number - count + 1, last_number + 1))
+
+
+class InvoiceSequence(SequenceCounter):
+    """Per-(branch, financial year) counter behind final invoice numbers."""
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='invoice_sequences')
+    financial_year = models.CharField(max_length=20)
+
+    class Meta:
+        unique_together = ('branch', 'financial_year')
+
+    def __str__(self):
+        return f"{self.branch_id} {self.financial_year}: {self.last_number}"
+
+    @classmethod
+    def reserve(cls, branch, financial_year, count=1):
+        with transaction.atomic():
+            numbers = cls.advance(count, branch=branch, financial_year=financial_year)
+            start_year = int(financial_year.split('-')[0])
+            # Keep the legacy branch columns in step for the API
+            Branch.objects.filter(pk=branch.pk).update(
+                last_invoice_number=numbers[-1],
+                last_reset_date=timezone.datetime(start_year, 4, 1).date(),
+            )
+        return numbers
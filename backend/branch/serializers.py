@@ -4,4 +4,6 @@ from .models import Branch
 class BranchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Branch
-        fields = ['id', 'branch_name', 'branch_address', 'state', 'city', 'gstin', 'phone_code', 'phone', 'website', 'series_prefix', 'last_invoice_number', 'last_reset_date', 'pincode']
\ No newline at end of file
+        # last_invoice_number / last_reset_date are left out: they move with every
+        # allocated number, and the branch list is cached per reference version.
+        fields = ['id', 'branch_name', 'branch_address', 'state', 'city', 'gstin', 'phone_code', 'phone', 'website', 'series_prefix', 'pincode', 'proforma_prefix']
\ No newline at end of file
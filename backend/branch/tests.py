@@ -1,3 +1,89 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+
+from .models import Branch, InvoiceSequence, get_financial_year
+
+
+class InvoiceSequenceTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(branch_name="Head Office", series_prefix="MBC")
+
+    def test_numbers_are_consecutive_per_financial_year(self):
+        self.assertEqual(InvoiceSequence.reserve(self.branch, "2025-2026"), [1])
+        self.assertEqual(InvoiceSequence.reserve(self.branch, "2025-2026", 3), [2, 3, 4])
+        self.assertEqual(InvoiceSequence.reserve(self.branch, "2026-2027"), [1])
+
+    def test_branch_number_format(self):
+        start_year, end_year = get_financial_year()
+        numbers = self.branch.get_next_invoice_numbers(2)
+        fy_part = f"{str(start_year)[-2:]}-{str(end_year)[-2:]}"
+        self.assertEqual(numbers, [f"MBC/{fy_part}/01", f"MBC/{fy_part}/02"])
+        self.branch.refresh_from_db()
+        self.assertEqual(self.branch.last_invoice_number, 2)
+
+
+class InvoiceSequenceStressTests(TransactionTestCase):
+    THREADS = 8
+    ALLOCATIONS = 50
+
+    def setUp(self):
+        self.database = None
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Threads cannot share an in-memory database, so run on a temporary file.
+            tmpdir = tempfile.mkdtemp(prefix='sequence-stress-')
+            self.addCleanup(shutil.rmtree, tmpdir, True)
+            self.database = {
+                **connection.settings_dict,
+                'NAME': os.path.join(tmpdir, 'stress.sqlite3'),
+                'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 30},
+            }
+            original = connections['default']
+            self.wrapper = type(original)
+            self.addCleanup(connections.__setitem__, 'default', original)
+            self.use_file_database()
+            self.addCleanup(connections['default'].close)
+            with connections['default'].schema_editor() as editor:
+                editor.create_model(Branch)
+                editor.create_model(InvoiceSequence)
+
+    def use_file_database(self):
+        """Point this thread's default connection at the temporary file (connections are per thread)."""
+        if self.database:
+            connections['default'] = self.wrapper(self.database, 'default')
+
+    def test_concurrent_allocations_are_unique_and_gapless(self):
+        # bulk_create sends no signals, whose tables the temporary database lacks.
+        branch = Branch.objects.bulk_create([Branch(branch_name="Head Office")])[0]
+        results, errors = [], []
+        lock = threading.Lock()
+
+        def worker(block):
+            self.use_file_database()
+            try:
+                for _ in range(self.ALLOCATIONS):
+                    numbers = InvoiceSequence.reserve(branch, "2025-2026", block)
+                    with lock:
+                        results.extend(numbers)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(1 + i % 2,)) for i in range(self.THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), list(range(1, len(results) + 1)))
+        allocations = self.THREADS * self.ALLOCATIONS
+        self.assertGreater(allocations / elapsed, 100, f"{allocations} allocations took {elapsed:.2f}s")
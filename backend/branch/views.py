@@ -7,16 +7,18 @@ from .models import Branch
 from .serializers import BranchSerializer
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
+from reference.mixins import ConditionalListMixin
  
-class BranchViewSet(viewsets.ModelViewSet):
+class BranchViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     permission_classes=[AllowAny]
+    change_kind = 'branches'
     queryset = Branch.objects.all()
     serializer_class = BranchSerializer
 
     def list(self, request, *args, **kwargs):
-        branch_addresses = self.get_queryset()
-        serializer = self.get_serializer(branch_addresses, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(
+            request, lambda: self.get_serializer(self.get_queryset(), many=True).data
+        )
  
     def retrieve(self, request, *args, **kwargs):
         try:
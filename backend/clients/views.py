@@ -2,9 +2,11 @@ from rest_framework import generics
 from .models import Client
 from .serializers import ClientSerializer
 from rest_framework.permissions import AllowAny
+from reference.mixins import ConditionalListMixin
  
-class ClientListCreateView(generics.ListCreateAPIView):
+class ClientListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
+    change_kind = 'clients'
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
  
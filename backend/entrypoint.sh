@@ -10,10 +10,17 @@ echo "MySQL is up!"
 
 echo "Applying Django migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
+python manage.py flushexpiredtokens
 
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+if [ "$SERVER_MODE" = "asgi" ]; then
+  echo "Starting Gunicorn with Uvicorn (ASGI) workers..."
+  exec gunicorn invoice_backend.asgi:application --bind 0.0.0.0:8000 --worker-class uvicorn.workers.UvicornWorker
+fi
+
 echo "Starting Gunicorn server..."
 exec gunicorn invoice_backend.wsgi:application --bind 0.0.0.0:8000
 
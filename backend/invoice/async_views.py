@@ -0,0 +1,63 @@
+"""
+Async GET handlers for the busiest invoice endpoints (see
+invoice_backend.async_support). They read through Django's async ORM and
+serialise with the same serializers as the sync views; the data is fully
+loaded first, so serialisation itself touches no database.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework.exceptions import ParseError
+
+from invoice_backend.async_support import json_response
+from .models import Invoice
+from .pagination import InvoiceCursorPagination
+from .serializers import InvoiceSerializer
+from .stats import aget_invoice_stats
+from .reports import FINANCIAL_YEAR_PATTERN
+from .views import FinalInvoiceListCreateView, InvoiceListCreateView, filter_invoices
+
+
+def _invoices(queryset):
+    return queryset.select_related('client', 'branch_address', 'bank_account').prefetch_related('items')
+
+
+def _list_view(base_queryset, sync_view_class):
+    paginated_view = sync_to_async(sync_view_class.as_view())
+    pagination = InvoiceCursorPagination
+
+    async def invoice_list(request):
+        if pagination.page_size_query_param in request.GET or pagination.cursor_query_param in request.GET:
+            # Cursor pages keep DRF's paginator, run in the sync thread.
+            return await paginated_view(request)
+        queryset = filter_invoices(_invoices(base_queryset()), request.GET)
+        invoices = [invoice async for invoice in queryset]
+        return json_response(InvoiceSerializer(invoices, many=True, context={'request': request}).data)
+
+    return invoice_list
+
+
+def _detail_view(base_queryset):
+    async def invoice_detail(request, pk):
+        try:
+            invoice = await _invoices(base_queryset()).aget(pk=pk)
+        except Invoice.DoesNotExist:
+            raise Http404("No Invoice matches the given query.")
+        return json_response(InvoiceSerializer(invoice, context={'request': request}).data)
+
+    return invoice_detail
+
+
+invoice_list = _list_view(Invoice.objects.all, InvoiceListCreateView)
+invoice_detail = _detail_view(Invoice.objects.all)
+final_invoice_list = _list_view(lambda: Invoice.objects.filter(is_saved_final=True), FinalInvoiceListCreateView)
+final_invoice_detail = _detail_view(lambda: Invoice.objects.filter(is_saved_final=True))
+
+
+async def invoice_stats(request):
+    financial_year = request.GET.get('financial_year') or None
+    branch = request.GET.get('branch') or None
+    if financial_year and not FINANCIAL_YEAR_PATTERN.fullmatch(financial_year):
+        raise ParseError("financial_year must look like 2025-2026")
+    if branch and not branch.isdigit():
+        raise ParseError("branch must be an id")
+    return json_response(await aget_invoice_stats(financial_year, branch))
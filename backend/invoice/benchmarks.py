@@ -0,0 +1,182 @@
+"""
+Endpoint benchmark suite: latency percentiles and exact query counts for
+the requests the frontend makes most, run in process with the Django test
+client against seeded data (see invoice.seed).
+
+`manage.py run_benchmarks` runs it in a throwaway test database and
+compares the results with BASELINE_PATH. A scenario regresses when any of
+its sampled requests runs more queries than the baseline allows. Query
+counts are exact and portable between machines, so they are the gate;
+latencies are only comparable on similar hardware and are just reported.
+"""
+import itertools
+import json
+import os
+import time
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from invoice_backend.loadtest import percentile
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+# Latency differences below this many milliseconds are noise, whatever the ratio.
+LATENCY_FLOOR_MS = 2.0
+
+
+class Scenario:
+    """One request type; `request(context)` returns (method, path, JSON body or None)."""
+
+    def __init__(self, name, request, expect=200):
+        self.name = name
+        self.request = request
+        self.expect = expect
+
+
+def _invoice_payload(context, items):
+    today = date.today()
+    return {
+        'invoice_type': 'product',
+        'client': next(context['clients']),
+        'branch_address': context['branch'],
+        'bank_account': context['bank_account'],
+        'invoice_date': today.isoformat(),
+        'due_date': (today + timedelta(days=30)).isoformat(),
+        'currency_type': 'INR',
+        'payment_terms': 'Net 30',
+        'tax_option': 'yes',
+        'tax_rate': '18.00',
+        'items': [
+            {'item_type': 'product', 'product': next(context['products']), 'quantity': 2, 'unit_cost': '0'}
+            for _ in range(items)
+        ],
+    }
+
+
+SCENARIOS = [
+    Scenario('invoice_list', lambda c: ('get', '/api/invoices/invoices/?page_size=50', None)),
+    Scenario('invoice_list_final', lambda c: ('get', '/api/invoices/invoices/?status=final&page_size=50', None)),
+    Scenario('invoice_detail', lambda c: ('get', f"/api/invoices/invoices/{next(c['invoices'])}/", None)),
+    Scenario('invoice_document', lambda c: ('get', f"/api/invoices/invoices/{next(c['invoices'])}/document/", None)),
+    Scenario('invoice_create_1_item', lambda c: ('post', '/api/invoices/invoices/', _invoice_payload(c, 1)), 201),
+    Scenario('invoice_create_10_items', lambda c: ('post', '/api/invoices/invoices/', _invoice_payload(c, 10)), 201),
+    Scenario('invoice_create_50_items', lambda c: ('post', '/api/invoices/invoices/', _invoice_payload(c, 50)), 201),
+    Scenario('invoice_finalise', lambda c: ('patch', f"/api/invoices/invoices/{next(c['proformas'])}/", {'is_final': True})),
+    Scenario('client_list', lambda c: ('get', '/api/clients/clients/', None)),
+    Scenario('product_list', lambda c: ('get', '/api/products/products/', None)),
+    Scenario('tax_list', lambda c: ('get', '/api/invoices/taxes/', None)),
+    Scenario('reference_bundle', lambda c: ('get', '/api/reference-bundle/', None)),
+    Scenario('invoice_stats', lambda c: ('get', '/api/invoices/stats/', None)),
+]
+
+
+def build_context(user):
+    """Ids the scenarios draw from, cycling so repeated requests touch different rows."""
+    from bank.models import BankAccount
+    from branch.models import Branch
+    from clients.models import Client as ClientModel
+    from product.models import Product
+    from .models import Invoice
+
+    invoices = list(Invoice.objects.order_by('-id').values_list('id', flat=True)[:500])
+    proformas = list(Invoice.objects.filter(is_final=False).order_by('id').values_list('id', flat=True))
+    return {
+        'auth': {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'},
+        'invoices': itertools.cycle(invoices),
+        # Each finalisation needs a proforma that has not been finalised yet.
+        'proformas': iter(proformas),
+        'clients': itertools.cycle(ClientModel.objects.values_list('id', flat=True)[:100]),
+        'products': itertools.cycle(Product.objects.values_list('id', flat=True)[:100]),
+        'branch': Branch.objects.values_list('id', flat=True).first(),
+        'bank_account': BankAccount.objects.values_list('id', flat=True).first(),
+    }
+
+
+def run_scenario(scenario, client, context, iterations, warmup):
+    timings, queries = [], []
+    for n in range(warmup + iterations):
+        method, path, body = scenario.request(context)
+        kwargs = {'content_type': 'application/json', 'data': json.dumps(body)} if body is not None else {}
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, headers=context['auth'], **kwargs)
+            elapsed = time.perf_counter() - started
+        if response.status_code != scenario.expect:
+            raise AssertionError(
+                f"{scenario.name}: {method.upper()} {path} returned {response.status_code}: {response.content[:500]!r}"
+            )
+        if n >= warmup:
+            timings.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+    timings.sort()
+    ordered = sorted(queries)
+    return {
+        'queries': ordered[len(ordered) // 2],
+        'max_queries': ordered[-1],
+        'query_counts': queries,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2),
+    }
+
+
+def run_suite(user, iterations=20, warmup=2, names=None):
+    """{scenario name: results} for the current database."""
+    client = Client()
+    context = build_context(user)
+    results = {}
+    # The auth state refresh runs on a timer; keep it out of the counts.
+    with override_settings(AUTH_STATE_SYNC_INTERVAL=3600, PERF_SLOW_REQUEST_MS=float('inf')):
+        for scenario in SCENARIOS:
+            if names and scenario.name not in names:
+                continue
+            results[scenario.name] = run_scenario(scenario, client, context, iterations, warmup)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Regression messages for `results` against `baseline` (both run_suite()
+    output): every sampled request of a scenario must stay within the
+    baseline's highest query count.
+    """
+    problems = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        limit = expected.get('max_queries', expected['queries'])
+        over = [count for count in current.get('query_counts', [current['max_queries']]) if count > limit]
+        if over:
+            problems.append(
+                f"{name}: {len(over)} request(s) ran up to {max(over)} queries, baseline allows {limit}"
+            )
+    return problems
+
+
+def latency_changes(results, baseline, tolerance=0.5):
+    """
+    Scenarios whose p95 latency exceeds the baseline by more than
+    `tolerance`; informational only, as timings depend on the machine.
+    """
+    notes = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        limit = max(expected['p95_ms'] * (1 + tolerance), expected['p95_ms'] + LATENCY_FLOOR_MS)
+        if current['p95_ms'] > limit:
+            notes.append(f"{name}: p95 {current['p95_ms']} ms, baseline {expected['p95_ms']} ms")
+    return notes
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
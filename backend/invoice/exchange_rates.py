@@ -0,0 +1,66 @@
+"""
+The bundled exchange-rate snapshot and INR re-pricing of invoices.
+
+The functions take the models as arguments, so the data migration that
+seeds the rates on deploy can call them with its historical models.
+"""
+import json
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.db.models import F, Q
+
+DEFAULT_SNAPSHOT = Path(__file__).resolve().parent / 'data' / 'exchange_rates.json'
+
+
+def read_snapshot(path=DEFAULT_SNAPSHOT, effective_date=None):
+    """
+    (effective date, {currency: INR per unit}) from a snapshot of the form
+    {"base": "USD", "date": "YYYY-MM-DD", "rates": {...}}. Raises OSError,
+    ValueError or KeyError for a missing or malformed file.
+    """
+    snapshot = json.loads(Path(path).read_text())
+    rates = {code.upper(): Decimal(str(value)) for code, value in snapshot['rates'].items()}
+    base = snapshot.get('base', 'USD').upper()
+    effective_date = date.fromisoformat(effective_date or snapshot.get('date') or date.today().isoformat())
+
+    # Snapshot rates are units per `base`; store INR per unit of currency
+    base_to_inr = Decimal('1') if base == 'INR' else rates.get('INR')
+    if not base_to_inr:
+        raise ValueError("Snapshot has no INR rate.")
+    return effective_date, {
+        currency: (base_to_inr / value).quantize(Decimal('0.000001'))
+        for currency, value in rates.items()
+        if currency != 'INR' and value
+    }
+
+
+def store_rates(ExchangeRate, effective_date, rates):
+    for currency, rate_to_inr in rates.items():
+        ExchangeRate.objects.update_or_create(
+            currency=currency, effective_date=effective_date, defaults={'rate_to_inr': rate_to_inr},
+        )
+
+
+def reprice(Invoice, ExchangeRate):
+    """
+    Set-based re-pricing: one UPDATE per (currency, rate period). Invoices
+    that are saved final keep an existing rate. The earliest period also
+    covers invoices dated before it, as ExchangeRate.rate_for() does.
+    """
+    invoices = Invoice.objects.filter(Q(is_saved_final=False) | Q(exchange_rate=None))
+    updated = invoices.filter(currency_type__iexact='INR').update(exchange_rate=1, total_due_inr=F('total_due'))
+    currencies = ExchangeRate.objects.values_list('currency', flat=True).distinct()
+    for currency in currencies:
+        periods = list(
+            ExchangeRate.objects.filter(currency=currency).order_by('effective_date').values_list('effective_date', 'rate_to_inr')
+        )
+        for index, (effective_date, rate) in enumerate(periods):
+            period = invoices.filter(currency_type__iexact=currency)
+            if index:
+                period = period.filter(invoice_date__gte=effective_date)
+            if index + 1 < len(periods):
+                period = period.filter(invoice_date__lt=periods[index + 1][0])
+            updated += period.update(exchange_rate=rate, total_due_inr=F('total_due') * rate)
+    return updated
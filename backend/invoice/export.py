@@ -0,0 +1,224 @@
+"""
+Streaming CSV/XLSX exports of invoices and invoice items.
+
+Rows are read in primary-key order in fixed-size keyset chunks as plain
+tuples (no model instances), and the encoded file is yielded piece by
+piece, so memory stays flat however many rows are exported. Keyset chunks
+rather than one long `iterator()` because the MySQL client library buffers
+a whole result set on the client.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Coalesce
+
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+# Excel's row limit; longer exports continue on further sheets.
+MAX_SHEET_ROWS = 1048576
+
+STATUS = Case(
+    When(is_saved_final=True, then=Value('Final')),
+    default=Value('Proforma'),
+    output_field=CharField(),
+)
+
+# (column title, queryset expression) per export
+INVOICE_COLUMNS = (
+    ("Invoice ID", F('id')),
+    ("Invoice Number", F('invoice_number')),
+    ("Final Invoice Number", F('final_invoice_number')),
+    ("Status", STATUS),
+    ("Invoice Date", F('invoice_date')),
+    ("Due Date", F('due_date')),
+    ("Financial Year", F('financial_year')),
+    ("Client", F('client__client_name')),
+    ("Client GSTIN", F('client__gstin')),
+    ("Branch", F('branch_address__branch_name')),
+    ("Branch GSTIN", F('branch_address__gstin')),
+    ("Invoice Type", F('invoice_type')),
+    ("Currency", F('currency_type')),
+    ("Payment Terms", F('payment_terms')),
+    ("Tax Rate", F('tax_rate')),
+    ("Subtotal", F('subtotal')),
+    ("GST", F('gst')),
+    ("Discount", F('discount')),
+    ("Amount Paid", F('amount_paid')),
+    ("Total Due", F('total_due')),
+    ("Exchange Rate", F('exchange_rate')),
+    ("Total Due (INR)", F('total_due_inr')),
+)
+ITEM_COLUMNS = (
+    ("Item ID", F('id')),
+    ("Invoice ID", F('invoice_id')),
+    ("Invoice Number", F('invoice__invoice_number')),
+    ("Final Invoice Number", F('invoice__final_invoice_number')),
+    ("Invoice Date", F('invoice__invoice_date')),
+    ("Financial Year", F('invoice__financial_year')),
+    ("Client", F('invoice__client__client_name')),
+    ("Branch", F('invoice__branch_address__branch_name')),
+    ("Currency", F('invoice__currency_type')),
+    ("Item Type", F('item_type')),
+    ("Item", Coalesce(F('name'), F('product__name'))),
+    ("Quantity", F('quantity')),
+    ("Unit Cost", F('unit_cost')),
+    ("Total", F('total')),
+    ("GST", F('total_gst')),
+)
+
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def iter_rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Yield value tuples for `columns`, reading `chunk_size` rows per query in pk order."""
+    names = [f'c{index}' for index in range(len(columns))]
+    values = queryset.annotate(**{name: expression for name, (_, expression) in zip(names, columns)})
+    values = values.order_by('pk').values_list('pk', *names)
+    last_pk = None
+    while True:
+        chunk = values if last_pk is None else values.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size].iterator(chunk_size=chunk_size))
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        for row in rows:
+            yield row[1:]
+        # Drop this chunk before the next one is fetched, so only one is ever held.
+        del rows
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_csv(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_text(value) for value in row])
+        if count % ROWS_PER_WRITE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object; zipfile falls back to data descriptors for it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = escape(_ILLEGAL_XML_CHARS.sub('', _text(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+
+def _workbook_parts(sheet_names):
+    main = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rel = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    package_rel = 'http://schemas.openxmlformats.org/package/2006/relationships'
+    sheets = ''.join(
+        f'<sheet name="{escape(name)}" sheetId="{index}" r:id="rId{index}"/>'
+        for index, name in enumerate(sheet_names, start=1)
+    )
+    sheet_rels = ''.join(
+        f'<Relationship Id="rId{index}" Type="{rel}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+        for index in range(1, len(sheet_names) + 1)
+    )
+    sheet_types = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for index in range(1, len(sheet_names) + 1)
+    )
+    header = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return {
+        'xl/workbook.xml': f'{header}<workbook xmlns="{main}" xmlns:r="{rel}"><sheets>{sheets}</sheets></workbook>',
+        'xl/_rels/workbook.xml.rels': f'{header}<Relationships xmlns="{package_rel}">{sheet_rels}</Relationships>',
+        '_rels/.rels': (
+            f'{header}<Relationships xmlns="{package_rel}">'
+            f'<Relationship Id="rId1" Type="{rel}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ),
+        '[Content_Types].xml': (
+            f'{header}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{sheet_types}</Types>'
+        ),
+    }
+
+
+def stream_xlsx(headers, rows, title, max_sheet_rows=MAX_SHEET_ROWS):
+    """
+    A minimal XLSX workbook (inline strings, no styles) written straight
+    into a streamed zip. Worksheets are compressed as they are produced;
+    the workbook parts that list the sheets are added at the end.
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    header_row = _xlsx_row(headers)
+    sheet_names = []
+    rows = iter(rows)
+    row = next(rows, None)
+    while True:
+        sheet_names.append(title if not sheet_names else f"{title} {len(sheet_names) + 1}")
+        with archive.open(f'xl/worksheets/sheet{len(sheet_names)}.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((SHEET_START + header_row).encode())
+            written, pending = 1, []
+            while row is not None and written < max_sheet_rows:
+                pending.append(_xlsx_row(row))
+                written += 1
+                if len(pending) == ROWS_PER_WRITE:
+                    sheet.write(''.join(pending).encode())
+                    pending = []
+                    yield sink.take()
+                row = next(rows, None)
+            sheet.write((''.join(pending) + SHEET_END).encode())
+        yield sink.take()
+        if row is None:
+            break
+    for name, content in _workbook_parts(sheet_names).items():
+        archive.writestr(name, content)
+    archive.close()
+    yield sink.take()
@@ -0,0 +1,122 @@
+"""
+Python counterparts of the frontend print helpers (formatAmount, formatDate,
+numberToWords, formatInvoiceNumber) so server-rendered documents read the
+same as the browser print view.
+"""
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+
+ONES = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine"]
+TEENS = ["Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen", "Eighteen", "Nineteen"]
+TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+
+def format_amount(amount, decimals=2):
+    """en-IN grouping: 12,34,567.89"""
+    try:
+        value = Decimal(str(amount if amount is not None else 0))
+    except InvalidOperation:
+        value = Decimal(0)
+    quantum = Decimal(1).scaleb(-decimals)
+    value = value.quantize(quantum, rounding=ROUND_HALF_UP)
+    sign = '-' if value < 0 else ''
+    whole, _, fraction = f"{abs(value):.{decimals}f}".partition('.')
+    if len(whole) > 3:
+        head, tail = whole[:-3], whole[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        whole = ','.join(groups + [tail])
+    return f"{sign}{whole}.{fraction}" if decimals else f"{sign}{whole}"
+
+
+def format_date(value):
+    if not value:
+        return "N/A"
+    return value.strftime('%d-%m-%Y')
+
+
+def format_invoice_number(number, proforma_prefix=None):
+    """
+    Zero-pad the trailing sequence to two digits (MB-7 -> MB-07,
+    X/25-26/3 -> X/25-26/03). `proforma_prefix` is the issuing branch's
+    (Branch.proforma_prefix), "MB" when blank as in Invoice.save().
+    """
+    if not number:
+        return "N/A"
+    prefix = proforma_prefix or "MB"
+    match = re.fullmatch(rf'{re.escape(prefix)}-(\d+)', number)
+    if match:
+        return f"{prefix}-{int(match.group(1)):02d}"
+    if '/' in number:
+        parts = number.split('/')
+        if parts[-1].isdigit():
+            parts[-1] = f"{int(parts[-1]):02d}"
+            return '/'.join(parts)
+    return number
+
+
+def _below_hundred(n):
+    if n < 10:
+        return ONES[n]
+    if n < 20:
+        return TEENS[n - 10]
+    return f"{TENS[n // 10]} {ONES[n % 10]}".strip()
+
+
+def _below_thousand(n):
+    if n < 100:
+        return _below_hundred(n)
+    hundreds, remainder = divmod(n, 100)
+    if remainder == 0:
+        return f"{ONES[hundreds]} Hundred"
+    return f"{ONES[hundreds]} Hundred {_below_hundred(remainder)}"
+
+
+def _indian_words(n):
+    if n < 1000:
+        return _below_thousand(n)
+    words = []
+    for size, name in ((10000000, "Crore"), (100000, "Lakh"), (1000, "Thousand")):
+        if n >= size:
+            # Amounts beyond 99 crore keep stacking crores, as the print view does.
+            words.append(f"{_indian_words(n // size) if size == 10000000 else _below_thousand(n // size)} {name}")
+            n %= size
+    if n:
+        words.append(_below_thousand(n))
+    return ' '.join(words)
+
+
+def _international_words(n):
+    words = []
+    for size, name in ((10 ** 12, "Trillion"), (10 ** 9, "Billion"), (10 ** 6, "Million"), (1000, "Thousand")):
+        if n >= size:
+            words.append(f"{_international_words(n // size) if size == 10 ** 12 else _below_thousand(n // size)} {name}")
+            n %= size
+    if n:
+        words.append(_below_thousand(n))
+    return ' '.join(words)
+
+
+@lru_cache(maxsize=4096)
+def _words(whole, indian):
+    if whole == 0:
+        return "Zero"
+    return _indian_words(whole) if indian else _international_words(whole)
+
+
+def amount_in_words(amount, currency):
+    """
+    Whole-unit amount in words, e.g. 'One Lakh Five Thousand INR Only' or
+    'One Hundred Five Thousand USD Only'. The spelled-out number is
+    memoised, so lists and re-renders of the same totals are free.
+    """
+    value = Decimal(str(amount or 0)).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+    # Rupee amounts read in lakh/crore, every other currency in millions.
+    words = _words(abs(int(value)), (currency or 'INR').upper() == 'INR')
+    result = f"{words} {currency} Only" if currency else f"{words} Only"
+    return f"Negative {result}" if value < 0 else result
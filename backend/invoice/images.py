@@ -0,0 +1,110 @@
+"""
+Size-bounded, optimised copies of uploaded images (the invoice logo and
+user avatars), generated once when the upload is saved.
+
+Each variant is stored as `variants/<content hash>.<ext>`, so its URL only
+ever refers to one set of bytes and can be cached indefinitely; a new
+upload gets new names instead of overwriting the old files.
+"""
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+VARIANT_DIR = 'variants'
+
+# name -> (format, longest side in pixels)
+LOGO_VARIANTS = {
+    'print': ('PNG', 1200),
+    'screen': ('WEBP', 480),
+    'thumbnail': ('WEBP', 128),
+}
+AVATAR_VARIANTS = {
+    'screen': ('WEBP', 256),
+    'thumbnail': ('WEBP', 64),
+}
+
+EXTENSIONS = {'PNG': 'png', 'WEBP': 'webp'}
+
+
+def _encode(img, image_format):
+    if image_format == 'WEBP' and not features.check('webp'):
+        image_format = 'PNG'
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    img = img.convert('RGBA' if has_alpha else 'RGB')
+    buffer = io.BytesIO()
+    if image_format == 'WEBP':
+        img.save(buffer, format='WEBP', quality=85, method=6)
+    else:
+        img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue(), EXTENSIONS[image_format]
+
+
+def build_variants(image_field, specs):
+    """
+    Write every variant in `specs` for `image_field` to its storage.
+    Returns {'source': name, <variant>: {'path', 'width', 'height', 'bytes'}};
+    just the source name when the file is not a readable image.
+    """
+    variants = {'source': image_field.name}
+    try:
+        with image_field.open('rb'), Image.open(image_field) as upload:
+            source = ImageOps.exif_transpose(upload)
+            source.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return variants
+
+    storage = image_field.storage
+    for name, (image_format, max_side) in specs.items():
+        img = source.copy()
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        data, extension = _encode(img, image_format)
+        path = f"{VARIANT_DIR}/{hashlib.sha256(data).hexdigest()[:24]}.{extension}"
+        if not storage.exists(path):
+            path = storage.save(path, ContentFile(data))
+        variants[name] = {'path': path, 'width': img.width, 'height': img.height, 'bytes': len(data)}
+    return variants
+
+
+def refresh_variants(instance, image_field_name, variants_field_name, specs):
+    """
+    Regenerate `instance`'s variants if its image changed since they were
+    built. Called after the instance is saved, so the upload is in storage;
+    the new metadata is written with an UPDATE to avoid a second save().
+    """
+    image_field = getattr(instance, image_field_name)
+    current = getattr(instance, variants_field_name) or {}
+    source = image_field.name or None
+    if current.get('source') == source:
+        return False
+    variants = build_variants(image_field, specs) if source else {}
+    setattr(instance, variants_field_name, variants)
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{variants_field_name: variants})
+    return True
+
+
+def variant_urls(image_field, variants, request=None):
+    """{name: {'url', 'width', 'height'}}, absolute when a request is given (like DRF's ImageField)."""
+    urls = {}
+    for name, variant in (variants or {}).items():
+        if name == 'source':
+            continue
+        url = image_field.storage.url(variant['path'])
+        urls[name] = {
+            'url': request.build_absolute_uri(url) if request is not None else url,
+            'width': variant['width'],
+            'height': variant['height'],
+        }
+    return urls
+
+
+def variant_path(image_field, variants, name):
+    """Local filesystem path of a variant, or None if it is missing or the storage is remote."""
+    variant = (variants or {}).get(name)
+    if not variant:
+        return None
+    try:
+        return image_field.storage.path(variant['path'])
+    except NotImplementedError:
+        return None
@@ -0,0 +1,133 @@
+"""
+Bulk invoice import from JSON-lines or CSV.
+
+Input is consumed line by line, so an upload of any size is never held in
+memory. Invoices are handled in batches: the clients, branches, bank
+accounts and products a batch refers to are loaded up front, then each
+invoice is validated with the API serializer and saved (one transaction per
+batch, a savepoint per invoice). Anything that fails is reported with its
+line number instead of aborting the import.
+"""
+import csv
+import json
+
+from django.db import transaction
+
+from bank.models import BankAccount
+from branch.models import Branch
+from clients.models import Client
+from product.models import Product
+from .serializers import ImportInvoiceSerializer, preload
+
+DEFAULT_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 1000
+# Failures listed in the result; further ones are only counted.
+MAX_REPORTED_ERRORS = 100
+
+# CSV layout: one row per item; consecutive rows with the same `ref` are one invoice.
+CSV_INVOICE_FIELDS = (
+    'invoice_type', 'client', 'branch_address', 'bank_account', 'invoice_date', 'due_date', 'currency_type',
+    'payment_terms', 'tax_option', 'tax_rate', 'discount', 'amount_paid',
+)
+CSV_ITEM_FIELDS = ('item_type', 'product', 'name', 'quantity', 'unit_cost', 'description')
+
+
+def iter_jsonl(lines):
+    """Yield (line number, ref, payload or None, parse error or None); each line is one invoice object."""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError as exc:
+            yield number, None, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(payload, dict):
+            yield number, None, None, "Each line must be a JSON object."
+            continue
+        yield number, payload.pop('ref', None), payload, None
+
+
+def iter_csv(lines):
+    """Yield (line number, ref, payload, None) per invoice, grouping consecutive rows on `ref`."""
+    reader = csv.DictReader(lines)
+    current = None
+    for row in reader:
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        ref = row.get('ref') or f"line-{reader.line_num}"
+        if current is None or current[1] != ref:
+            if current is not None:
+                yield current
+            payload = {field: row[field] for field in CSV_INVOICE_FIELDS if row.get(field)}
+            payload['items'] = []
+            current = (reader.line_num, ref, payload, None)
+        item = {field: row[field] for field in CSV_ITEM_FIELDS if row.get(field)}
+        if item:
+            if 'description' in item:
+                item['description'] = [part.strip() for part in item['description'].split('|') if part.strip()]
+            current[2]['items'].append(item)
+    if current is not None:
+        yield current
+
+
+def preload_references(context, payloads):
+    """Load the clients, branches, bank accounts and products these payloads refer to, one query per table."""
+    items = [
+        item for payload in payloads if isinstance(payload.get('items'), list)
+        for item in payload['items'] if isinstance(item, dict)
+    ]
+    preload(context, Client, [payload.get('client') for payload in payloads])
+    preload(context, Branch, [payload.get('branch_address') for payload in payloads])
+    preload(context, BankAccount, [payload.get('bank_account') for payload in payloads])
+    preload(context, Product, [item.get('product') for item in items])
+
+
+def import_invoices(documents, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate and save the documents yielded by `iter_jsonl`/`iter_csv`.
+    Returns {'created': n, 'failed': n, 'errors': [{'line', 'ref', 'errors'}],
+    'errors_truncated': n}; only the first MAX_REPORTED_ERRORS failures are
+    listed and `errors_truncated` counts the rest.
+    """
+    result = {'created': 0, 'failed': 0, 'errors': [], 'errors_truncated': 0}
+    batch = []
+
+    def fail(line, ref, errors):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'line': line, 'ref': ref, 'errors': errors})
+        else:
+            result['errors_truncated'] += 1
+
+    def flush():
+        # A fresh context per batch, so only the rows this batch refers to are held
+        context = {}
+        preload_references(context, [payload for _, _, payload in batch])
+        with transaction.atomic():
+            for line, ref, payload in batch:
+                serializer = ImportInvoiceSerializer(data=payload, context=context)
+                if not serializer.is_valid():
+                    fail(line, ref, serializer.errors)
+                    continue
+                try:
+                    with transaction.atomic():
+                        serializer.save()
+                except Exception as exc:
+                    # Whatever one row raises (a database error, a missing exchange rate, an
+                    # amount too large for its column) is rolled back to its savepoint and reported.
+                    fail(line, ref, {'non_field_errors': [str(exc)]})
+                else:
+                    result['created'] += 1
+        batch.clear()
+
+    for line, ref, payload, error in documents:
+        if error:
+            fail(line, ref, {'non_field_errors': [error]})
+            continue
+        batch.append((line, ref, payload))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
@@ -0,0 +1,38 @@
+"""
+In-process cache of the current logo.
+
+Every print view, PDF and invoice document needs the logo, which only
+changes when someone uploads a new one. Each process keeps the Logo row in
+memory and checks a version token in the shared cache, so a new upload
+is picked up by every worker without a query per request.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+
+VERSION_KEY = 'logo:version'
+
+_lock = threading.Lock()
+_current = {'version': None, 'logo': None}
+
+
+def invalidate_logo():
+    # A fresh token rather than a counter, so an evicted key never brings back an old version.
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def current_logo():
+    """The newest Logo (or None), loaded from the database only after it changes."""
+    from .models import Logo
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    if _current['version'] != version:
+        logo = Logo.objects.last()
+        with _lock:
+            _current.update(version=version, logo=logo)
+        return logo
+    return _current['logo']
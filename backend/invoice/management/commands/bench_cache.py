@@ -0,0 +1,82 @@
+import json
+import shutil
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from invoice_backend.loadtest import percentile
+
+
+def _payload(kind):
+    if kind == 'otp':
+        return '123456'
+    # Roughly the shape and size of a reference bundle with a few hundred rows.
+    return {'version': 1, 'data': {'clients': [{'id': n, 'client_name': f'Client {n}', 'gst': '0'} for n in range(300)]}}
+
+
+def measure(cache, key, value, iterations):
+    """Latency of get() hits on one key, in microseconds."""
+    cache.set(key, value, 300)
+    if cache.get(key) != value:
+        raise RuntimeError(f"{key!r} was not stored")
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        cache.get(key)
+        timings.append(time.perf_counter() - started)
+    cache.delete(key)
+    timings.sort()
+    return {
+        'gets_per_s': round(len(timings) / sum(timings)),
+        'p50_us': round(percentile(timings, 0.50) * 1e6, 1),
+        'p99_us': round(percentile(timings, 0.99) * 1e6, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cache hit latency: the per-process L1 of the default cache, the default cache for keys "
+        "that bypass L1 (OTPs), and each shared backend (locmem, file, db) on its own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help="get() calls per measurement.")
+        parser.add_argument('--payload', choices=['otp', 'bundle'], action='append', help="Value size (default: both).")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        tmpdir = tempfile.mkdtemp(prefix='bench-cache-')
+        try:
+            backends = [
+                ('default L1 hit', caches['default'], 'reference_bundle:bench'),
+                ('default, not in L1', caches['default'], 'otp_bench@example.com'),
+                ('locmem', LocMemCache('bench', {}), 'bench'),
+                ('file', FileBasedCache(tmpdir, {}), 'bench'),
+            ]
+            if 'django_cache' in connection.introspection.table_names():
+                backends.append((f'db ({connection.vendor})', DatabaseCache('django_cache', {}), 'bench'))
+            else:
+                self.stderr.write("Skipping the db backend: run `manage.py createcachetable` first.")
+
+            results = []
+            for payload in options['payload'] or ['otp', 'bundle']:
+                value = _payload(payload)
+                for name, cache, key in backends:
+                    results.append({'backend': name, 'payload': payload, **measure(cache, key, value, options['iterations'])})
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'backend':<22} {'payload':<8} {'gets/s':>10} {'p50 us':>9} {'p99 us':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['backend']:<22} {row['payload']:<8} {row['gets_per_s']:>10} {row['p50_us']:>9} {row['p99_us']:>9}"
+            )
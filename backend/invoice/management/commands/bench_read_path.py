@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from invoice.models import Invoice
+from invoice_backend.loadtest import hammer
+
+SERVERS = {
+    # name -> (gunicorn app, extra arguments, ASYNC_READ_VIEWS)
+    'sync': ('invoice_backend.wsgi:application', [], 'False'),
+    'asgi': ('invoice_backend.asgi:application', ['--worker-class', 'uvicorn.workers.UvicornWorker'], 'True'),
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"server exited with status {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"server on port {port} did not start within {timeout}s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/s and latency percentiles of the hot GET endpoints on the sync (WSGI) "
+        "stack and the ASGI stack with async read views, under many concurrent keep-alive clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', default=[], metavar='NAME=URL',
+            help="A running server to measure, e.g. sync=http://127.0.0.1:8000 (repeatable).",
+        )
+        parser.add_argument(
+            '--spawn', action='store_true',
+            help="Start a gunicorn sync server and a gunicorn+uvicorn ASGI server on free local ports and measure both.",
+        )
+        parser.add_argument('--workers', type=int, default=2, help="Worker processes per spawned server.")
+        parser.add_argument('--concurrency', type=int, default=200, help="Concurrent clients.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint and target.")
+        parser.add_argument('--warmup', type=int, default=100, help="Unmeasured requests per endpoint first.")
+        parser.add_argument('--path', action='append', default=[], help="Endpoint path to measure (repeatable).")
+        parser.add_argument('--token', help="Bearer token sent with every request.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def default_paths(self):
+        paths = ['/api/invoices/invoices/', '/api/invoices/stats/', '/api/reference-bundle/']
+        invoice_id = Invoice.objects.order_by('-id').values_list('id', flat=True).first()
+        if invoice_id:
+            paths.insert(1, f'/api/invoices/invoices/{invoice_id}/')
+        return paths
+
+    def spawn(self, name, workers):
+        app, extra, async_views = SERVERS[name]
+        port = _free_port()
+        env = {**os.environ, 'ASYNC_READ_VIEWS': async_views, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'invoice_backend.settings')}
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+             '--log-level', 'warning', *extra],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        _wait_for_port(port, process)
+        return f'http://127.0.0.1:{port}', process
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, _, url = target.partition('=')
+            if not url:
+                raise CommandError(f"--target must look like NAME=URL, got {target!r}")
+            targets.append((name, url))
+        processes = []
+        try:
+            if options['spawn']:
+                for name in SERVERS:
+                    url, process = self.spawn(name, options['workers'])
+                    processes.append(process)
+                    targets.append((name, url))
+            if not targets:
+                raise CommandError("Give at least one --target or use --spawn.")
+            headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else None
+            results = asyncio.run(self.run(targets, options['path'] or self.default_paths(), headers, options))
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+        self.report(results, options['json'])
+
+    async def run(self, targets, paths, headers, options):
+        results = []
+        for path in paths:
+            for name, url in targets:
+                if options['warmup']:
+                    await hammer(url, path, options['warmup'], min(options['concurrency'], options['warmup']), headers)
+                summary = await hammer(url, path, options['requests'], options['concurrency'], headers)
+                results.append({'target': name, 'path': path, **summary})
+        return results
+
+    def report(self, results, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'path':<40} {'target':<8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+        for row in results:
+            self.stdout.write(
+                f"{row['path']:<40} {row['target']:<8} {row['rps']:>9} {row['p50_ms']:>9} "
+                f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['errors']:>7}"
+            )
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from invoice.images import AVATAR_VARIANTS, LOGO_VARIANTS, refresh_variants
+from invoice.logo import invalidate_logo
+from invoice.models import Logo
+
+
+class Command(BaseCommand):
+    help = "Generate the resized logo and avatar variants for uploads saved before they existed."
+
+    def handle(self, *args, **options):
+        built = 0
+        for logo in Logo.objects.exclude(logo_image='').exclude(logo_image__isnull=True).iterator():
+            built += refresh_variants(logo, 'logo_image', 'variants', LOGO_VARIANTS)
+        if built:
+            invalidate_logo()
+        users = get_user_model().objects.exclude(avatar='').exclude(avatar__isnull=True)
+        for user in users.iterator():
+            built += refresh_variants(user, 'avatar', 'avatar_variants', AVATAR_VARIANTS)
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} image(s)."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from invoice.exchange_rates import DEFAULT_SNAPSHOT, read_snapshot, reprice, store_rates
+from invoice.models import ExchangeRate, Invoice
+
+
+class Command(BaseCommand):
+    help = (
+        "Load exchange rates from a JSON snapshot ({\"base\": \"USD\", \"date\": \"YYYY-MM-DD\", "
+        "\"rates\": {...}}) and optionally re-price invoices in INR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(DEFAULT_SNAPSHOT), help="Snapshot file to load.")
+        parser.add_argument('--date', help="Effective date for the rates (defaults to the snapshot's date, else today).")
+        parser.add_argument('--reprice', action='store_true', help="Recompute exchange_rate/total_due_inr on invoices.")
+
+    def handle(self, *args, **options):
+        try:
+            effective_date, rates = read_snapshot(options['path'], options['date'])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read snapshot: {exc}")
+
+        with transaction.atomic():
+            store_rates(ExchangeRate, effective_date, rates)
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(rates)} rates effective {effective_date}."))
+
+        if options['reprice']:
+            self.stdout.write(f"Re-priced {reprice(Invoice, ExchangeRate)} invoice(s).")
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoice_backend.loadtest import HttpClient, HttpError, histogram, summarize
+
+# The calls the frontend makes, in order, to raise and finalise one invoice:
+# CreateInvoice loads the reference bundle and posts the invoice with its
+# items, FinalInvoiceView loads the document and PATCHes is_final, and
+# InvoiceList then shows the final invoices.
+STEPS = ('reference_data', 'create', 'document', 'finalise', 'final_list')
+
+# Substrings of error responses that identify the failures which only
+# appear under concurrency (MySQL, SQLite and PostgreSQL wordings). A
+# server with DEBUG=False hides the cause of a 500; run it with DEBUG=True
+# to have those classified too.
+FAILURE_MARKERS = (
+    ('deadlock', ('deadlock', 'lock wait timeout', 'database is locked', 'could not serialize')),
+    ('duplicate_number', ('duplicate entry', 'unique constraint', 'already exists', 'duplicate key')),
+)
+
+
+def classify(status, body):
+    # The whole body: Django's debug page puts the exception after a lot of CSS.
+    text = body.decode('utf-8', 'replace').lower()
+    for kind, markers in FAILURE_MARKERS:
+        if any(marker in text for marker in markers):
+            return kind
+    return f'http_{status}'
+
+
+class StepFailed(Exception):
+    pass
+
+
+class VirtualUser:
+    """One accountant: a keep-alive connection and the reference data they have loaded."""
+
+    def __init__(self, base_url, headers, items, rng, run):
+        self.client = HttpClient(base_url, headers=headers)
+        self.items = items
+        self.rng = rng
+        self.run = run
+        self.bundle = None
+        self.version = None
+
+    async def call(self, step, method, path, body=None, expect=200):
+        started = time.perf_counter()
+        try:
+            status, _, content = await self.client.request(method, path, body)
+        except (OSError, HttpError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+            self.run.fail(step, 'connection', repr(exc))
+            raise StepFailed()
+        elapsed = time.perf_counter() - started
+        if status != expect and not (step == 'reference_data' and status == 304):
+            self.run.fail(step, classify(status, content), content[:300].decode('utf-8', 'replace'))
+            raise StepFailed()
+        self.run.latencies[step].append(elapsed)
+        return json.loads(content) if content else None
+
+    async def load_reference_data(self):
+        if self.bundle is None:
+            data = await self.call('reference_data', 'GET', '/api/reference-bundle/')
+            self.bundle = data['data']
+            self.version = data['version']
+        else:
+            # Later visits only fetch what changed; the ids already held stay valid for this run.
+            data = await self.call('reference_data', 'GET', f'/api/reference-bundle/?since={self.version}')
+            if data is not None:
+                self.version = data['version']
+
+    def invoice_payload(self):
+        rng, bundle = self.rng, self.bundle
+        today = date.today()
+        taxes = bundle['taxes']
+        return {
+            'invoice_type': 'product',
+            'client': rng.choice(bundle['clients'])['id'],
+            'branch_address': rng.choice(bundle['branches'])['id'],
+            'bank_account': rng.choice(bundle['bank_accounts'])['id'],
+            'invoice_date': today.isoformat(),
+            'due_date': (today + timedelta(days=3)).isoformat(),
+            'currency_type': 'INR',
+            'payment_terms': 'Net 3',
+            'tax_option': 'yes' if taxes else 'no',
+            'tax_rate': rng.choice(taxes)['percentage'] if taxes else None,
+            'discount': '0',
+            'amount_paid': '0',
+            'items': [
+                {
+                    'item_type': 'product',
+                    'product': product['id'],
+                    'name': None,
+                    'quantity': rng.randrange(1, 10),
+                    'unit_cost': str(product['unit_cost']),
+                    'description': [],
+                }
+                for product in rng.sample(bundle['products'], min(self.items, len(bundle['products'])))
+            ],
+        }
+
+    async def workflow(self):
+        started = time.perf_counter()
+        try:
+            await self.load_reference_data()
+            invoice = await self.call('create', 'POST', '/api/invoices/invoices/', self.invoice_payload(), expect=201)
+            self.run.numbers['proforma'].append(invoice['invoice_number'])
+            await self.call('document', 'GET', f"/api/invoices/invoices/{invoice['id']}/document/")
+            final = await self.call(
+                'finalise', 'PATCH', f"/api/invoices/invoices/{invoice['id']}/", {'is_final': True, 'is_saved_final': True},
+            )
+            if not final.get('final_invoice_number'):
+                self.run.fail('finalise', 'missing_number', f"invoice {invoice['id']} finalised without a number")
+                return
+            self.run.numbers['final'].append(final['final_invoice_number'])
+            await self.call('final_list', 'GET', '/api/invoices/final-invoices/')
+        except StepFailed:
+            return
+        self.run.latencies['workflow'].append(time.perf_counter() - started)
+
+
+class LoadRun:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)  # step -> {kind: count}
+        self.samples = {}  # (step, kind) -> first response body, for the report
+        self.numbers = defaultdict(list)
+
+    def fail(self, step, kind, detail):
+        self.errors[step][kind] += 1
+        self.samples.setdefault((step, kind), detail)
+
+    def duplicates(self):
+        return {
+            kind: sorted(number for number, seen in Counter(numbers).items() if seen > 1)
+            for kind, numbers in self.numbers.items()
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the frontend's invoice workflow (reference data, create with items, document, finalise, "
+        "final list) from many concurrent users against a running server (runserver or gunicorn), and "
+        "report throughput, latency histograms and errors, including deadlocks and duplicate invoice numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the running backend.")
+        parser.add_argument('--users', type=int, default=50, help="Concurrent users.")
+        parser.add_argument('--workflows', type=int, default=10, help="Workflows per user (ignored with --duration).")
+        parser.add_argument('--duration', type=float, help="Run for this many seconds instead of a fixed count.")
+        parser.add_argument('--items', type=int, default=5, help="Line items per invoice.")
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help="Mean pause in seconds between a user's workflows (exponentially distributed).")
+        parser.add_argument('--token', help="Bearer token sent with every request.")
+        parser.add_argument('--email', help="Log in with this account instead of --token.")
+        parser.add_argument('--password')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("--users must be at least 1.")
+        results = asyncio.run(self.run(options))
+        self.report(results, options['json'])
+        duplicates = {kind: numbers for kind, numbers in results['duplicates'].items() if numbers}
+        if duplicates:
+            raise CommandError(f"Duplicate invoice numbers were issued: {duplicates}")
+
+    async def login(self, options):
+        if options['token']:
+            return {'Authorization': f"Bearer {options['token']}"}
+        if not options['email']:
+            return None
+        client = HttpClient(options['url'])
+        try:
+            status, _, body = await client.request(
+                'POST', '/api/auth/login/', {'email': options['email'], 'password': options['password']},
+            )
+        finally:
+            await client.close()
+        if status != 200:
+            raise CommandError(f"Login failed with status {status}: {body[:300]!r}")
+        return {'Authorization': f"Bearer {json.loads(body)['access']}"}
+
+    async def run(self, options):
+        headers = await self.login(options)
+        run = LoadRun()
+        deadline = time.monotonic() + options['duration'] if options['duration'] else None
+
+        async def user(n):
+            rng = random.Random(options['seed'] * 100003 + n)
+            virtual_user = VirtualUser(options['url'], headers, options['items'], rng, run)
+            done = 0
+            try:
+                while (time.monotonic() < deadline) if deadline else done < options['workflows']:
+                    await virtual_user.workflow()
+                    done += 1
+                    if options['think_time']:
+                        await asyncio.sleep(rng.expovariate(1 / options['think_time']))
+            finally:
+                await virtual_user.client.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(options['users'])))
+        elapsed = time.perf_counter() - started
+
+        # A failed step ends its workflow, so a workflow fails whenever one of its steps does.
+        run.errors['workflow'] = sum((run.errors[step] for step in STEPS), Counter())
+        steps = {}
+        for step in (*STEPS, 'workflow'):
+            errors = sum(run.errors[step].values())
+            steps[step] = {
+                **summarize(run.latencies[step], errors, elapsed),
+                'error_rate': round(errors / max(len(run.latencies[step]) + errors, 1), 4),
+                'errors_by_kind': dict(run.errors[step]),
+                'histogram': histogram(run.latencies[step]),
+            }
+        return {
+            'users': options['users'],
+            'elapsed_s': round(elapsed, 2),
+            'steps': steps,
+            'errors_by_kind': dict(run.errors['workflow']),
+            'error_samples': {f'{step}/{kind}': detail for (step, kind), detail in run.samples.items()},
+            'duplicates': run.duplicates(),
+        }
+
+    def report(self, results, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['users']} users for {results['elapsed_s']} s")
+        self.stdout.write(
+            f"{'step':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}"
+        )
+        for step, row in results['steps'].items():
+            self.stdout.write(
+                f"{step:<16} {row['requests']:>8} {row['rps']:>8} {row['p50_ms']:>9} {row['p90_ms']:>9} "
+                f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['errors']:>7}"
+            )
+        for step, row in results['steps'].items():
+            total = sum(count for _, count in row['histogram'])
+            if not total:
+                continue
+            self.stdout.write(f"\n{step} latency")
+            for label, count in row['histogram']:
+                bar = '#' * round(40 * count / total)
+                self.stdout.write(f"  {label:>12} {count:>7} {bar}")
+        self.stdout.write("\nerrors: " + (", ".join(f"{kind} {n}" for kind, n in results['errors_by_kind'].items()) or "none"))
+        for key, detail in results['error_samples'].items():
+            self.stdout.write(f"  {key}: {detail}")
+        for kind, numbers in results['duplicates'].items():
+            if numbers:
+                self.stdout.write(f"duplicate {kind} numbers: {', '.join(numbers[:20])}")
@@ -0,0 +1,50 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoice.models import Tax
+from invoice.recompute import DEFAULT_CHUNK_SIZE, invoices_for_product, invoices_for_tax, recompute
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply a Tax's current rate or a Product's current price to the open (non-final) invoices that "
+        "still use the old one. Finalised invoices are never changed."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--tax', type=int, help="Id of the edited Tax.")
+        target.add_argument('--product', type=int, help="Id of the edited Product.")
+        parser.add_argument('--previous-rate', help="With --tax: also match invoices that recorded no tax name but charge this rate.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Invoices per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only show what would change.")
+
+    def handle(self, *args, **options):
+        tax = product = previous_rate = None
+        if options['previous_rate'] is not None:
+            if options['tax'] is None:
+                raise CommandError("--previous-rate only applies with --tax.")
+            try:
+                previous_rate = Decimal(options['previous_rate'])
+            except InvalidOperation:
+                raise CommandError(f"Invalid --previous-rate {options['previous_rate']!r}.")
+        try:
+            if options['tax'] is not None:
+                tax = Tax.objects.get(pk=options['tax'])
+                invoices = invoices_for_tax(tax, previous_rate)
+            else:
+                product = Product.objects.get(pk=options['product'])
+                invoices = invoices_for_product(product)
+        except (Tax.DoesNotExist, Product.DoesNotExist) as exc:
+            raise CommandError(str(exc))
+
+        result = recompute(invoices, tax, product, options['dry_run'], options['chunk_size'])
+        for change in result.get('changes', []):
+            fields = ", ".join(f"{name} {old} -> {new}" for name, (old, new) in change['changes'].items())
+            self.stdout.write(f"{change['invoice_number']}: {fields or 'no total changes'} ({change['items']} item(s))")
+        verb = "would be updated" if options['dry_run'] else "updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['invoices']} invoice(s) and {result['items']} item(s) {verb}."
+        ))
@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from invoice.models import Invoice
+from invoice.pdf import render_invoices_to_cache
+
+
+class Command(BaseCommand):
+    help = "Pre-render PDFs of finalised invoices into the PDF cache using a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Invoice ids (default: every finalised invoice).")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count).")
+        parser.add_argument('--batch-size', type=int, default=200, help="Invoices handed to the pool at a time.")
+
+    def handle(self, *args, **options):
+        invoices = (
+            Invoice.objects.filter(is_saved_final=True)
+            .select_related('client', 'branch_address', 'bank_account')
+            .order_by('id')
+        )
+        if options['ids']:
+            invoices = invoices.filter(pk__in=options['ids'])
+
+        batch_size = options['batch_size']
+        rendered = 0
+        skipped = {}
+        # One pool for the whole run, so workers are not restarted per batch.
+        pool = ProcessPoolExecutor(max_workers=options['workers']) if options['workers'] != 1 else None
+        try:
+            # Batches keep the prefetched items of only one slice in memory at a time.
+            last_id = 0
+            while True:
+                batch = list(invoices.filter(id__gt=last_id).prefetch_related('items')[:batch_size])
+                if not batch:
+                    break
+                rendered += len(render_invoices_to_cache(batch, workers=options['workers'], pool=pool, skipped=skipped))
+                last_id = batch[-1].id
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        for pk, reason in skipped.items():
+            self.stderr.write(f"Skipped invoice {pk}: {reason}")
+        self.stdout.write(self.style.SUCCESS(f"{rendered} invoice PDF(s) in the cache, {len(skipped)} skipped."))
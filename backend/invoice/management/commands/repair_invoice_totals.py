@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from invoice.models import Invoice
+
+
+class Command(BaseCommand):
+    help = "Recompute invoice subtotal/GST/total_due from line items where they have drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the invoices that would change.")
+
+    def handle(self, *args, **options):
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=10, decimal_places=2))
+        drifted = (
+            Invoice.objects
+            .annotate(
+                items_subtotal=Coalesce(Sum('items__total'), zero),
+                items_gst=Coalesce(Sum('items__total_gst'), zero),
+            )
+            .filter(~Q(subtotal=F('items_subtotal')) | ~Q(gst=F('items_gst')))
+        )
+        repaired = 0
+        for invoice in drifted.iterator():
+            self.stdout.write(
+                f"{invoice.invoice_number}: subtotal {invoice.subtotal} -> {invoice.items_subtotal}, "
+                f"gst {invoice.gst} -> {invoice.items_gst}"
+            )
+            if not options['dry_run']:
+                invoice.calculate_totals()
+                Invoice.objects.filter(pk=invoice.pk).update(
+                    subtotal=invoice.subtotal, gst=invoice.gst, total_due=invoice.total_due,
+                    total_due_inr=invoice.total_due_inr,
+                )
+            repaired += 1
+        verb = "would be repaired" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"{repaired} invoice(s) {verb}."))
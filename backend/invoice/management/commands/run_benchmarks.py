@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from invoice.benchmarks import BASELINE_PATH, SCENARIOS, compare, latency_changes, load_baseline, run_suite
+from invoice.seed import seed_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, measure latency and query counts of the main endpoints, and fail "
+        "if any sampled request runs more queries than its scenario's baseline. Latency is compared too, "
+        "but only reported. Runs on SQLite with DB_ENGINE=sqlite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--products', type=int, default=300)
+        parser.add_argument('--invoices', type=int, default=5000)
+        parser.add_argument('--items-per-invoice', type=int, default=5)
+        parser.add_argument('--iterations', type=int, default=20, help="Measured requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=2, help="Unmeasured requests per scenario.")
+        parser.add_argument('--scenario', action='append', choices=[s.name for s in SCENARIOS],
+                            help="Run only this scenario (repeatable).")
+        parser.add_argument('--baseline', default=BASELINE_PATH)
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help="p95 slowdown, as a fraction of the baseline, above which a scenario is reported as slower.")
+        parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            counts = seed_data(
+                clients=options['clients'], products=options['products'], invoices=options['invoices'],
+                items_per_invoice=options['items_per_invoice'],
+            )
+            self.stderr.write("Seeded " + ", ".join(f"{n} {kind}" for kind, n in counts.items()))
+            user = get_user_model().objects.create_user(username='bench', password='bench-password')
+            results = run_suite(user, options['iterations'], options['warmup'], options['scenario'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(f"{'scenario':<26} {'queries':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+            for name, row in results.items():
+                self.stdout.write(
+                    f"{name:<26} {row['queries']:>7} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9}"
+                )
+
+        if options['update_baseline']:
+            baseline = load_baseline(options['baseline'])
+            baseline.update(
+                {name: {key: value for key, value in row.items() if key != 'query_counts'} for name, row in results.items()}
+            )
+            with open(options['baseline'], 'w') as file:
+                json.dump(baseline, file, indent=2, sort_keys=True)
+                file.write('\n')
+            self.stderr.write(f"Baseline written to {options['baseline']}")
+            return
+
+        baseline = load_baseline(options['baseline'])
+        for note in latency_changes(results, baseline, options['tolerance']):
+            self.stderr.write(f"Slower than the baseline (not a failure): {note}")
+        problems = compare(results, baseline)
+        if problems:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(problems))
+        self.stderr.write("No regressions against the baseline.")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoice.seed import DEFAULT_BATCH_SIZE, seed_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic clients, branches, bank accounts, products, services and "
+        "invoices with items, using bulk_create. For benchmarks and local load tests; never on production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--branches', type=int, default=3)
+        parser.add_argument('--bank-accounts', type=int, default=3)
+        parser.add_argument('--products', type=int, default=300)
+        parser.add_argument('--services', type=int, default=50)
+        parser.add_argument('--invoices', type=int, default=10000)
+        parser.add_argument('--items-per-invoice', type=int, default=5)
+        parser.add_argument('--final-ratio', type=float, default=0.5, help="Share of invoices created finalised.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable data.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--no-reindex', action='store_true', help="Skip rebuilding the search index.")
+
+    def handle(self, *args, **options):
+        if options['invoices'] and not all(options[name] for name in ('clients', 'branches', 'bank_accounts', 'products')):
+            raise CommandError("Invoices need at least one client, branch, bank account and product.")
+        if not 0 <= options['final_ratio'] <= 1:
+            raise CommandError("--final-ratio must be between 0 and 1.")
+        started = time.perf_counter()
+        counts = seed_data(
+            clients=options['clients'], branches=options['branches'], bank_accounts=options['bank_accounts'],
+            products=options['products'], services=options['services'], invoices=options['invoices'],
+            items_per_invoice=options['items_per_invoice'], final_ratio=options['final_ratio'],
+            seed=options['seed'], batch_size=options['batch_size'], reindex=not options['no_reindex'],
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+def seed_proforma_sequences(apps, schema_editor):
+    Branch = apps.get_model('branch', 'Branch')
+    Invoice = apps.get_model('invoice', 'Invoice')
+    ProformaSequence = apps.get_model('invoice', 'ProformaSequence')
+    prefixes = set(Branch.objects.values_list('proforma_prefix', flat=True)) | {'MB'}
+    sequences = []
+    for prefix in sorted(p for p in prefixes if p):
+        last_number = 0
+        numbers = Invoice.objects.filter(invoice_number__startswith=f"{prefix}-").values_list('invoice_number', flat=True)
+        for invoice_number in numbers.iterator():
+            suffix = invoice_number[len(prefix) + 1:]
+            if suffix.isdigit():
+                last_number = max(last_number, int(suffix))
+        sequences.append(ProformaSequence(prefix=prefix, last_number=last_number))
+    ProformaSequence.objects.bulk_create(sequences)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch', '0006_branch_proforma_prefix'),
+        ('invoice', '0005_add_description_to_invoice_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProformaSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('prefix', models.CharField(max_length=10, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(seed_proforma_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0002_bankaccount_account_holder_name_and_more'),
+        ('branch', '0006_branch_proforma_prefix'),
+        ('clients', '0006_client_gstin'),
+        ('invoice', '0006_proformasequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['is_saved_final', 'invoice_date'], name='invoice_final_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['branch_address', 'financial_year'], name='invoice_branch_fy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['client', 'due_date'], name='invoice_client_due_idx'),
+        ),
+    ]
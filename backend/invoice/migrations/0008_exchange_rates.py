@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 18:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_inr_invoices(apps, schema_editor):
+    Invoice = apps.get_model('invoice', 'Invoice')
+    Invoice.objects.filter(currency_type__iexact='INR').update(exchange_rate=1, total_due_inr=F('total_due'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice', '0007_invoice_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total_due_inr',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=10)),
+                ('effective_date', models.DateField()),
+                ('rate_to_inr', models.DecimalField(decimal_places=6, max_digits=18)),
+            ],
+            options={
+                'unique_together': {('currency', 'effective_date')},
+            },
+        ),
+        migrations.RunPython(backfill_inr_invoices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 18:41
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def backfill_financial_year(apps, schema_editor):
+    """One UPDATE per April-March year, overwriting whatever the form stored."""
+    Invoice = apps.get_model('invoice', 'Invoice')
+    bounds = Invoice.objects.aggregate(first=Min('invoice_date'), last=Max('invoice_date'))
+    if bounds['first'] is None:
+        return
+    first_year = bounds['first'].year - (bounds['first'].month < 4)
+    for year in range(first_year, bounds['last'].year + 1):
+        Invoice.objects.filter(
+            invoice_date__gte=date(year, 4, 1), invoice_date__lt=date(year + 1, 4, 1)
+        ).exclude(financial_year=f"{year}-{year + 1}").update(financial_year=f"{year}-{year + 1}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice', '0008_exchange_rates'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_financial_year, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['financial_year', 'invoice_date'], name='invoice_fy_date_idx'),
+        ),
+    ]
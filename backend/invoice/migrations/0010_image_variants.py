@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice', '0009_invoice_financial_year_backfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logo',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def seed_rates_and_reprice(apps, schema_editor):
+    from invoice.exchange_rates import read_snapshot, reprice, store_rates
+
+    Invoice = apps.get_model('invoice', 'Invoice')
+    ExchangeRate = apps.get_model('invoice', 'ExchangeRate')
+    # Only when nothing was loaded yet; a deployment's own rates stay authoritative.
+    if not ExchangeRate.objects.exists():
+        store_rates(ExchangeRate, *read_snapshot())
+    # 0008 only priced INR invoices; the foreign-currency ones are still NULL.
+    reprice(Invoice, ExchangeRate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rates_and_reprice, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connection, models, transaction
+from django.db.models import F, Max, Sum, Value
 from django.utils import timezone
+from branch.models import SequenceCounter, get_financial_year
+
+CENT = Decimal('0.01')
 
 class Tax(models.Model):
     name = models.CharField(max_length=100)
@@ -8,6 +14,45 @@ class Tax(models.Model):
     def __str__(self):
         return f"{self.name} - {self.percentage}%"
 
+class ProformaSequence(SequenceCounter):
+    """Counter behind proforma numbers, one row per branch proforma prefix."""
+    prefix = models.CharField(max_length=10, unique=True)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.last_number}"
+
+    @classmethod
+    def reserve(cls, prefix, count=1):
+        with transaction.atomic():
+            return cls.advance(count, prefix=prefix)
+
+class ExchangeRate(models.Model):
+    """INR value of one unit of a currency, effective from a given date."""
+    currency = models.CharField(max_length=10)
+    effective_date = models.DateField()
+    rate_to_inr = models.DecimalField(max_digits=18, decimal_places=6)
+
+    class Meta:
+        unique_together = ('currency', 'effective_date')
+
+    def __str__(self):
+        return f"1 {self.currency} = {self.rate_to_inr} INR from {self.effective_date}"
+
+    @classmethod
+    def rate_for(cls, currency, on_date):
+        """
+        Rate in effect on `on_date`: the latest one on or before it, else the
+        earliest one we have. None when the currency is unknown.
+        """
+        if not currency or currency.upper() == 'INR':
+            return Decimal('1')
+        rates = cls.objects.filter(currency=currency.upper())
+        rate = (
+            rates.filter(effective_date__lte=on_date).order_by('-effective_date').values_list('rate_to_inr', flat=True).first()
+            or rates.order_by('effective_date').values_list('rate_to_inr', flat=True).first()
+        )
+        return rate
+
 class Invoice(models.Model):
     invoice_number = models.CharField(max_length=255, unique=True, blank=True)  # Initial format: INV-00001
     final_invoice_number = models.CharField(max_length=255, unique=True, blank=True, null=True)  # Final format: MB24250001
@@ -28,50 +73,144 @@ class Invoice(models.Model):
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_due = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    exchange_rate = models.DecimalField(max_digits=18, decimal_places=6, null=True, blank=True)  # INR per unit of currency_type
+    total_due_inr = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, db_index=True)
     is_final = models.BooleanField(default=False) 
     is_saved_final = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_saved_final', 'invoice_date'], name='invoice_final_date_idx'),
+            models.Index(fields=['branch_address', 'financial_year'], name='invoice_branch_fy_idx'),
+            models.Index(fields=['client', 'due_date'], name='invoice_client_due_idx'),
+            models.Index(fields=['financial_year', 'invoice_date'], name='invoice_fy_date_idx'),
+        ]
+
+    TOTAL_FIELDS = ('subtotal', 'gst', 'total_due', 'total_due_inr')
+
     def calculate_totals(self):
-        if self.pk:
-            items = self.items.all()
-            self.subtotal = sum(item.total for item in items)
-            self.gst = sum(item.total_gst for item in items)
-            self.total_due = self.subtotal + self.gst - self.discount - self.amount_paid
-        else:
-            self.subtotal = 0
-            self.gst = 0
-            self.total_due = -self.discount - self.amount_paid
+        """
+        Full recompute of the totals from the line items with a database
+        aggregate. Item writes keep the totals current through
+        apply_totals_delta(), so this is only needed to repair drift.
+        """
+        totals = self.items.aggregate(subtotal=Sum('total'), gst=Sum('total_gst')) if self.pk else {}
+        self.subtotal = totals.get('subtotal') or 0
+        self.gst = totals.get('gst') or 0
+        self.total_due = self.subtotal + self.gst - self.discount - self.amount_paid
+        self.total_due_inr = self.to_inr(self.total_due)
+
+    def to_inr(self, amount):
+        if self.exchange_rate is None:
+            return None
+        return (Decimal(amount) * self.exchange_rate).quantize(CENT, ROUND_HALF_UP)
+
+    @classmethod
+    def apply_totals_delta(cls, invoice_id, subtotal, gst):
+        """Shift an invoice's stored totals by signed amounts in one UPDATE."""
+        if not subtotal and not gst:
+            return
+        cls.objects.filter(pk=invoice_id).update(
+            subtotal=F('subtotal') + subtotal,
+            gst=F('gst') + gst,
+            total_due=F('total_due') + (subtotal + gst),
+            total_due_inr=F('total_due_inr') + (subtotal + gst) * F('exchange_rate'),
+        )
 
     def save(self, *args, **kwargs):
         if self.pk:
-            old_instance = Invoice.objects.get(pk=self.pk)
-            if old_instance.branch_address != self.branch_address and self.is_final:
+            old_branch_id = Invoice.objects.filter(pk=self.pk).values_list('branch_address_id', flat=True).first()
+            if old_branch_id is not None and old_branch_id != self.branch_address_id and self.is_final:
                 self.final_invoice_number = self.branch_address.get_next_invoice_number()
         else:
             if not self.invoice_number and not self.is_final:
-                last_invoice = Invoice.objects.filter(invoice_number__startswith="MB-").order_by("-id").first()
-                if last_invoice and last_invoice.invoice_number.startswith("MB-"):
-                    try:
-                        new_number = int(last_invoice.invoice_number.split("-")[-1]) + 1
-                    except ValueError:
-                        new_number = 1
-                else:
-                    new_number = 1
-                self.invoice_number = f"MB-{str(new_number).zfill(2)}"
+                prefix = self.branch_address.proforma_prefix or "MB"
+                new_number = ProformaSequence.reserve(prefix)[0]
+                self.invoice_number = f"{prefix}-{str(new_number).zfill(2)}"
+        # Numbered in the same save that finalises, so finalising writes the row once
+        if self.is_final and not self.final_invoice_number:
+            self.final_invoice_number = self.branch_address.get_next_invoice_number()
+
+        # Always derived from the invoice date, so reports can filter on it
+        self.invoice_date = self._meta.get_field('invoice_date').to_python(self.invoice_date)
+        self.financial_year = "%d-%d" % get_financial_year(self.invoice_date)
 
         if self.tax_option == 'yes' and self.tax_rate and not self.tax_name:
             tax = Tax.objects.filter(percentage=self.tax_rate).first()
             if tax:
                 self.tax_name = tax.name
 
-        super().save(*args, **kwargs)
-        self.calculate_totals()
-        super().save(update_fields=['subtotal', 'gst', 'total_due'])
+        # Finalised invoices keep the rate they were issued at
+        if self.exchange_rate is None or not self.is_saved_final:
+            self.exchange_rate = ExchangeRate.rate_for(self.currency_type, self.invoice_date)
+
+        if self._state.adding:
+            self.subtotal = 0
+            self.gst = 0
+            self.total_due = -self.discount - self.amount_paid
+            self.total_due_inr = self.to_inr(self.total_due)
+            super().save(*args, **kwargs)
+            return
+
+        # subtotal and gst are owned by the item deltas, so a copy loaded
+        # before an item write must never overwrite them.
+        update_fields = kwargs.pop('update_fields', None)
+        if update_fields is None:
+            update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+        update_fields = [name for name in update_fields if name not in self.TOTAL_FIELDS]
+        self.total_due = F('subtotal') + F('gst') - Value(
+            Decimal(self.discount) + Decimal(self.amount_paid), output_field=models.DecimalField()
+        )
+        self.total_due_inr = None
+        if self.exchange_rate is not None:
+            self.total_due_inr = self.total_due * Value(self.exchange_rate, output_field=models.DecimalField())
+        super().save(*args, update_fields=update_fields + ['total_due', 'total_due_inr'], **kwargs)
+        self.refresh_from_db(fields=self.TOTAL_FIELDS)
+
+    def add_items(self, items_data, batch_size=None):
+        """
+        Insert many line items with a single bulk_create and move the
+        totals once, instead of re-saving the invoice after every item.
+        Returns the saved items, primary keys included.
+        """
+        with transaction.atomic():
+            items = []
+            for item_data in items_data:
+                item = InvoiceItem(**{**item_data, 'invoice': self})
+                item.calculate_total()
+                items.append(item)
+            # MySQL's bulk INSERT returns no ids, so read the new rows back:
+            # those of this invoice above the highest id before the insert.
+            returns_ids = connection.features.can_return_rows_from_bulk_insert
+            if not returns_ids:
+                before = self.items.aggregate(last=Max('id'))['last'] or 0
+            InvoiceItem.objects.bulk_create(items, batch_size=batch_size)
+            if not returns_ids:
+                items = list(self.items.filter(id__gt=before).order_by('id'))
+            Invoice.apply_totals_delta(
+                self.pk,
+                sum((item.total for item in items), Decimal('0')),
+                sum((item.total_gst for item in items), Decimal('0')),
+            )
+        self.refresh_from_db(fields=self.TOTAL_FIELDS)
+        # bulk_create sends no post_save, so retire cached stats here
+        from .stats import invalidate_invoice_stats
+        invalidate_invoice_stats()
+        return items
+
+    def clear_items(self):
+        with transaction.atomic():
+            self.items.all().delete()
+            Invoice.objects.filter(pk=self.pk).update(
+                subtotal=0, gst=0, total_due=-F('discount') - F('amount_paid'),
+                total_due_inr=(-F('discount') - F('amount_paid')) * F('exchange_rate'),
+            )
+        self.refresh_from_db(fields=self.TOTAL_FIELDS)
 
     def generate_final_invoice_number(self):
         if not self.final_invoice_number and self.is_final:
             self.final_invoice_number = self.branch_address.get_next_invoice_number()
-            self.save()
+            self.save(update_fields=['final_invoice_number'])
 
     def __str__(self):
         return f"Invoice #{self.final_invoice_number or self.invoice_number} for {self.client}"
@@ -87,14 +226,45 @@ class InvoiceItem(models.Model):
     total_gst = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     description = models.JSONField(default=list, blank=True)
 
-    def save(self, *args, **kwargs):
+    def calculate_total(self):
         if self.item_type == "product" and self.product:
             self.name = self.product.name
             self.unit_cost = self.product.unit_cost
-        self.total = self.quantity * self.unit_cost
-        self.total_gst = self.total * (self.invoice.tax_rate / 100) if self.invoice.tax_option == "yes" and self.invoice.tax_rate else 0
-        super().save(*args, **kwargs)
-        self.invoice.save()  
+        self.total = Decimal(self.quantity * self.unit_cost).quantize(CENT, ROUND_HALF_UP)
+        if self.invoice.tax_option == "yes" and self.invoice.tax_rate:
+            self.total_gst = (self.total * self.invoice.tax_rate / 100).quantize(CENT, ROUND_HALF_UP)
+        else:
+            self.total_gst = Decimal('0')
+
+    def stored_totals(self):
+        """Lock the stored row and return its (invoice_id, total, total_gst)."""
+        return (
+            InvoiceItem.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list('invoice_id', 'total', 'total_gst')
+            .first()
+        )
+
+    def save(self, *args, **kwargs):
+        self.calculate_total()
+        with transaction.atomic():
+            previous = None if self._state.adding else self.stored_totals()
+            super().save(*args, **kwargs)
+            if previous and previous[0] != self.invoice_id:
+                Invoice.apply_totals_delta(previous[0], -previous[1], -previous[2])
+                previous = None
+            if previous:
+                Invoice.apply_totals_delta(self.invoice_id, self.total - previous[1], self.total_gst - previous[2])
+            else:
+                Invoice.apply_totals_delta(self.invoice_id, self.total, self.total_gst)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = self.stored_totals()
+            result = super().delete(*args, **kwargs)
+            if stored:
+                Invoice.apply_totals_delta(stored[0], -stored[1], -stored[2])
+        return result
 
     def __str__(self):
         return f"{self.name} ({self.quantity})"
@@ -124,6 +294,14 @@ class Logo(models.Model):
     company_name = models.CharField(max_length=255, null=True, blank=True)
     logo_image = models.ImageField(upload_to='logos/', null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    variants = models.JSONField(default=dict, blank=True)  # see invoice.images
 
     def __str__(self):
-        return f"Logo uploaded at {self.uploaded_at}"
\ No newline at end of file
+        return f"Logo uploaded at {self.uploaded_at}"
+
+    def save(self, *args, **kwargs):
+        from .images import LOGO_VARIANTS, refresh_variants
+        from .logo import invalidate_logo
+        super().save(*args, **kwargs)
+        refresh_variants(self, 'logo_image', 'variants', LOGO_VARIANTS)
+        invalidate_logo()
@@ -0,0 +1,561 @@
+"""
+Server-side invoice PDFs.
+
+`invoice_print_data` flattens an invoice into the same fields the browser
+print view (FinalInvoiceView.jsx) shows, `render_invoice_pdf` lays that out
+on A4 pages, and finalised invoices are cached on disk under the SHA-256 of
+their print data so repeat downloads never re-render.
+
+The renderer only needs the standard library and Pillow (for the logo) so
+bulk rendering can fan out to worker processes without touching Django.
+It draws with the PDF core fonts, which only cover Windows-1252; text
+outside that (Devanagari, the rupee sign, ...) raises UnsupportedTextError
+rather than printing as question marks.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from .formatting import amount_in_words, format_amount, format_date, format_invoice_number
+
+# Bump whenever the layout changes so cached PDFs are re-rendered.
+PDF_RENDERER_VERSION = 3
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 36
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+BLACK = (0, 0, 0)
+WHITE = (1, 1, 1)
+GREY = (0.4, 0.4, 0.4)
+LIGHT_GREY = (0.95, 0.95, 0.95)
+
+NOTE_TEMPLATE = (
+    "Please make the payment of {amount} {currency} to the bank account details provided above. "
+    "Upon receiving the payment, we will proceed with the services/products as agreed and provide "
+    "a receipt for the payment recieved."
+)
+THANKS = (
+    "Thank you for choosing MarketBytes WebWorks Pvt. Ltd. If you have any questions or require further "
+    "assistance, please don't hesitate to contact us at +91 97781 27272 or accounts@marketbytes.in."
+)
+
+# Glyph widths (1/1000 em) of printable ASCII, from the Adobe core font metrics.
+_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+
+class UnsupportedTextError(ValueError):
+    """Text the core fonts (Windows-1252) cannot draw."""
+
+
+def text_width(text, size, bold=False):
+    widths = _HELVETICA_BOLD if bold else _HELVETICA
+    return sum(widths[ord(ch) - 32] if 32 <= ord(ch) < 127 else 556 for ch in text) * size / 1000
+
+
+def wrap_text(text, width, size, bold=False):
+    """Greedy word wrap; words longer than a line are broken mid-word."""
+    lines = []
+    for paragraph in str(text).splitlines() or ['']:
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, size, bold) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            while text_width(word, size, bold) > width:
+                cut = len(word)
+                while cut > 1 and text_width(word[:cut], size, bold) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+class PdfCanvas:
+    """
+    Minimal PDF 1.4 writer: Helvetica/Helvetica-Bold text, filled rectangles
+    and JPEG images. Coordinates are in points from the top-left corner.
+    """
+
+    def __init__(self, width=PAGE_WIDTH, height=PAGE_HEIGHT):
+        self.width = width
+        self.height = height
+        self.pages = []
+        self.images = []
+        self.add_page()
+
+    def add_page(self):
+        self.pages.append([])
+
+    @property
+    def ops(self):
+        return self.pages[-1]
+
+    @staticmethod
+    def _escape(text):
+        try:
+            raw = str(text).encode('cp1252')
+        except UnicodeEncodeError as exc:
+            unsupported = ''.join(sorted(set(exc.object[exc.start:exc.end])))
+            raise UnsupportedTextError(
+                f"{text!r} has characters the PDF fonts cannot draw ({unsupported}); use the print view instead."
+            ) from exc
+        return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+    def rect(self, x, y, w, h, color):
+        self.ops.append(b'%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f' % (*color, x, self.height - y - h, w, h))
+
+    def text(self, x, y, text, size=9, bold=False, color=BLACK, align='left'):
+        """Draw one line with its baseline at `y`; `x` is the left, centre or right edge per `align`."""
+        if align != 'left':
+            width = text_width(text, size, bold)
+            x -= width / 2 if align == 'center' else width
+        font = b'F2' if bold else b'F1'
+        self.ops.append(
+            b'BT %.3f %.3f %.3f rg /%s %.1f Tf %.2f %.2f Td (%s) Tj ET'
+            % (*color, font, size, x, self.height - y, self._escape(text))
+        )
+
+    def image(self, jpeg, pixel_size, x, y, w, h):
+        self.images.append((jpeg, pixel_size))
+        name = b'Im%d' % len(self.images)
+        self.ops.append(b'q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q' % (w, h, x, self.height - y - h, name))
+
+    def output(self):
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # page tree, filled in once page ids are known
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        ]
+        xobjects = []
+        for index, (jpeg, (px_w, px_h)) in enumerate(self.images, start=1):
+            objects.append(
+                b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB '
+                b'/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n%s\nendstream'
+                % (px_w, px_h, len(jpeg), jpeg)
+            )
+            xobjects.append(b'/Im%d %d 0 R' % (index, len(objects)))
+        resources = b'<< /Font << /F1 3 0 R /F2 4 0 R >> /XObject << %s >> >>' % b' '.join(xobjects)
+
+        page_ids = []
+        for ops in self.pages:
+            stream = zlib.compress(b'\n'.join(ops))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+            objects.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>'
+                % (self.width, self.height, resources, len(objects))
+            )
+            page_ids.append(len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % pid for pid in page_ids), len(page_ids)
+        )
+
+        out = io.BytesIO()
+        out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(out.tell())
+            out.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        xref = out.tell()
+        out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b'%010d 00000 n \n' % offset)
+        out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+        return out.getvalue()
+
+
+def _load_logo(path, max_pixels=400):
+    """The logo as (jpeg bytes, (w, h)), flattened onto white; None if it can't be read."""
+    if not path:
+        return None
+    try:
+        with Image.open(path) as img:
+            img.thumbnail((max_pixels, max_pixels))
+            rgba = img.convert('RGBA')
+    except (OSError, ValueError):
+        return None
+    background = Image.new('RGB', rgba.size, 'white')
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    buffer = io.BytesIO()
+    background.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue(), background.size
+
+
+def _party(obj, name, street_field):
+    address = [getattr(obj, street_field), obj.city, obj.state, getattr(obj, 'pincode', None)]
+    return {
+        'name': name,
+        'address': ", ".join(str(part) for part in address if part) or "N/A",
+        'phone': f"{obj.phone_code or ''} {obj.phone or 'N/A'}".strip(),
+        'website': obj.website or "N/A",
+        'gstin': obj.gstin or '',
+    }
+
+
+def invoice_print_data(invoice):
+    """Everything the print view shows, as plain JSON-serialisable values."""
+    from .images import variant_path
+    from .logo import current_logo
+    from .models import Tax
+
+    client, branch, bank = invoice.client, invoice.branch_address, invoice.bank_account
+    logo = current_logo()
+    logo_path = None
+    if logo and logo.logo_image:
+        # The print-size variant decodes much faster than a multi-megabyte upload
+        logo_path = variant_path(logo.logo_image, logo.variants, 'print')
+        if logo_path is None:
+            try:
+                logo_path = logo.logo_image.path
+            except NotImplementedError:
+                logo_path = None
+
+    tax_name = invoice.tax_name or (
+        invoice.tax_rate is not None
+        and Tax.objects.filter(percentage=invoice.tax_rate).values_list('name', flat=True).first()
+    ) or "Tax"
+    currency = invoice.currency_type or "N/A"
+
+    company_name = (logo.company_name if logo else None) or branch.branch_name or "Unknown Company"
+    totals = [("Subtotal", format_amount(invoice.subtotal))]
+    if invoice.tax_option == "yes":
+        totals.append((tax_name, format_amount(invoice.gst)))
+    if invoice.discount and invoice.discount > 0:
+        totals.append(("Discount", f"-{format_amount(invoice.discount)}"))
+    if invoice.amount_paid and invoice.amount_paid > 0:
+        totals.append(("Amount Paid", f"-{format_amount(invoice.amount_paid)}"))
+
+    return {
+        'version': PDF_RENDERER_VERSION,
+        'number': format_invoice_number(invoice.final_invoice_number or invoice.invoice_number, branch.proforma_prefix),
+        'invoice_date': format_date(invoice.invoice_date),
+        'due_date': format_date(invoice.due_date),
+        'currency': currency,
+        'payment_terms': invoice.payment_terms or "N/A",
+        'client': _party(client, client.client_name or "Unknown Client", 'address'),
+        'branch': _party(branch, company_name, 'branch_address'),
+        'bank': [
+            ("Account Name", bank.account_holder_name or "N/A"),
+            ("Bank Name", bank.bank_name or "N/A"),
+            ("Account Number", bank.account_number or "N/A"),
+            ("IFSC Code", bank.ifsc_code or "N/A"),
+            ("SWIFT Code", bank.swift_code or "N/A"),
+            ("MICR Code", bank.micr_code or "N/A"),
+        ],
+        'items': [
+            {
+                'name': item.name or "N/A",
+                'description': [str(line) for line in item.description] if isinstance(item.description, list) else [],
+                'quantity': format_amount(item.quantity, 0),
+                'tax': format_amount(item.total_gst),
+                'price': format_amount(item.unit_cost),
+                'amount': format_amount(item.total),
+            }
+            for item in invoice.items.all()
+        ],
+        'totals': totals,
+        'total_due': format_amount(invoice.total_due),
+        'total_in_words': amount_in_words(invoice.total_due, invoice.currency_type),
+        'logo_path': logo_path,
+    }
+
+
+def pdf_cache_key(data):
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def pdf_filename(data):
+    return "".join("-" if ch in '/\\?%*:|"<>_' else ch for ch in data['number']) + ".pdf"
+
+
+class _InvoiceLayout:
+    # (title, width, alignment) of the item table columns; widths add up to CONTENT_WIDTH.
+    COLUMNS = (
+        ("NO.", 32, 'center'),
+        ("ITEM DESCRIPTION", 211, 'left'),
+        ("QUANTITY", 60, 'right'),
+        ("TAX", 70, 'right'),
+        ("PRICE", 70, 'right'),
+        ("AMOUNT", 80, 'right'),
+    )
+
+    def __init__(self, data):
+        self.data = data
+        self.canvas = PdfCanvas()
+        self.y = MARGIN
+
+    def ensure(self, height, table_header=False):
+        if self.y + height <= PAGE_HEIGHT - MARGIN:
+            return
+        self.canvas.add_page()
+        self.y = MARGIN
+        if table_header:
+            self.table_header()
+
+    def paragraph(self, x, text, width, size=9, bold=False, color=BLACK, leading=None):
+        leading = leading or size + 3
+        for line in wrap_text(text, width, size, bold):
+            self.canvas.text(x, self.y + size, line, size=size, bold=bold, color=color)
+            self.y += leading
+
+    def header(self):
+        c, data = self.canvas, self.data
+        logo = _load_logo(data['logo_path'])
+        if logo:
+            jpeg, (px_w, px_h) = logo
+            scale = 90 / max(px_w, px_h)
+            c.image(jpeg, (px_w, px_h), MARGIN, MARGIN, px_w * scale, px_h * scale)
+        else:
+            c.rect(MARGIN, MARGIN, 90, 90, (0.9, 0.9, 0.9))
+            c.text(MARGIN + 45, MARGIN + 48, "No Logo", align='center')
+        c.text(PAGE_WIDTH - MARGIN, MARGIN + 26, "INVOICE", size=26, bold=True, align='right')
+
+        bottoms = []
+        for x, label, party in ((150, "Invoice to :", data['client']), (372, "Invoice from :", data['branch'])):
+            self.y = MARGIN + 44
+            c.text(x, self.y, label, size=9)
+            self.y += 6
+            self.paragraph(x, party['name'], 187, size=12, bold=True)
+            self.y += 4
+            c.text(x, self.y + 9, "Address", bold=True)
+            self.y += 12
+            self.paragraph(x, party['address'], 187)
+            self.y += 4
+            self.paragraph(x, f"P : {party['phone']}", 187)
+            self.paragraph(x, f"W : {party['website']}", 187)
+            if party['gstin']:
+                self.paragraph(x, f"GSTIN : {party['gstin']}", 187)
+            bottoms.append(self.y)
+        self.y = max(bottoms + [MARGIN + 90]) + 18
+
+        details = (
+            ("Invoice No :", data['number']),
+            ("Invoice Date :", data['invoice_date']),
+            ("Due Date :", data['due_date']),
+        )
+        x = MARGIN
+        for label, value in details:
+            c.text(x, self.y, label, bold=True)
+            x += text_width(label, 9, bold=True) + 4
+            c.text(x, self.y, value)
+            x += text_width(value, 9) + 24
+        self.y += 14
+
+    def table_header(self):
+        c = self.canvas
+        c.rect(MARGIN, self.y, CONTENT_WIDTH, 22, BLACK)
+        x = MARGIN
+        for title, width, _ in self.COLUMNS:
+            c.text(x + width / 2, self.y + 14.5, title, size=8, bold=True, color=WHITE, align='center')
+            x += width
+        self.y += 22
+
+    def cell(self, x, width, align, text, baseline, **style):
+        anchor = {'left': x + 6, 'center': x + width / 2, 'right': x + width - 6}[align]
+        self.canvas.text(anchor, baseline, text, align=align, **style)
+
+    def items(self):
+        c = self.canvas
+        self.ensure(60)
+        self.table_header()
+        description_width = self.COLUMNS[1][1] - 12
+        for index, item in enumerate(self.data['items'], start=1):
+            name_lines = wrap_text(item['name'], description_width, 9, bold=True)
+            desc_lines = [
+                line
+                for desc in item['description']
+                for line in wrap_text(f"- {desc}", description_width, 8)
+            ]
+            height = max(28, 12 + 12 * len(name_lines) + 10 * len(desc_lines))
+            self.ensure(height, table_header=True)
+            if index % 2 == 0:
+                c.rect(MARGIN, self.y, CONTENT_WIDTH, height, LIGHT_GREY)
+            baseline = self.y + 17
+            values = (str(index), None, item['quantity'], item['tax'], item['price'], item['amount'])
+            x = MARGIN
+            for (_, width, align), value in zip(self.COLUMNS, values):
+                if value is not None:
+                    self.cell(x, width, align, value, baseline)
+                x += width
+            line_y = baseline
+            for line in name_lines:
+                self.cell(MARGIN + self.COLUMNS[0][1], 0, 'left', line, line_y, bold=True)
+                line_y += 12
+            for line in desc_lines:
+                self.cell(MARGIN + self.COLUMNS[0][1], 0, 'left', line, line_y - 2, size=8, color=GREY)
+                line_y += 10
+            self.y += height
+
+    def totals(self):
+        c, data = self.canvas, self.data
+        value_x = PAGE_WIDTH - MARGIN - 6
+        label_x = value_x - 150
+        for label, value in data['totals']:
+            self.ensure(20)
+            c.rect(MARGIN, self.y, CONTENT_WIDTH, 20, LIGHT_GREY)
+            c.text(label_x, self.y + 13.5, f"{label} :", bold=True, align='right')
+            c.text(value_x, self.y + 13.5, f"{value} {data['currency']}", bold=True, align='right')
+            self.y += 20
+
+        words = wrap_text(data['total_in_words'], CONTENT_WIDTH - 140, 9, bold=True)
+        self.ensure(26 + 14 * len(words) + 12)
+        c.rect(MARGIN, self.y, CONTENT_WIDTH, 26 + 14 * len(words) + 12, BLACK)
+        c.text(MARGIN + 6, self.y + 17, "Grand Total in Figures :", bold=True, color=WHITE)
+        c.text(value_x, self.y + 17, f"{data['total_due']} {data['currency']}", bold=True, color=WHITE, align='right')
+        self.y += 26
+        c.text(MARGIN + 6, self.y + 10, "Total in Words:", bold=True, color=WHITE)
+        for line in words:
+            c.text(value_x, self.y + 10, line, bold=True, color=WHITE, align='right')
+            self.y += 14
+        self.y += 12
+
+    def payment(self):
+        c, data = self.canvas, self.data
+        self.y += 18
+        self.ensure(150)
+        top = self.y
+        c.text(MARGIN, self.y + 12, "Payment Information", size=12, bold=True)
+        self.y += 22
+        for label, value in data['bank']:
+            c.text(MARGIN, self.y + 9, f"{label}:", bold=True)
+            c.text(MARGIN + 90, self.y + 9, value)
+            self.y += 14
+        bottom = self.y
+
+        x = MARGIN + CONTENT_WIDTH / 2 + 20
+        self.y = top
+        for title, value in (("Mode of Payment", data['payment_terms']), ("Currency", data['currency'])):
+            c.text(x, self.y + 12, title, size=12, bold=True)
+            c.text(x, self.y + 28, value)
+            self.y += 40
+        c.text(x, self.y + 16, f"{data['total_due']} {data['currency']}", size=16, bold=True)
+        c.rect(x, self.y + 24, 110, 22, BLACK)
+        c.text(x + 55, self.y + 39, "TOTAL DUE", size=11, bold=True, color=WHITE, align='center')
+        self.y = max(bottom, self.y + 46)
+
+    def notes(self):
+        data = self.data
+        self.y += 20
+        note = NOTE_TEMPLATE.format(amount=data['total_due'], currency=data['currency'])
+        lines = len(wrap_text(note, CONTENT_WIDTH, 9)) + len(wrap_text(THANKS, CONTENT_WIDTH, 9))
+        self.ensure(30 + 12 * lines)
+        self.canvas.text(MARGIN, self.y + 10, "Note:", size=10, bold=True)
+        self.y += 16
+        self.paragraph(MARGIN, note, CONTENT_WIDTH)
+        self.y += 8
+        self.paragraph(MARGIN, THANKS, CONTENT_WIDTH)
+
+    def render(self):
+        self.header()
+        self.items()
+        self.totals()
+        self.payment()
+        self.notes()
+        return self.canvas.output()
+
+
+def render_invoice_pdf(data):
+    """PDF bytes for print data produced by `invoice_print_data`."""
+    return _InvoiceLayout(data).render()
+
+
+def cached_pdf_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f"{key}.pdf")
+
+
+def render_to_cache(data, cache_dir):
+    """
+    Render into the cache unless that content is already there; returns the
+    file path. Writes go through a temp file + rename so concurrent renders
+    of the same invoice never expose a half-written PDF.
+    """
+    path = cached_pdf_path(cache_dir, pdf_cache_key(data))
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content = render_invoice_pdf(data)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def get_cache_dir():
+    from django.conf import settings
+
+    return settings.INVOICE_PDF_CACHE_DIR
+
+
+def render_invoices_to_cache(invoices, workers=None, pool=None, skipped=None):
+    """
+    Render many invoices into the cache using a process pool (`pool`, or
+    one made for this call). Print data is collected here (it needs the
+    database); only the layout work is shipped to the workers. Returns
+    {invoice id: cached path}. Invoices whose text the fonts cannot draw
+    are left out and, with a `skipped` dict, recorded there as
+    {invoice id: reason}; the rest of the batch is still rendered.
+    """
+    cache_dir = get_cache_dir()
+    pending, paths = {}, {}
+    skipped = {} if skipped is None else skipped
+    for invoice in invoices:
+        data = invoice_print_data(invoice)
+        path = cached_pdf_path(cache_dir, pdf_cache_key(data))
+        if os.path.exists(path):
+            paths[invoice.pk] = path
+        else:
+            pending[invoice.pk] = data
+    if not pending:
+        return paths
+    if pool is None and workers == 1:
+        for pk, data in pending.items():
+            try:
+                paths[pk] = render_to_cache(data, cache_dir)
+            except UnsupportedTextError as exc:
+                skipped[pk] = str(exc)
+        return paths
+    own_pool = ProcessPoolExecutor(max_workers=workers) if pool is None else None
+    try:
+        futures = {pk: (pool or own_pool).submit(render_to_cache, data, cache_dir) for pk, data in pending.items()}
+        for pk, future in futures.items():
+            try:
+                paths[pk] = future.result()
+            except UnsupportedTextError as exc:
+                skipped[pk] = str(exc)
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
+    return paths
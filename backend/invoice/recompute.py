@@ -0,0 +1,148 @@
+"""
+Bring open (non-final) invoices in line with an edited Tax rate or
+Product price.
+
+Line items snapshot the product price and the invoice's tax rate when they
+are saved, so editing either leaves the proformas that use it with stale
+numbers. Re-saving every item would cascade one totals UPDATE per item;
+instead each chunk of invoices is fixed with a handful of set-based
+UPDATEs: the new rate or price, the item totals, then the invoice totals
+from the item sums. Finalised invoices are never touched, including ones
+finalised while the job runs: every chunk re-checks and locks its rows.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from .models import CENT, Invoice, InvoiceItem
+from .stats import invalidate_invoice_stats
+
+DEFAULT_CHUNK_SIZE = 500
+
+OPEN = Q(is_final=False, is_saved_final=False)
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def invoices_for_tax(tax, previous_rate=None):
+    """
+    Open invoices charging `tax` at a rate other than its current one. They
+    are matched on the tax name they recorded; with `previous_rate`, those
+    that recorded no name but charge that rate are included too.
+    """
+    match = Q(tax_name=tax.name)
+    if previous_rate is not None:
+        match |= Q(tax_name='', tax_rate=previous_rate)
+    return Invoice.objects.filter(OPEN, match, tax_option='yes').exclude(tax_rate=tax.percentage)
+
+
+def invoices_for_product(product):
+    """Open invoices with a line for `product` at an old price or name."""
+    stale = (
+        InvoiceItem.objects.filter(product=product, item_type='product')
+        .exclude(unit_cost=product.unit_cost, name=product.name)
+        .values('invoice_id')
+    )
+    return Invoice.objects.filter(OPEN, pk__in=stale)
+
+
+def _round(amount):
+    return Decimal(amount).quantize(CENT, ROUND_HALF_UP)
+
+
+def _preview(invoices, tax, product):
+    """What recompute() would change, worked out in Python like InvoiceItem.calculate_total()."""
+    items = {}
+    for item in InvoiceItem.objects.filter(invoice__in=invoices).values(
+        'invoice_id', 'product_id', 'item_type', 'quantity', 'unit_cost', 'total', 'total_gst',
+    ):
+        items.setdefault(item['invoice_id'], []).append(item)
+
+    changes = []
+    for invoice in invoices:
+        rate = tax.percentage if tax is not None else invoice.tax_rate
+        charges_tax = invoice.tax_option == 'yes' and rate
+        subtotal = gst = Decimal('0')
+        changed_items = 0
+        for item in items.get(invoice.pk, []):
+            unit_cost, total, total_gst = item['unit_cost'], item['total'], item['total_gst']
+            rewritten = tax is not None
+            if product is not None and item['product_id'] == product.pk and item['item_type'] == 'product':
+                unit_cost = product.unit_cost
+                total = _round(item['quantity'] * unit_cost)
+                rewritten = True
+            if rewritten:
+                total_gst = _round(total * rate / 100) if charges_tax else Decimal('0')
+            changed_items += (total, total_gst, unit_cost) != (item['total'], item['total_gst'], item['unit_cost'])
+            subtotal += total
+            gst += total_gst
+        total_due = subtotal + gst - invoice.discount - invoice.amount_paid
+        before = {'tax_rate': invoice.tax_rate, 'subtotal': invoice.subtotal, 'gst': invoice.gst, 'total_due': invoice.total_due}
+        after = {'tax_rate': rate, 'subtotal': subtotal, 'gst': gst, 'total_due': total_due}
+        changes.append({
+            'id': invoice.pk,
+            'invoice_number': invoice.invoice_number,
+            'items': changed_items,
+            'changes': {name: [str(before[name]), str(after[name])] for name in before if before[name] != after[name]},
+        })
+    return changes
+
+
+def _apply(invoice_ids, tax, product):
+    """The set-based UPDATEs for one chunk; returns the number of items rewritten."""
+    invoices = Invoice.objects.filter(pk__in=invoice_ids)
+    items = InvoiceItem.objects.filter(invoice_id__in=invoice_ids)
+    if tax is not None:
+        invoices.update(tax_rate=tax.percentage, tax_name=tax.name)
+    else:
+        items = items.filter(product=product, item_type='product')
+        items.update(
+            unit_cost=product.unit_cost, name=product.name,
+            total=Round(F('quantity') * Value(product.unit_cost, output_field=DecimalField()), 2),
+        )
+    rate = Invoice.objects.filter(pk=OuterRef('invoice_id'), tax_option='yes').values('tax_rate')[:1]
+    changed = items.update(total_gst=Round(F('total') * Coalesce(Subquery(rate), ZERO) / 100, 2))
+
+    def item_sum(field):
+        sums = InvoiceItem.objects.filter(invoice_id=OuterRef('pk')).values('invoice_id').annotate(sum=Sum(field))
+        return Coalesce(Subquery(sums.values('sum')), ZERO)
+
+    invoices.update(subtotal=item_sum('total'), gst=item_sum('total_gst'))
+    # A second statement, so it sees the new subtotal and gst on every backend.
+    total_due = F('subtotal') + F('gst') - F('discount') - F('amount_paid')
+    invoices.update(total_due=total_due, total_due_inr=total_due * F('exchange_rate'))
+    return changed
+
+
+def recompute(invoices, tax=None, product=None, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply `tax`'s current rate or `product`'s current price to `invoices`
+    (from invoices_for_tax() / invoices_for_product()) in chunks of
+    `chunk_size`, one transaction each. Returns {'invoices', 'items'}
+    counts, plus 'changes' (per-invoice before/after) for a dry run.
+    """
+    if (tax is None) == (product is None):
+        raise ValueError("Pass exactly one of tax or product")
+    ids = list(invoices.filter(OPEN).order_by('pk').values_list('pk', flat=True))
+    result = {'invoices': 0, 'items': 0}
+    if dry_run:
+        result['changes'] = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        if dry_run:
+            changes = _preview(list(Invoice.objects.filter(OPEN, pk__in=chunk).order_by('pk')), tax, product)
+            result['changes'].extend(changes)
+            result['invoices'] += len(changes)
+            result['items'] += sum(change['items'] for change in changes)
+            continue
+        with transaction.atomic():
+            # Locked and re-checked, so an invoice finalised since the ids were read is left alone.
+            locked = list(Invoice.objects.select_for_update().filter(OPEN, pk__in=chunk).values_list('pk', flat=True))
+            if locked:
+                result['items'] += _apply(locked, tax, product)
+                result['invoices'] += len(locked)
+    if result['invoices'] and not dry_run:
+        # update() sends no post_save, so retire cached stats here
+        invalidate_invoice_stats()
+    return result
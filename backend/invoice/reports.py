@@ -0,0 +1,113 @@
+"""
+GST summaries for a financial year, aggregated in the database.
+
+Invoices are picked out with the (financial_year, invoice_date) and
+(branch_address, financial_year) indexes and grouped with one GROUP BY, so
+the cost follows the number of groups rather than the number of invoices.
+Amounts are reported in INR at each invoice's exchange rate; invoices in a
+currency with no known rate add to the counts but not to the amounts.
+"""
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import CENT, Invoice
+from .stats import GENERATION_KEY
+
+FINANCIAL_YEAR_PATTERN = re.compile(r'(\d{4})-(\d{4})')
+
+# dimension -> queryset expression it groups on
+DIMENSIONS = {
+    'branch_gstin': F('branch_address__gstin'),
+    'branch_state': F('branch_address__state'),
+    'client_state': F('client__state'),
+    'tax_rate': Coalesce(F('tax_rate'), 0, output_field=DecimalField(max_digits=5, decimal_places=2)),
+    'month': TruncMonth('invoice_date'),
+}
+DEFAULT_GROUP_BY = ('branch_gstin', 'client_state', 'tax_rate', 'month')
+
+STATUS_FILTERS = {
+    'final': {'is_saved_final': True},
+    'proforma': {'is_final': False},
+    'all': {},
+}
+
+
+def _inr(field):
+    return ExpressionWrapper(F(field) * F('exchange_rate'), output_field=DecimalField(max_digits=20, decimal_places=8))
+
+
+def _round(value):
+    return value.quantize(CENT) if value is not None else Decimal('0.00')
+
+
+def _split_tax(row, branch_state):
+    """Intra-state supplies split the tax into CGST+SGST, inter-state ones are IGST."""
+    branch_state = (branch_state or '').strip().lower()
+    client_state = (row.get('client_state') or '').strip().lower()
+    intra = bool(branch_state) and branch_state == client_state
+    tax = row['tax_amount']
+    half = (tax / 2).quantize(CENT)
+    row['supply_type'] = 'intra_state' if intra else 'inter_state'
+    row['cgst'] = half if intra else Decimal('0.00')
+    row['sgst'] = tax - half if intra else Decimal('0.00')
+    row['igst'] = Decimal('0.00') if intra else tax
+
+
+def compute_gst_summary(financial_year, branch=None, status='final', group_by=DEFAULT_GROUP_BY):
+    invoices = Invoice.objects.filter(financial_year=financial_year, **STATUS_FILTERS[status])
+    if branch:
+        invoices = invoices.filter(branch_address_id=branch)
+
+    # The tax split needs both states, so branch_state rides along with client_state.
+    fields = list(group_by)
+    if 'client_state' in fields and 'branch_state' not in fields:
+        fields.append('branch_state')
+    rows = list(
+        invoices.annotate(**{f'_{name}': DIMENSIONS[name] for name in fields})
+        .values(*(f'_{name}' for name in fields))
+        .annotate(
+            invoices=Count('id'),
+            taxable_value=Sum(_inr('subtotal')),
+            tax_amount=Sum(_inr('gst')),
+        )
+        .order_by(*(f'_{name}' for name in fields))
+    )
+
+    summary = []
+    totals = {'invoices': 0, 'taxable_value': Decimal('0.00'), 'tax_amount': Decimal('0.00')}
+    for row in rows:
+        entry = {name: row[f'_{name}'] for name in group_by}
+        if 'month' in entry and entry['month'] is not None:
+            entry['month'] = entry['month'].strftime('%Y-%m')
+        entry['invoices'] = row['invoices']
+        entry['taxable_value'] = _round(row['taxable_value'])
+        entry['tax_amount'] = _round(row['tax_amount'])
+        if 'client_state' in entry:
+            _split_tax(entry, row['_branch_state'])
+        for key in totals:
+            totals[key] += entry[key]
+        summary.append(entry)
+
+    return {
+        'financial_year': financial_year,
+        'status': status,
+        'group_by': list(group_by),
+        'rows': summary,
+        'totals': totals,
+    }
+
+
+def get_gst_summary(financial_year, branch=None, status='final', group_by=DEFAULT_GROUP_BY):
+    """Cached like the dashboard stats: any invoice write moves to a new generation."""
+    generation = cache.get(GENERATION_KEY, 0)
+    key = f"gst_summary:{generation}:{financial_year}:{branch or 'all'}:{status}:{','.join(group_by)}"
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_gst_summary(financial_year, branch, status, group_by)
+        cache.set(key, summary, timeout=settings.INVOICE_STATS_CACHE_TIMEOUT)
+    return summary
@@ -0,0 +1,158 @@
+"""
+Synthetic data for benchmarks and local load testing.
+
+Everything is written with bulk_create, so seeding 100k invoices takes
+seconds. bulk_create skips save() and the post_save signals, so this
+module does their work itself: invoice numbers come from the same
+sequence counters, totals and the financial year are computed here,
+reference-data versions are recorded, and the search index is rebuilt
+and cached stats retired at the end.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from bank.models import BankAccount
+from branch.models import Branch, get_financial_year
+from clients.models import Client
+from product.models import Product
+from reference.models import ReferenceChange
+from search.index import rebuild_index
+from services.models import Service
+from .models import CENT, Invoice, InvoiceItem, ProformaSequence, Tax
+from .stats import invalidate_invoice_stats
+
+DEFAULT_BATCH_SIZE = 1000
+TAX_RATES = (Decimal('5.00'), Decimal('12.00'), Decimal('18.00'))
+
+
+def _bulk(model, objects, batch_size):
+    """bulk_create, returning the rows with their ids even where the backend does not report them."""
+    if not objects:
+        return []
+    before = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    return list(model.objects.filter(pk__gt=before).order_by('pk'))
+
+
+def _record_changes(kind, objects):
+    ReferenceChange.record_new(kind, [obj.pk for obj in objects], batch_size=DEFAULT_BATCH_SIZE)
+
+
+def seed_reference_data(clients=50, branches=3, bank_accounts=3, products=100, services=20, rng=None,
+                        batch_size=DEFAULT_BATCH_SIZE):
+    rng = rng or random.Random(0)
+    tag = rng.randrange(16 ** 4)
+    created = {
+        'clients': _bulk(Client, [
+            Client(client_name=f"Seed Client {tag:04x}-{n}", country="India", state="Kerala", city="Kochi",
+                   tax_type=rng.choice(["gst", "gst", "vat", "nil"]), invoice_series="domestic")
+            for n in range(clients)
+        ], batch_size),
+        'branches': _bulk(Branch, [
+            Branch(branch_name=f"Seed Branch {tag:04x}-{n}", city="Kochi", state="Kerala",
+                   series_prefix=f"S{tag:04x}{n}"[:10], proforma_prefix=f"P{tag:04x}{n}"[:10])
+            for n in range(branches)
+        ], batch_size),
+        'bank_accounts': _bulk(BankAccount, [
+            BankAccount(bank_name=f"Seed Bank {n}", account_holder_name="Seed", account_number=f"{tag:04x}{n:08d}")
+            for n in range(bank_accounts)
+        ], batch_size),
+        'products': _bulk(Product, [
+            Product(name=f"Seed Product {tag:04x}-{n}", unit_cost=Decimal(rng.randrange(100, 100000)) / 100)
+            for n in range(products)
+        ], batch_size),
+        'services': _bulk(Service, [Service(name=f"Seed Service {tag:04x}-{n}") for n in range(services)], batch_size),
+    }
+    if not Tax.objects.exists():
+        created['taxes'] = _bulk(Tax, [Tax(name=f"GST {rate}%", percentage=rate) for rate in TAX_RATES], batch_size)
+    for kind, objects in created.items():
+        _record_changes(kind, objects)
+    return created
+
+
+def seed_invoices(count, items_per_invoice, clients, branches, bank_accounts, products, final_ratio=0.5,
+                  days=365, rng=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Create `count` invoices with `items_per_invoice` product lines each; returns the number of items."""
+    rng = rng or random.Random(0)
+    today = date.today()
+    plans = [
+        {
+            'branch': rng.choice(branches),
+            'invoice_date': today - timedelta(days=rng.randrange(days)),
+            'final': rng.random() < final_ratio,
+        }
+        for _ in range(count)
+    ]
+    # Numbers come from the real counters, so seeded and real invoices never collide.
+    proforma_numbers, final_numbers = {}, {}
+    for branch in branches:
+        planned = [plan for plan in plans if plan['branch'] is branch]
+        if planned:
+            prefix = branch.proforma_prefix or "MB"
+            proforma_numbers[branch.pk] = iter([
+                f"{prefix}-{str(number).zfill(2)}" for number in ProformaSequence.reserve(prefix, len(planned))
+            ])
+        finals = sum(plan['final'] for plan in planned)
+        if finals:
+            final_numbers[branch.pk] = iter(branch.get_next_invoice_numbers(finals))
+
+    item_total = 0
+    for start in range(0, count, batch_size):
+        with transaction.atomic():
+            invoices, lines = [], []
+            for plan in plans[start:start + batch_size]:
+                invoice_date = plan['invoice_date']
+                invoice = Invoice(
+                    invoice_number=next(proforma_numbers[plan['branch'].pk]),
+                    final_invoice_number=next(final_numbers[plan['branch'].pk]) if plan['final'] else None,
+                    invoice_type="product", client=rng.choice(clients), branch_address=plan['branch'],
+                    bank_account=rng.choice(bank_accounts), invoice_date=invoice_date,
+                    due_date=invoice_date + timedelta(days=30), currency_type="INR", payment_terms="Net 30",
+                    financial_year="%d-%d" % get_financial_year(invoice_date), tax_option="yes",
+                    tax_rate=rng.choice(TAX_RATES), exchange_rate=Decimal('1'),
+                    is_final=plan['final'], is_saved_final=plan['final'],
+                )
+                items = []
+                for _ in range(items_per_invoice):
+                    item = InvoiceItem(invoice=invoice, item_type="product", product=rng.choice(products),
+                                       quantity=rng.randrange(1, 20), unit_cost=Decimal('0'))
+                    item.calculate_total()
+                    items.append(item)
+                invoice.subtotal = sum((item.total for item in items), Decimal('0'))
+                invoice.gst = sum((item.total_gst for item in items), Decimal('0'))
+                invoice.total_due = invoice.subtotal + invoice.gst
+                invoice.total_due_inr = invoice.total_due.quantize(CENT)
+                invoices.append(invoice)
+                lines.append(items)
+
+            saved = _bulk(Invoice, invoices, batch_size)
+            ids = {invoice.invoice_number: invoice.pk for invoice in saved}
+            batch_items = []
+            for invoice, items in zip(invoices, lines):
+                invoice.pk = ids[invoice.invoice_number]
+                for item in items:
+                    item.invoice = invoice
+                batch_items.extend(items)
+            InvoiceItem.objects.bulk_create(batch_items, batch_size=batch_size)
+            item_total += len(batch_items)
+    return item_total
+
+
+def seed_data(clients=50, branches=3, bank_accounts=3, products=100, services=20, invoices=1000,
+              items_per_invoice=5, final_ratio=0.5, seed=0, batch_size=DEFAULT_BATCH_SIZE, reindex=True):
+    """Seed reference data and invoices; returns {name: rows created}."""
+    rng = random.Random(seed)
+    reference = seed_reference_data(clients, branches, bank_accounts, products, services, rng, batch_size)
+    items = seed_invoices(
+        invoices, items_per_invoice, reference['clients'], reference['branches'], reference['bank_accounts'],
+        reference['products'], final_ratio, rng=rng, batch_size=batch_size,
+    )
+    if reindex:
+        rebuild_index()
+    invalidate_invoice_stats()
+    counts = {kind: len(objects) for kind, objects in reference.items()}
+    counts.update(invoices=invoices, items=items)
+    return counts
@@ -1,4 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
+from bank.serializers import BankAccountSerializer
+from branch.serializers import BranchSerializer
+from clients.serializers import ClientSerializer
+from product.models import Product
+from .formatting import amount_in_words, format_invoice_number
+from .images import variant_urls
 from .models import Tax, Invoice, InvoiceItem, Logo
 
 class TaxSerializer(serializers.ModelSerializer):
@@ -6,9 +13,61 @@ class TaxSerializer(serializers.ModelSerializer):
         model = Tax
         fields = ['id', 'name', 'percentage']
 
+def preload(context, model, ids):
+    """Add the rows of `model` with these ids to `context['preloaded']`, in one in_bulk() query."""
+    preloaded = context.setdefault('preloaded', {}).setdefault(model, {})
+    wanted = set()
+    for pk in ids:
+        try:
+            wanted.add(int(pk))
+        except (TypeError, ValueError):
+            continue  # left for the field to reject
+    missing = wanted - preloaded.keys()
+    if missing:
+        preloaded.update(model.objects.in_bulk(missing))
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves ids from `context['preloaded'][model]` (an in_bulk() dict, see
+    preload()) and only queries for ids that are not there, so validating
+    many items or imported rows doesn't cost a lookup per foreign key.
+    """
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.get_queryset().model)
+        if preloaded:
+            try:
+                return preloaded[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+class InvoiceItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            rows = [row for row in data if isinstance(row, dict)]
+            preload(self.context, Invoice, [row.get('invoice') for row in rows])
+            preload(self.context, Product, [row.get('product') for row in rows])
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        # Group the rows per invoice so each invoice gets one bulk insert and
+        # a single totals recompute.
+        grouped = {}
+        for item_data in validated_data:
+            invoice = item_data.pop('invoice')
+            grouped.setdefault(invoice.pk, (invoice, []))[1].append(item_data)
+        items = []
+        with transaction.atomic():
+            for invoice, items_data in grouped.values():
+                items.extend(invoice.add_items(items_data))
+        return items
+
 class InvoiceItemSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
     class Meta:
         model = InvoiceItem
+        list_serializer_class = InvoiceItemListSerializer
         fields = ['id', 'invoice', 'item_type', 'product', 'name', 'quantity', 'unit_cost', 'total', 'total_gst', 'description']
         extra_kwargs = {
             'name': {'required': False, 'allow_null': True},
@@ -23,8 +82,14 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"product": "This field may not be null for product items."})
         return data
 
+class NestedInvoiceItemSerializer(InvoiceItemSerializer):
+    """Items sent inside an invoice payload; their invoice is the parent."""
+    class Meta(InvoiceItemSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+        read_only_fields = ['invoice']
+
 class InvoiceSerializer(serializers.ModelSerializer):
-    items = InvoiceItemSerializer(many=True, required=False)
+    items = NestedInvoiceItemSerializer(many=True, required=False)
     tax_name = serializers.CharField(read_only=True)
     client_name = serializers.CharField(source='client.client_name', read_only=True)
 
@@ -33,32 +98,111 @@ class InvoiceSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'invoice_number', 'final_invoice_number', 'financial_year', 'invoice_type', 'client', 'client_name', 'branch_address', 'bank_account',
             'invoice_date', 'due_date', 'currency_type', 'payment_terms', 'tax_option', 'tax_rate','tax_name',
-            'subtotal', 'gst', 'discount', 'amount_paid', 'total_due', 'items', 'is_final', 'is_saved_final'
+            'subtotal', 'gst', 'discount', 'amount_paid', 'total_due', 'exchange_rate', 'total_due_inr',
+            'items', 'is_final', 'is_saved_final'
         ]
-        read_only_fields = ['invoice_number', 'final_invoice_number', 'subtotal', 'gst', 'total_due']
+        read_only_fields = ['invoice_number', 'final_invoice_number', 'financial_year', 'subtotal', 'gst', 'total_due', 'exchange_rate', 'total_due_inr']
+
+    def to_internal_value(self, data):
+        # One query for every item's product instead of one per item
+        items = data.get('items') if hasattr(data, 'get') else None
+        if isinstance(items, list):
+            preload(self.context, Product, [item.get('product') for item in items if isinstance(item, dict)])
+        return super().to_internal_value(data)
 
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
-        invoice = Invoice.objects.create(**validated_data)
-        for item_data in items_data:
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
+        with transaction.atomic():
+            invoice = Invoice.objects.create(**validated_data)
+            if items_data:
+                invoice.add_items(items_data)
         return invoice
 
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
-        instance = super().update(instance, validated_data)
-        if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                InvoiceItem.objects.create(invoice=instance, **item_data)
-        instance.calculate_totals()
-        instance.save()
-        if instance.is_final:
-            instance.generate_final_invoice_number()
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            # super().update() saved once, and Invoice.save() numbers a newly final invoice.
+            if items_data is not None:
+                instance.clear_items()
+                instance.add_items(items_data)
         return instance
-    
+
+class InvoiceDocumentSerializer(InvoiceSerializer):
+    """
+    Read-only invoice with everything the print views show embedded: the
+    client, branch and bank records, the tax label, the logo (passed in as
+    `context['logo']`) and the display number and total in words.
+    """
+    client_details = ClientSerializer(source='client', read_only=True)
+    branch_details = BranchSerializer(source='branch_address', read_only=True)
+    bank_details = BankAccountSerializer(source='bank_account', read_only=True)
+    tax_display_name = serializers.SerializerMethodField()
+    display_invoice_number = serializers.SerializerMethodField()
+    total_in_words = serializers.SerializerMethodField()
+    logo = serializers.SerializerMethodField()
+
+    class Meta(InvoiceSerializer.Meta):
+        fields = InvoiceSerializer.Meta.fields + [
+            'client_details', 'branch_details', 'bank_details', 'tax_display_name',
+            'display_invoice_number', 'total_in_words', 'logo',
+        ]
+        read_only_fields = fields
+
+    def get_tax_display_name(self, obj):
+        if obj.tax_name:
+            return obj.tax_name
+        if obj.tax_rate is not None:
+            name = Tax.objects.filter(percentage=obj.tax_rate).values_list('name', flat=True).first()
+            if name:
+                return name
+        return "Tax"
+
+    def get_display_invoice_number(self, obj):
+        return format_invoice_number(obj.final_invoice_number or obj.invoice_number, obj.branch_address.proforma_prefix)
+
+    def get_total_in_words(self, obj):
+        return amount_in_words(obj.total_due, obj.currency_type)
+
+    def get_logo(self, obj):
+        logo = self.context.get('logo')
+        if logo is None:
+            return {'company_name': '', 'logo_image': None}
+        return LogoSerializer(logo, context=self.context).data
+
+class ImportInvoiceSerializer(InvoiceSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
+
+class InvoiceEmailSerializer(serializers.Serializer):
+    """An email with the invoice PDF attached; subject and message default from the invoice number."""
+    to = serializers.ListField(child=serializers.EmailField(), min_length=1, max_length=20)
+    subject = serializers.CharField(max_length=255, required=False)
+    message = serializers.CharField(required=False)
+
+
+class InvoiceRecomputeSerializer(serializers.Serializer):
+    """Which edited Tax or Product to apply to the open invoices, and whether only to preview it."""
+    tax = serializers.PrimaryKeyRelatedField(queryset=Tax.objects.all(), required=False)
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), required=False)
+    previous_rate = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if ('tax' in data) == ('product' in data):
+            raise serializers.ValidationError("Give exactly one of tax or product.")
+        if 'previous_rate' in data and 'tax' not in data:
+            raise serializers.ValidationError({'previous_rate': "Only applies with tax."})
+        return data
+
 
 class LogoSerializer(serializers.ModelSerializer):
+    # Resized copies (print PNG, screen and thumbnail WebP) with content-hashed URLs
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Logo
-        fields = ['id', 'company_name', 'logo_image', 'uploaded_at']
\ No newline at end of file
+        fields = ['id', 'company_name', 'logo_image', 'variants', 'uploaded_at']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.logo_image, obj.variants, self.context.get('request'))
\ No newline at end of file
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+
+from bank.models import BankAccount
+from clients.models import Client
+from product.models import Product
+from services.models import Service
+from .logo import invalidate_logo
+from .models import Invoice, InvoiceItem, Logo
+from .stats import invalidate_invoice_stats
+
+STATS_SENDERS = (Invoice, InvoiceItem, Client, Product, Service, BankAccount)
+
+
+def invalidate_stats_on_change(sender, **kwargs):
+    invalidate_invoice_stats()
+
+
+for sender in STATS_SENDERS:
+    post_save.connect(invalidate_stats_on_change, sender=sender, dispatch_uid=f'invoice_stats_save_{sender.__name__}')
+    post_delete.connect(invalidate_stats_on_change, sender=sender, dispatch_uid=f'invoice_stats_delete_{sender.__name__}')
+
+
+def invalidate_logo_on_delete(sender, **kwargs):
+    # Logo.save() retires the cached logo itself; deletes (admin, queryset) come through here.
+    invalidate_logo()
+
+
+post_delete.connect(invalidate_logo_on_delete, sender=Logo, dispatch_uid='invoice_logo_delete')
@@ -0,0 +1,103 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from bank.models import BankAccount
+from clients.models import Client
+from product.models import Product
+from services.models import Service
+from .models import Invoice
+
+# Outside the 'invoice_stats:' prefix: the pointer is mutable, so it must skip the per-process L1.
+GENERATION_KEY = 'invoice_stats_generation'
+
+
+def _next_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def invalidate_invoice_stats():
+    """
+    Retire every cached stats payload by moving to a new key generation,
+    once the current transaction commits (at once outside one). Bumping
+    before the commit would let a concurrent request cache the old rows
+    under the new generation. Repeated calls in one transaction bump once.
+    """
+    connection = transaction.get_connection()
+    if any(getattr(func, 'stats_pending', False) for _, func, _ in connection.run_on_commit):
+        return
+
+    def retire_stats():
+        retire_stats.stats_pending = False
+        _next_generation()
+
+    retire_stats.stats_pending = True
+    transaction.on_commit(retire_stats)
+
+
+def _grouped(queryset, *fields):
+    rows = (
+        queryset.values(*fields)
+        .annotate(count=Count('id'), total_due=Sum('total_due'), total_due_inr=Sum('total_due_inr'))
+        .order_by(*fields)
+    )
+    return list(rows)
+
+
+def compute_invoice_stats(financial_year=None, branch=None):
+    invoices = Invoice.objects.all()
+    if financial_year:
+        invoices = invoices.filter(financial_year=financial_year)
+    if branch:
+        invoices = invoices.filter(branch_address_id=branch)
+
+    monthly = _grouped(invoices.annotate(month=TruncMonth('invoice_date')), 'month', 'currency_type', 'is_final')
+    for row in monthly:
+        row['month'] = row['month'].strftime('%Y-%m')
+
+    return {
+        'counts': {
+            'invoices': invoices.count(),
+            'final': invoices.filter(is_final=True).count(),
+            'proforma': invoices.filter(is_final=False).count(),
+            'clients': Client.objects.count(),
+            'products': Product.objects.count(),
+            'services': Service.objects.count(),
+            'bank_accounts': BankAccount.objects.count(),
+        },
+        'revenue_inr': invoices.filter(is_final=True).aggregate(total=Sum('total_due_inr'))['total'] or 0,
+        'pending_inr': invoices.filter(is_final=False).aggregate(total=Sum('total_due_inr'))['total'] or 0,
+        'totals': _grouped(invoices, 'currency_type', 'is_final'),
+        'monthly': monthly,
+        'branches': _grouped(invoices, 'branch_address', 'currency_type', 'is_final'),
+    }
+
+
+def _stats_key(generation, financial_year, branch):
+    return f"invoice_stats:{generation}:{financial_year or 'all'}:{branch or 'all'}"
+
+
+def get_invoice_stats(financial_year=None, branch=None):
+    """Return the dashboard aggregates, served from cache while still current."""
+    key = _stats_key(cache.get(GENERATION_KEY, 0), financial_year, branch)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_invoice_stats(financial_year, branch)
+        cache.set(key, stats, timeout=settings.INVOICE_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+async def aget_invoice_stats(financial_year=None, branch=None):
+    """get_invoice_stats() for async views; only a cache miss leaves the event loop."""
+    key = _stats_key(await cache.aget(GENERATION_KEY, 0), financial_year, branch)
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await sync_to_async(compute_invoice_stats)(financial_year, branch)
+        await cache.aset(key, stats, timeout=settings.INVOICE_STATS_CACHE_TIMEOUT)
+    return stats
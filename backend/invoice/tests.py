@@ -1,3 +1,1024 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.signals import post_save
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import iscoroutinefunction
+from PIL import Image
+
+from invoice_backend.async_support import async_read_view
+from invoice_backend.loadtest import histogram
+
+from bank.models import BankAccount
+from branch.models import Branch
+from clients.models import Client
+from product.models import Product
+from . import async_views, benchmarks, export, pdf, stats
+from .formatting import amount_in_words, format_amount, format_invoice_number
+from .logo import current_logo
+from .management.commands.load_test import classify
+from .models import ExchangeRate, Invoice, InvoiceItem, Logo, ProformaSequence, Tax
+from .recompute import invoices_for_product, invoices_for_tax, recompute
+from .seed import seed_data
+from .views import InvoiceDetailView, InvoiceListCreateView, InvoiceStatsView
+
+# The query-count assertions are about ORM queries, so these tests keep the
+# cache in process rather than in the database table used by default.
+PROCESS_LOCAL_CACHE = override_settings(CACHES={
+    'default': {'BACKEND': 'invoice_backend.cache.TieredCache', 'OPTIONS': {'LOCAL_PREFIXES': ['invoice_stats:']}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+
+
+class InvoiceFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_obj = Client.objects.create(client_name="Acme", tax_type="gst")
+        cls.branch = Branch.objects.create(branch_name="Head Office", series_prefix="MBC")
+        cls.bank_account = BankAccount.objects.create(bank_name="Bank", account_number="001")
+        cls.product = Product.objects.create(name="Widget", unit_cost=Decimal("10.00"))
+
+    def make_invoice(self, **kwargs):
+        data = {
+            "invoice_type": "product",
+            "client": self.client_obj,
+            "branch_address": self.branch,
+            "bank_account": self.bank_account,
+            "invoice_date": date(2025, 5, 1),
+            "due_date": date(2025, 5, 31),
+            "currency_type": "INR",
+            "payment_terms": "Net 30",
+            "tax_option": "yes",
+            "tax_rate": Decimal("18.00"),
+        }
+        data.update(kwargs)
+        return Invoice.objects.create(**data)
+
+    def items_data(self, count):
+        return [
+            {"item_type": "product", "product": self.product, "quantity": 2, "unit_cost": Decimal("0")}
+            for _ in range(count)
+        ]
+
+
+class BulkItemWriteTests(InvoiceFixtureMixin, TestCase):
+    def test_add_items_computes_totals_once(self):
+        invoice = self.make_invoice()
+        invoice.add_items(self.items_data(3))
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.items.count(), 3)
+        self.assertEqual(invoice.subtotal, Decimal("60.00"))
+        self.assertEqual(invoice.gst, Decimal("10.80"))
+        self.assertEqual(invoice.total_due, Decimal("70.80"))
+
+    def test_add_items_matches_per_item_save(self):
+        bulk = self.make_invoice()
+        bulk.add_items(self.items_data(4))
+        single = self.make_invoice()
+        for item_data in self.items_data(4):
+            InvoiceItem.objects.create(invoice=single, **item_data)
+        bulk.refresh_from_db()
+        single.refresh_from_db()
+        self.assertEqual(
+            (bulk.subtotal, bulk.gst, bulk.total_due),
+            (single.subtotal, single.gst, single.total_due),
+        )
+
+    def test_item_endpoint_accepts_list(self):
+        invoice = self.make_invoice()
+        payload = [
+            {"invoice": invoice.pk, "item_type": "service", "name": f"Support {i}", "quantity": 1, "unit_cost": "5.00"}
+            for i in range(5)
+        ]
+        response = self.client.post("/api/invoices/invoice-items/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.items.count(), 5)
+        self.assertEqual(invoice.subtotal, Decimal("25.00"))
+
+    def test_item_endpoint_returns_ids_without_bulk_insert_returning(self):
+        # As on MySQL, where bulk_create leaves the primary keys unset.
+        first, second = self.make_invoice(), self.make_invoice()
+        first.add_items(self.items_data(1))
+        payload = [
+            {"invoice": invoice.pk, "item_type": "service", "name": name, "quantity": 1, "unit_cost": "5.00"}
+            for invoice, name in ((first, "Support"), (second, "Hosting"), (first, "Training"))
+        ]
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            response = self.client.post("/api/invoices/invoice-items/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        saved = {item.pk: (item.invoice_id, item.name) for item in InvoiceItem.objects.filter(name__in=["Support", "Hosting", "Training"])}
+        self.assertEqual(
+            sorted((row["invoice"], row["name"]) for row in response.json()),
+            sorted(saved[row["id"]] for row in response.json()),
+        )
+        self.assertEqual(len(saved), 3)
+
+
+class InvoiceCreateApiTests(InvoiceFixtureMixin, TestCase):
+    def payload(self, **kwargs):
+        data = {
+            "invoice_type": "service",
+            "client": self.client_obj.pk,
+            "branch_address": self.branch.pk,
+            "bank_account": self.bank_account.pk,
+            "invoice_date": "2025-05-01",
+            "due_date": "2025-05-31",
+            "currency_type": "INR",
+            "payment_terms": "Net 30",
+            "items": [
+                {"item_type": "service", "name": "Design", "quantity": 2, "unit_cost": "50.00", "description": ["Logo"]},
+                {"item_type": "product", "product": self.product.pk, "quantity": 1, "unit_cost": "0"},
+            ],
+        }
+        data.update(kwargs)
+        return data
+
+    def test_invoice_and_items_in_one_request(self):
+        response = self.client.post("/api/invoices/invoices/", self.payload(), content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        invoice = Invoice.objects.get(pk=response.json()["id"])
+        self.assertEqual(invoice.items.count(), 2)
+        self.assertEqual(invoice.subtotal, Decimal("110.00"))
+        self.assertEqual(len(response.json()["items"]), 2)
+
+    def test_financial_year_is_not_writable(self):
+        response = self.client.post(
+            "/api/invoices/invoices/", self.payload(financial_year="1999-2000"), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["financial_year"], "2025-2026")
+
+    def test_query_count_does_not_grow_with_items(self):
+        products = [Product.objects.create(name=f"Part {n}", unit_cost=Decimal("3.00")) for n in range(20)]
+
+        def create(count):
+            items = [{"item_type": "product", "product": products[n].pk, "quantity": 1, "unit_cost": "3"} for n in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post("/api/invoices/invoices/", self.payload(items=items), content_type="application/json")
+            self.assertEqual(response.status_code, 201, response.content)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create(2), create(20))
+        response = self.client.post(
+            "/api/invoices/invoices/", self.payload(items=[{"item_type": "product", "product": 999999, "quantity": 1, "unit_cost": "3"}]),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_create_leaves_nothing_behind(self):
+        with mock.patch.object(Invoice, "add_items", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                self.client.post("/api/invoices/invoices/", self.payload(), content_type="application/json")
+        self.assertFalse(Invoice.objects.exists())
+
+    def upload(self, name, content, **data):
+        data["file"] = SimpleUploadedFile(name, content.encode())
+        return self.client.post("/api/invoices/invoices/import/", data)
+
+    def test_jsonl_import_commits_in_batches_and_reports_bad_rows(self):
+        good = json.dumps(self.payload())
+        lines = [good, "{not json", good, json.dumps(self.payload(client=999999)), good]
+        response = self.upload("invoices.jsonl", "\n".join(lines), batch_size=2)
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual((result["created"], result["failed"]), (3, 2))
+        self.assertEqual([error["line"] for error in result["errors"]], [2, 4])
+        self.assertIn("client", result["errors"][1]["errors"])
+        self.assertEqual(InvoiceItem.objects.count(), 6)
+
+    def test_csv_import_groups_rows_by_ref(self):
+        header = "ref,invoice_type,client,branch_address,bank_account,invoice_date,due_date,currency_type,payment_terms,item_type,product,name,quantity,unit_cost,description"
+        common = f"service,{self.client_obj.pk},{self.branch.pk},{self.bank_account.pk},2025-05-01,2025-05-31,INR,Net 30"
+        rows = [
+            header,
+            f"A,{common},service,,Design,1,100.00,Logo|Cards",
+            f"A,{common},service,,Hosting,12,5.00,",
+            f"B,{common},product,{self.product.pk},,3,0,",
+        ]
+        result = self.upload("invoices.csv", "\n".join(rows)).json()
+        self.assertEqual((result["created"], result["failed"]), (2, 0))
+        design = InvoiceItem.objects.get(name="Design")
+        self.assertEqual(design.description, ["Logo", "Cards"])
+        self.assertEqual(design.invoice.subtotal, Decimal("160.00"))
+
+    def test_import_reports_any_row_failure_and_keeps_going(self):
+        add_items = Invoice.add_items
+
+        def failing_add_items(invoice, items):
+            if invoice.payment_terms == "Boom":
+                raise ValueError("no exchange rate")
+            return add_items(invoice, items)
+
+        lines = [json.dumps(self.payload()), json.dumps(self.payload(payment_terms="Boom")), json.dumps(self.payload())]
+        with mock.patch.object(Invoice, "add_items", autospec=True, side_effect=failing_add_items):
+            result = self.upload("invoices.jsonl", "\n".join(lines)).json()
+        self.assertEqual((result["created"], result["failed"]), (2, 1))
+        self.assertEqual(result["errors"][0]["errors"], {"non_field_errors": ["no exchange rate"]})
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_import_caps_the_reported_errors(self):
+        with mock.patch("invoice.importer.MAX_REPORTED_ERRORS", 2):
+            result = self.upload("invoices.jsonl", "\n".join(["{not json"] * 5)).json()
+        self.assertEqual((result["failed"], len(result["errors"]), result["errors_truncated"]), (5, 2, 3))
+
+    def test_import_loads_only_the_referenced_rows(self):
+        Client.objects.create(client_name="Unused")
+        with CaptureQueriesContext(connection) as ctx:
+            result = self.upload("invoices.jsonl", json.dumps(self.payload())).json()
+        self.assertEqual(result["created"], 1)
+        tables = [model._meta.db_table for model in (Client, Branch, BankAccount, Product)]
+        whole_tables = [
+            query["sql"] for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and "WHERE" not in query["sql"]
+            and any(f'FROM "{table}"' in query["sql"] for table in tables)
+        ]
+        self.assertEqual(whole_tables, [])
+
+    def test_import_rejects_bad_batch_size(self):
+        self.assertEqual(self.upload("x.jsonl", "", batch_size=0).status_code, 400)
+
+
+class TotalsDeltaTests(InvoiceFixtureMixin, TestCase):
+    def assertTotals(self, invoice, subtotal, gst, total_due):
+        invoice.refresh_from_db()
+        self.assertEqual(
+            (invoice.subtotal, invoice.gst, invoice.total_due),
+            (Decimal(subtotal), Decimal(gst), Decimal(total_due)),
+        )
+
+    def test_item_insert_update_delete_move_totals(self):
+        invoice = self.make_invoice(discount=Decimal("5.00"))
+        item = InvoiceItem.objects.create(invoice=invoice, item_type="service", name="Setup", quantity=1, unit_cost=Decimal("100.00"))
+        self.assertTotals(invoice, "100.00", "18.00", "113.00")
+        item.quantity = 3
+        item.save()
+        self.assertTotals(invoice, "300.00", "54.00", "349.00")
+        other = self.make_invoice()
+        item.invoice = other
+        item.save()
+        self.assertTotals(invoice, "0.00", "0.00", "-5.00")
+        self.assertTotals(other, "300.00", "54.00", "354.00")
+        item.delete()
+        self.assertTotals(other, "0.00", "0.00", "0.00")
+
+    def test_stale_invoice_copy_does_not_overwrite_totals(self):
+        invoice = self.make_invoice()
+        stale = Invoice.objects.get(pk=invoice.pk)
+        invoice.add_items(self.items_data(2))
+        stale.amount_paid = Decimal("10.00")
+        stale.save()
+        self.assertEqual(stale.total_due, Decimal("37.20"))
+        self.assertTotals(invoice, "40.00", "7.20", "37.20")
+
+    def test_calculate_totals_repairs_drift(self):
+        invoice = self.make_invoice()
+        invoice.add_items(self.items_data(2))
+        Invoice.objects.filter(pk=invoice.pk).update(subtotal=0, gst=0)
+        invoice.calculate_totals()
+        self.assertEqual((invoice.subtotal, invoice.gst), (Decimal("40.00"), Decimal("7.20")))
+
+
+class ExchangeRateTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        ExchangeRate.objects.create(currency="USD", effective_date=date(2025, 1, 1), rate_to_inr=Decimal("80"))
+        ExchangeRate.objects.create(currency="USD", effective_date=date(2025, 6, 1), rate_to_inr=Decimal("85"))
+
+    def test_rate_in_effect_on_invoice_date(self):
+        self.assertEqual(ExchangeRate.rate_for("USD", date(2024, 6, 1)), Decimal("80"))
+        self.assertEqual(ExchangeRate.rate_for("USD", date(2025, 5, 31)), Decimal("80"))
+        self.assertEqual(ExchangeRate.rate_for("USD", date(2025, 6, 1)), Decimal("85"))
+        self.assertEqual(ExchangeRate.rate_for("INR", date(2025, 6, 1)), Decimal("1"))
+        self.assertIsNone(ExchangeRate.rate_for("XYZ", date(2025, 6, 1)))
+
+    def test_total_due_inr_follows_totals(self):
+        invoice = self.make_invoice(currency_type="USD", invoice_date=date(2025, 7, 1), discount=Decimal("2.00"))
+        self.assertEqual(invoice.total_due_inr, Decimal("-170.00"))
+        invoice.add_items(self.items_data(1))
+        self.assertEqual(invoice.total_due_inr, Decimal("1836.00"))
+        invoice.amount_paid = Decimal("10.00")
+        invoice.save()
+        self.assertEqual(invoice.total_due_inr, Decimal("986.00"))
+        invoice.clear_items()
+        self.assertEqual(invoice.total_due_inr, Decimal("-1020.00"))
+
+
+class ProformaNumberTests(InvoiceFixtureMixin, TestCase):
+    def test_numbers_come_from_branch_series(self):
+        other = Branch.objects.create(branch_name="Dubai", proforma_prefix="DXB")
+        self.assertEqual(self.make_invoice().invoice_number, "MB-01")
+        self.assertEqual(self.make_invoice().invoice_number, "MB-02")
+        self.assertEqual(self.make_invoice(branch_address=other).invoice_number, "DXB-01")
+
+    def test_series_continues_past_two_digits(self):
+        ProformaSequence.objects.update_or_create(prefix="MB", defaults={"last_number": 99})
+        self.assertEqual(self.make_invoice().invoice_number, "MB-100")
+        self.assertEqual(self.make_invoice().invoice_number, "MB-101")
+
+
+    def test_finalising_saves_the_invoice_once(self):
+        invoice = self.make_invoice()
+        invoice.add_items(self.items_data(2))
+        saves = []
+        post_save.connect(
+            lambda instance, **kwargs: saves.append(instance.pk), sender=Invoice, weak=False, dispatch_uid="count_invoice_saves",
+        )
+        self.addCleanup(post_save.disconnect, sender=Invoice, dispatch_uid="count_invoice_saves")
+        response = self.client.patch(
+            f"/api/invoices/invoices/{invoice.pk}/", {"is_final": True}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.json()["final_invoice_number"], r"^MBC/\d\d-\d\d/01$")
+        self.assertEqual(len(saves), 1)
+
+class InvoiceListApiTests(InvoiceFixtureMixin, TestCase):
+    def test_list_query_count_is_independent_of_row_count(self):
+        for _ in range(3):
+            self.make_invoice().add_items(self.items_data(2))
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/api/invoices/invoices/")
+        for _ in range(20):
+            self.make_invoice().add_items(self.items_data(2))
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get("/api/invoices/invoices/")
+        self.assertEqual(len(response.json()), 23)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_cursor_pagination_is_opt_in(self):
+        for _ in range(5):
+            self.make_invoice()
+        self.assertIsInstance(self.client.get("/api/invoices/invoices/").json(), list)
+        page = self.client.get("/api/invoices/invoices/", {"page_size": 2}).json()
+        self.assertEqual(len(page["results"]), 2)
+        seen = [row["id"] for row in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen.extend(row["id"] for row in page["results"])
+        self.assertEqual(seen, sorted(Invoice.objects.values_list("id", flat=True), reverse=True))
+
+    def test_filters(self):
+        match = self.make_invoice(invoice_date=date(2025, 6, 10))
+        match.add_items(self.items_data(5))
+        self.make_invoice(invoice_date=date(2025, 6, 10))
+        old = self.make_invoice(invoice_date=date(2024, 1, 1))
+        Invoice.objects.filter(pk__in=[match.pk, old.pk]).update(is_final=True, is_saved_final=True)
+        response = self.client.get("/api/invoices/invoices/", {
+            "status": "final",
+            "branch": self.branch.pk,
+            "client": self.client_obj.pk,
+            "date_from": "2025-06-01",
+            "date_to": "2025-06-30",
+            "amount_min": "100",
+            "amount_max": "200",
+        })
+        self.assertEqual([row["id"] for row in response.json()], [match.pk])
+        self.assertEqual(self.client.get("/api/invoices/invoices/", {"date_from": "junk"}).status_code, 400)
+
+    def test_year_and_month_filters_on_proforma_pages(self):
+        june = self.make_invoice(invoice_date=date(2025, 6, 10))
+        self.make_invoice(invoice_date=date(2025, 7, 10))
+        self.make_invoice(invoice_date=date(2024, 6, 10))
+        Invoice.objects.filter(pk=self.make_invoice(invoice_date=date(2025, 6, 11)).pk).update(is_final=True)
+        page = self.client.get(
+            "/api/invoices/invoices/", {"status": "proforma", "year": "2025", "month": "06", "page_size": 10},
+        ).json()
+        self.assertEqual([row["id"] for row in page["results"]], [june.pk])
+        self.assertIsNone(page["next"])
+        self.assertEqual(self.client.get("/api/invoices/invoices/", {"month": "june"}).status_code, 400)
+
+
+@PROCESS_LOCAL_CACHE
+class InvoiceStatsTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_group_by_month_currency_and_status(self):
+        self.make_invoice(invoice_date=date(2025, 5, 3)).add_items(self.items_data(1))
+        self.make_invoice(invoice_date=date(2025, 5, 20), currency_type="USD").add_items(self.items_data(2))
+        self.make_invoice(invoice_date=date(2024, 2, 1)).add_items(self.items_data(1))
+        stats = self.client.get("/api/invoices/stats/", {"financial_year": "2025-2026"}).json()
+        self.assertEqual(stats["counts"]["invoices"], 2)
+        self.assertEqual(stats["counts"]["proforma"], 2)
+        self.assertEqual(
+            [(row["month"], row["currency_type"], row["count"], float(row["total_due"])) for row in stats["monthly"]],
+            [("2025-05", "INR", 1, 23.6), ("2025-05", "USD", 1, 47.2)],
+        )
+
+
+@PROCESS_LOCAL_CACHE
+class InvoiceStatsInvalidationTests(InvoiceFixtureMixin, TransactionTestCase):
+    """Commits for real: stats are retired by on_commit callbacks."""
+
+    def setUp(self):
+        type(self).setUpTestData()
+        cache.clear()
+
+    def test_stats_are_cached_until_invoices_change(self):
+        self.make_invoice()
+        self.client.get("/api/invoices/stats/")
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get("/api/invoices/stats/").json()
+        self.assertEqual(len(ctx.captured_queries), 0)
+        generation = cache.get(stats.GENERATION_KEY)
+        with transaction.atomic():
+            self.make_invoice().add_items(self.items_data(1))
+            # Not before the commit, or a concurrent request could cache the old rows as new.
+            self.assertEqual(cache.get(stats.GENERATION_KEY), generation)
+        self.assertEqual(cache.get(stats.GENERATION_KEY), generation + 1)
+        fresh = self.client.get("/api/invoices/stats/").json()
+        self.assertEqual(fresh["counts"]["invoices"], cached["counts"]["invoices"] + 1)
+
+
+@PROCESS_LOCAL_CACHE
+class GstSummaryTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        Branch.objects.filter(pk=self.branch.pk).update(state="Karnataka", gstin="29ABCDE1234F1Z5")
+        self.branch.refresh_from_db()
+        self.outside = Client.objects.create(client_name="Globex", tax_type="gst", state="Maharashtra")
+        Client.objects.filter(pk=self.client_obj.pk).update(state="Karnataka")
+
+    def final_invoice(self, items=1, **kwargs):
+        invoice = self.make_invoice(**kwargs)
+        invoice.add_items(self.items_data(items))
+        Invoice.objects.filter(pk=invoice.pk).update(is_final=True, is_saved_final=True)
+        return invoice
+
+    def summary(self, **params):
+        response = self.client.get("/api/invoices/reports/gst-summary/", {"financial_year": "2025-2026", **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_financial_year_follows_invoice_date(self):
+        invoice = self.make_invoice(invoice_date=date(2026, 3, 31), financial_year="1999-2000")
+        self.assertEqual(invoice.financial_year, "2025-2026")
+        invoice.invoice_date = date(2026, 4, 1)
+        invoice.save()
+        self.assertEqual(Invoice.objects.get(pk=invoice.pk).financial_year, "2026-2027")
+
+    def test_groups_by_gstin_state_rate_and_month(self):
+        self.final_invoice(items=1, invoice_date=date(2025, 5, 3))
+        self.final_invoice(items=2, invoice_date=date(2025, 5, 20))
+        self.final_invoice(items=1, invoice_date=date(2025, 6, 1), client=self.outside)
+        self.final_invoice(items=1, invoice_date=date(2025, 3, 1))
+        self.make_invoice(invoice_date=date(2025, 5, 3)).add_items(self.items_data(1))
+
+        report = self.summary()
+        rows = [
+            (row["branch_gstin"], row["client_state"], row["tax_rate"], row["month"], row["invoices"],
+             row["taxable_value"], row["tax_amount"], row["supply_type"], row["cgst"], row["igst"])
+            for row in report["rows"]
+        ]
+        self.assertEqual(rows, [
+            ("29ABCDE1234F1Z5", "Karnataka", 18.0, "2025-05", 2, 60.0, 10.8, "intra_state", 5.4, 0.0),
+            ("29ABCDE1234F1Z5", "Maharashtra", 18.0, "2025-06", 1, 20.0, 3.6, "inter_state", 0.0, 3.6),
+        ])
+        self.assertEqual(report["totals"], {"invoices": 3, "taxable_value": 80.0, "tax_amount": 14.4})
+
+        by_rate = self.summary(group_by="tax_rate", status="all")
+        self.assertEqual([(row["tax_rate"], row["invoices"]) for row in by_rate["rows"]], [(18.0, 4)])
+
+    def test_summary_uses_one_query_and_is_cached(self):
+        self.final_invoice(invoice_date=date(2025, 5, 3))
+        with CaptureQueriesContext(connection) as ctx:
+            self.summary()
+        self.assertEqual(len([q for q in ctx.captured_queries if "GROUP BY" in q["sql"]]), 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.summary()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_bad_parameters_are_rejected(self):
+        url = "/api/invoices/reports/gst-summary/"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"financial_year": "2025-2027"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"financial_year": "2025-2026", "group_by": "hsn"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"financial_year": "2025-2026", "status": "void"}).status_code, 400)
+
+
+@PROCESS_LOCAL_CACHE
+class ImageVariantTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, size=(3000, 1500), color=(200, 30, 30, 255), name="logo.png"):
+        buffer = io.BytesIO()
+        Image.new("RGBA", size, color).save(buffer, format="PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def test_upload_builds_bounded_content_hashed_variants(self):
+        data = self.client.post("/api/invoices/settings/logo/", {"logo_image": self.upload(), "company_name": "Acme"}).json()
+        self.assertEqual(
+            {name: (v["width"], v["height"]) for name, v in data["variants"].items()},
+            {"print": (1200, 600), "screen": (480, 240), "thumbnail": (128, 64)},
+        )
+        self.assertRegex(data["variants"]["screen"]["url"], r"^http://testserver/media/variants/[0-9a-f]{24}\.webp$")
+        logo = Logo.objects.get()
+        with Image.open(os.path.join(settings.MEDIA_ROOT, logo.variants["print"]["path"])) as printed:
+            self.assertEqual((printed.format, printed.size), ("PNG", (1200, 600)))
+
+        # Saving without a new image keeps the variants; a new image gets new names
+        variants = logo.variants
+        logo.company_name = "Acme Ltd"
+        logo.save()
+        self.assertEqual(Logo.objects.get().variants, variants)
+        data = self.client.post("/api/invoices/settings/logo/", {"logo_image": self.upload(color=(0, 0, 255, 255))}).json()
+        self.assertNotEqual(data["variants"]["screen"]["url"], f"http://testserver/media/{variants['screen']['path']}")
+
+    def test_unreadable_upload_has_no_variants(self):
+        upload = SimpleUploadedFile("logo.png", b"not an image", content_type="image/png")
+        logo = Logo(logo_image=upload)
+        logo.save()
+        self.assertEqual(Logo.objects.get().variants, {"source": logo.logo_image.name})
+
+    def test_current_logo_is_cached_until_a_new_upload(self):
+        self.client.post("/api/invoices/settings/logo/", {"logo_image": self.upload(), "company_name": "Acme"})
+        self.assertEqual(current_logo().company_name, "Acme")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/invoices/settings/logo/").json()["company_name"], "Acme")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.client.post("/api/invoices/settings/logo/", {"company_name": "Globex"})
+        self.assertEqual(current_logo().company_name, "Globex")
+
+    def test_current_logo_is_dropped_when_deleted(self):
+        Logo.objects.create(company_name="Acme")
+        Logo.objects.create(company_name="Globex")
+        self.assertEqual(current_logo().company_name, "Globex")
+        Logo.objects.last().delete()
+        self.assertEqual(current_logo().company_name, "Acme")
+        Logo.objects.all().delete()
+        self.assertIsNone(current_logo())
+
+    def test_pdf_uses_print_variant(self):
+        self.client.post("/api/invoices/settings/logo/", {"logo_image": self.upload()})
+        data = pdf.invoice_print_data(self.make_invoice())
+        self.assertIn(os.path.join("variants", ""), data["logo_path"])
+
+    def test_avatar_variants(self):
+        user = get_user_model().objects.create_user(email="a@example.com", username="a", password="x")
+        user.avatar = self.upload(size=(800, 800), name="me.png")
+        user.save()
+        self.assertEqual(
+            {name: v["width"] for name, v in user.avatar_variants.items() if name != "source"},
+            {"screen": 256, "thumbnail": 64},
+        )
+
+
+class AsyncReadViewTests(InvoiceFixtureMixin, TestCase):
+    """The ASGI read path must answer exactly like the sync DRF views."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        override = override_settings(ASYNC_READ_VIEWS=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.invoice = self.make_invoice()
+        self.invoice.add_items(self.items_data(3))
+        self.make_invoice(invoice_date=date(2024, 6, 1)).add_items(self.items_data(1))
+
+    async def call(self, async_get, sync_view, path, **kwargs):
+        view = async_read_view(async_get, sync_view)
+        self.assertTrue(iscoroutinefunction(view))
+        return await view(self.factory.get(path), **kwargs)
+
+    async def test_list_detail_and_stats_match_sync_views(self):
+        cases = [
+            (async_views.invoice_list, InvoiceListCreateView.as_view(), "/api/invoices/invoices/", {}),
+            (async_views.invoice_list, InvoiceListCreateView.as_view(), "/api/invoices/invoices/?date_from=2025-01-01", {}),
+            (async_views.invoice_detail, InvoiceDetailView.as_view(), f"/api/invoices/invoices/{self.invoice.pk}/", {"pk": self.invoice.pk}),
+            (async_views.invoice_stats, InvoiceStatsView.as_view(), "/api/invoices/stats/?financial_year=2025-2026", {}),
+        ]
+        for async_get, sync_view, path, kwargs in cases:
+            response = await self.call(async_get, sync_view, path, **kwargs)
+            expected = await self.async_client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content), expected.json(), path)
+
+    async def test_errors_match_sync_views(self):
+        response = await self.call(async_views.invoice_detail, InvoiceDetailView.as_view(), "/x/", pk=0)
+        self.assertEqual((response.status_code, json.loads(response.content)), (404, {"detail": "No Invoice matches the given query."}))
+        response = await self.call(async_views.invoice_list, InvoiceListCreateView.as_view(), "/x/?date_from=soon")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_paginated_lists_and_writes_use_the_sync_view(self):
+        response = await self.call(async_views.invoice_list, InvoiceListCreateView.as_view(), "/api/invoices/invoices/?page_size=1")
+        # Django's handler renders DRF responses; called directly we do it here.
+        self.assertEqual(len(json.loads(response.render().content)["results"]), 1)
+        view = async_read_view(async_views.invoice_detail, InvoiceDetailView.as_view())
+        response = await view(self.factory.delete(f"/api/invoices/invoices/{self.invoice.pk}/"), pk=self.invoice.pk)
+        self.assertEqual(response.status_code, 204)
+
+    def test_disabled_outside_asgi_mode(self):
+        sync_view = InvoiceListCreateView.as_view()
+        with override_settings(ASYNC_READ_VIEWS=False):
+            self.assertIs(async_read_view(async_views.invoice_list, sync_view), sync_view)
+
+
+@PROCESS_LOCAL_CACHE
+class InvoicePdfTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        override = override_settings(INVOICE_PDF_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def finalised_invoice(self, items=3):
+        invoice = self.make_invoice()
+        invoice.add_items(self.items_data(items))
+        Invoice.objects.filter(pk=invoice.pk).update(is_final=True, is_saved_final=True, final_invoice_number=f"MBC/25-26/{invoice.pk}")
+        return Invoice.objects.get(pk=invoice.pk)
+
+    def cached_files(self):
+        return [name for _, _, files in os.walk(self.cache_dir) for name in files]
+
+    def test_formatting_matches_print_view(self):
+        self.assertEqual(format_amount(Decimal("1234567.5")), "12,34,567.50")
+        self.assertEqual(format_amount(12, 0), "12")
+        self.assertEqual(amount_in_words(Decimal("105000"), "INR"), "One Lakh Five Thousand INR Only")
+        self.assertEqual(amount_in_words(Decimal("23010000.4"), "INR"), "Two Crore Thirty Lakh Ten Thousand INR Only")
+        self.assertEqual(amount_in_words(Decimal("23010000.4"), "USD"), "Twenty Three Million Ten Thousand USD Only")
+
+    def test_render_produces_multi_page_pdf(self):
+        invoice = self.finalised_invoice(items=40)
+        content = pdf.render_invoice_pdf(pdf.invoice_print_data(invoice))
+        self.assertTrue(content.startswith(b"%PDF-1.4"))
+        self.assertTrue(content.rstrip().endswith(b"%%EOF"))
+        self.assertGreater(content.count(b"/Type /Page "), 1)
+
+    def test_text_outside_cp1252_fails_loudly(self):
+        self.client_obj.client_name = "Café Mumbai"
+        self.client_obj.save()
+        invoice = self.finalised_invoice()
+        self.assertTrue(pdf.render_invoice_pdf(pdf.invoice_print_data(invoice)).startswith(b"%PDF-1.4"))
+
+        self.client_obj.client_name = "मार्केटबाइट्स"
+        self.client_obj.save()
+        invoice.refresh_from_db()
+        with self.assertRaisesMessage(pdf.UnsupportedTextError, "मार्केटबाइट्स"):
+            pdf.render_invoice_pdf(pdf.invoice_print_data(invoice))
+        response = self.client.get(f"/api/invoices/invoices/{invoice.pk}/pdf/")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("print view", response.json()["detail"])
+        self.assertEqual(self.cached_files(), [])
+
+    def test_finalised_pdf_is_cached_and_conditional(self):
+        invoice = self.finalised_invoice()
+        url = f"/api/invoices/invoices/{invoice.pk}/pdf/"
+        with mock.patch.object(pdf, "render_invoice_pdf", wraps=pdf.render_invoice_pdf) as render:
+            first = self.client.get(url)
+            second = self.client.get(url, {"download": "1"})
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(first.streaming_content), b"".join(second.streaming_content))
+        self.assertIn("attachment", second["Content-Disposition"])
+        self.assertEqual(len(self.cached_files()), 1)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        Invoice.objects.filter(pk=invoice.pk).update(payment_terms="Net 45")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_proforma_pdf_is_not_cached(self):
+        invoice = self.make_invoice()
+        response = self.client.get(f"/api/invoices/invoices/{invoice.pk}/pdf/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"%PDF"))
+        self.assertEqual(self.cached_files(), [])
+
+    def test_document_embeds_relations_in_few_queries(self):
+        Logo.objects.create(company_name="MarketBytes")
+        invoice = self.finalised_invoice()
+        Invoice.objects.filter(pk=invoice.pk).update(total_due=Decimal("105000"))
+        with CaptureQueriesContext(connection) as ctx:
+            document = self.client.get(f"/api/invoices/invoices/{invoice.pk}/document/").json()
+        self.assertLessEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(document["client_details"]["client_name"], "Acme")
+        self.assertEqual(document["branch_details"]["branch_name"], "Head Office")
+        self.assertEqual(document["bank_details"]["account_number"], "001")
+        self.assertEqual(document["logo"]["company_name"], "MarketBytes")
+        self.assertEqual(document["total_in_words"], "One Lakh Five Thousand INR Only")
+        self.assertEqual(document["display_invoice_number"], f"MBC/25-26/{invoice.pk:02d}")
+        self.assertEqual(len(document["items"]), 3)
+
+    def test_proforma_number_uses_the_branch_prefix(self):
+        self.assertEqual(format_invoice_number("MB-7"), "MB-07")
+        self.assertEqual(format_invoice_number("HO-7", "HO"), "HO-07")
+        self.assertEqual(format_invoice_number("MB-7", "HO"), "MB-7")
+        Branch.objects.filter(pk=self.branch.pk).update(proforma_prefix="HO")
+        invoice = self.make_invoice()
+        Invoice.objects.filter(pk=invoice.pk).update(invoice_number="HO-7")
+        document = self.client.get(f"/api/invoices/invoices/{invoice.pk}/document/").json()
+        self.assertEqual(document["display_invoice_number"], "HO-07")
+        self.assertEqual(pdf.invoice_print_data(Invoice.objects.get(pk=invoice.pk))["number"], "HO-07")
+
+    def test_bulk_render_uses_process_pool(self):
+        invoices = [self.finalised_invoice() for _ in range(4)]
+        paths = pdf.render_invoices_to_cache(invoices, workers=2)
+        self.assertEqual(sorted(paths), sorted(invoice.pk for invoice in invoices))
+        self.assertEqual(len(self.cached_files()), 4)
+        with mock.patch.object(pdf, "ProcessPoolExecutor") as pool:
+            self.assertEqual(pdf.render_invoices_to_cache(invoices, workers=2), paths)
+        pool.assert_not_called()
+
+    def test_bulk_render_skips_invoices_it_cannot_draw(self):
+        invoices = [self.finalised_invoice() for _ in range(3)]
+        hindi = Client.objects.create(client_name="मार्केटबाइट्स")
+        Invoice.objects.filter(pk=invoices[1].pk).update(client=hindi)
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch.object(pdf, "ProcessPoolExecutor", wraps=pdf.ProcessPoolExecutor) as pool:
+            call_command("render_invoice_pdfs", "--workers", "2", "--batch-size", "1", stdout=out, stderr=err)
+        pool.assert_not_called()  # the command's own pool serves every batch
+        self.assertIn("2 invoice PDF(s) in the cache, 1 skipped.", out.getvalue())
+        self.assertIn(f"Skipped invoice {invoices[1].pk}", err.getvalue())
+        self.assertEqual(len(self.cached_files()), 2)
+
+
+class InvoiceExportTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        self.other_branch = Branch.objects.create(branch_name="Pune", series_prefix="PUN")
+        self.first = self.make_invoice(financial_year="2025-2026")
+        self.first.add_items(self.items_data(2))
+        self.second = self.make_invoice(branch_address=self.other_branch, invoice_date=date(2024, 6, 1), financial_year="2024-2025")
+        self.second.add_items(self.items_data(1))
+
+    def csv_rows(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return [line.split(",") for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_invoice_csv_joins_client_and_branch(self):
+        rows = self.csv_rows("/api/invoices/invoices/export/", {"chunk_size": 1})
+        self.assertEqual(rows[0][:4], ["Invoice ID", "Invoice Number", "Final Invoice Number", "Status"])
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.first.pk), str(self.second.pk)])
+        header = rows[0]
+        self.assertEqual(rows[1][header.index("Client")], "Acme")
+        self.assertEqual(rows[2][header.index("Branch")], "Pune")
+        self.assertEqual(rows[1][header.index("Status")], "Proforma")
+
+    def test_filters_apply_to_invoices_and_items(self):
+        rows = self.csv_rows("/api/invoices/invoices/export/", {"branch": self.other_branch.pk})
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.second.pk)])
+        rows = self.csv_rows("/api/invoices/invoice-items/export/", {"financial_year": "2025-2026"})
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row[1] for row in rows[1:]}, {str(self.first.pk)})
+        rows = self.csv_rows("/api/invoices/invoice-items/export/", {"date_to": "2024-12-31"})
+        self.assertEqual([row[1] for row in rows[1:]], [str(self.second.pk)])
+
+    def test_bad_parameters_are_rejected(self):
+        url = "/api/invoices/invoices/export/"
+        self.assertEqual(self.client.get(url, {"file_format": "pdf"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"chunk_size": "0"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"date_from": "yesterday"}).status_code, 400)
+
+    def test_xlsx_is_a_readable_workbook(self):
+        response = self.client.get("/api/invoices/invoice-items/export/", {"file_format": "xlsx"})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="invoice-items.xlsx"')
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as workbook:
+            self.assertIn('name="Invoice Items"', workbook.read("xl/workbook.xml").decode())
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row>"), 4)
+        self.assertIn("Widget", sheet)
+
+    def test_xlsx_continues_on_new_sheet_when_full(self):
+        rows = [(index, f"row {index}") for index in range(5)]
+        content = b"".join(export.stream_xlsx(["n", "label"], iter(rows), title="Data", max_sheet_rows=3))
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheets = [workbook.read(f"xl/worksheets/sheet{index}.xml").decode() for index in (1, 2, 3)]
+            self.assertNotIn("xl/worksheets/sheet4.xml", workbook.namelist())
+        # header + 2 rows per sheet
+        self.assertEqual([sheet.count("<row>") for sheet in sheets], [3, 3, 2])
+        self.assertIn("row 4", sheets[2])
+
+    def test_export_memory_is_flat(self):
+        """Peak memory while streaming 20k invoices stays within a small margin of 2k."""
+        template = self.make_invoice()
+        fields = {
+            field.attname: getattr(template, field.attname)
+            for field in Invoice._meta.concrete_fields
+            if not field.primary_key and field.name not in ("invoice_number", "final_invoice_number")
+        }
+        Invoice.objects.bulk_create(
+            (Invoice(invoice_number=f"EXP-{index}", **fields) for index in range(20000)), batch_size=2000
+        )
+        ids = list(Invoice.objects.order_by("pk").values_list("pk", flat=True))
+
+        def peak(count):
+            queryset = Invoice.objects.filter(pk__lte=ids[count])
+            headers = [title for title, _ in export.INVOICE_COLUMNS]
+            tracemalloc.start()
+            size = 0
+            for chunk in export.stream_csv(headers, export.iter_rows(queryset, export.INVOICE_COLUMNS)):
+                size += len(chunk)
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result, size
+
+        small, small_size = peak(2000)
+        large, large_size = peak(20000)
+        print(f"\nexport peak memory: 2k rows {small // 1024} KiB, 20k rows {large // 1024} KiB")
+        self.assertGreater(large_size, small_size * 9)
+        self.assertLess(large, small * 1.5)
+
+
+class BulkItemQueryCountBenchmark(InvoiceFixtureMixin, TestCase):
+    """
+    Query-count benchmark for invoice creation with N line items. The bulk
+    path has to stay flat (bulk_create batches aside) from 1 to 500 items.
+    """
+
+    SIZES = [1, 10, 50, 100, 500]
+
+    def insert_batches(self, size):
+        fields = [f for f in InvoiceItem._meta.concrete_fields if not f.primary_key]
+        batch_size = connection.ops.bulk_batch_size(fields, [None] * size)
+        return -(-size // batch_size)
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def test_bulk_creation_query_count_is_linear(self):
+        counts = {}
+        for size in self.SIZES:
+            items_data = self.items_data(size)
+            counts[size] = self.count_queries(lambda: self.make_invoice().add_items(items_data))
+        batches = {size: self.insert_batches(size) for size in self.SIZES}
+        for size in self.SIZES:
+            # Everything except the INSERT batches is a fixed overhead
+            self.assertEqual(counts[size] - batches[size], counts[1] - batches[1], counts)
+        print("\ninvoice creation queries by item count (bulk):", counts)
+
+    def test_single_item_write_cost_is_independent_of_invoice_size(self):
+        small = self.make_invoice()
+        large = self.make_invoice()
+        large.add_items(self.items_data(200))
+        item_data = self.items_data(1)[0]
+        self.assertEqual(
+            self.count_queries(lambda: InvoiceItem.objects.create(invoice=small, **item_data)),
+            self.count_queries(lambda: InvoiceItem.objects.create(invoice=large, **item_data)),
+        )
+
+
+class EndpointBenchmarkTests(TestCase):
+    """The benchmark suite at a small scale: no scenario may run more queries than its stored baseline."""
+
+    def test_query_counts_do_not_exceed_baseline(self):
+        seed_data(clients=5, branches=2, bank_accounts=1, products=20, services=2, invoices=60, items_per_invoice=3)
+        user = get_user_model().objects.create_user(username='bench', password='bench-password')
+        results = benchmarks.run_suite(user, iterations=3, warmup=1)
+        self.assertEqual(set(results), {scenario.name for scenario in benchmarks.SCENARIOS})
+        self.assertEqual(benchmarks.compare(results, benchmarks.load_baseline()), [])
+
+    def test_compare_checks_every_sample_and_ignores_latency(self):
+        baseline = {'invoice_list': {'queries': 4, 'max_queries': 4, 'p95_ms': 10.0}}
+        slow = {'invoice_list': {'queries': 4, 'max_queries': 4, 'query_counts': [4, 4, 4], 'p95_ms': 500.0}}
+        self.assertEqual(benchmarks.compare(slow, baseline), [])
+        self.assertEqual(len(benchmarks.latency_changes(slow, baseline)), 1)
+
+        spike = {'invoice_list': {'queries': 4, 'max_queries': 9, 'query_counts': [4, 9, 4], 'p95_ms': 10.0}}
+        self.assertEqual(
+            benchmarks.compare(spike, baseline), ["invoice_list: 1 request(s) ran up to 9 queries, baseline allows 4"],
+        )
+
+
+class LoadTestClassificationTests(TestCase):
+    def test_concurrency_failures_are_recognised(self):
+        self.assertEqual(classify(500, b'OperationalError: (1213, "Deadlock found when trying to get lock")'), 'deadlock')
+        self.assertEqual(classify(500, b'<pre class="exception_value">database is locked</pre>'), 'deadlock')
+        self.assertEqual(classify(500, b"IntegrityError: (1062, \"Duplicate entry 'MBC/25-26/07'\")"), 'duplicate_number')
+        self.assertEqual(classify(400, b'{"invoice_number": ["invoice with this invoice number already exists."]}'),
+                         'duplicate_number')
+        self.assertEqual(classify(502, b'Bad gateway'), 'http_502')
+
+    def test_histogram_buckets(self):
+        self.assertEqual(histogram([0.001, 0.004, 0.02, 9.0], bounds_ms=(5, 50)),
+                         [('<= 5 ms', 2), ('<= 50 ms', 1), ('> 50 ms', 1)])
+
+
+class RecomputeTests(InvoiceFixtureMixin, TestCase):
+    def setUp(self):
+        self.tax = Tax.objects.create(name="GST 18%", percentage=Decimal("18.00"))
+        self.open = [self.make_invoice() for _ in range(3)]
+        for invoice in self.open:
+            invoice.add_items(self.items_data(2))
+        self.final = self.make_invoice()
+        self.final.add_items(self.items_data(2))
+        Invoice.objects.filter(pk=self.final.pk).update(is_final=True, is_saved_final=True)
+        self.final.refresh_from_db()
+
+    def expected(self, tax_rate, unit_cost):
+        """Totals of the same invoice written from scratch through InvoiceItem.save()."""
+        self.product.unit_cost = unit_cost
+        invoice = self.make_invoice(tax_rate=tax_rate)
+        for item_data in self.items_data(2):
+            InvoiceItem.objects.create(invoice=invoice, **item_data)
+        invoice.refresh_from_db()
+        invoice.delete()
+        return invoice.subtotal, invoice.gst, invoice.total_due, invoice.total_due_inr
+
+    def totals(self, invoice):
+        invoice.refresh_from_db()
+        return invoice.subtotal, invoice.gst, invoice.total_due, invoice.total_due_inr
+
+    def test_tax_change_dry_run_then_apply(self):
+        final_before = self.totals(self.final)
+        Tax.objects.filter(pk=self.tax.pk).update(percentage=Decimal("20.00"))
+
+        response = self.client.post(
+            "/api/invoices/invoices/recompute/", {"tax": self.tax.pk, "dry_run": True}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["invoices"], 3)
+        self.assertEqual(response.data["changes"][0]["changes"]["gst"], ["7.20", "8.00"])
+        self.assertEqual(self.totals(self.open[0])[1], Decimal("7.20"))
+
+        response = self.client.post("/api/invoices/invoices/recompute/", {"tax": self.tax.pk}, content_type="application/json")
+        self.assertEqual(response.data, {"invoices": 3, "items": 6})
+        expected = self.expected(Decimal("20.00"), Decimal("10.00"))
+        for invoice in self.open:
+            self.assertEqual(self.totals(invoice), expected)
+            self.assertEqual(invoice.tax_rate, Decimal("20.00"))
+        self.assertEqual(self.totals(self.final), final_before)
+        self.assertEqual(self.final.items.first().total_gst, Decimal("3.60"))
+
+    def test_product_price_change(self):
+        final_before = self.totals(self.final)
+        Product.objects.filter(pk=self.product.pk).update(unit_cost=Decimal("12.35"))
+        self.product.refresh_from_db()
+
+        result = recompute(invoices_for_product(self.product), product=self.product)
+        self.assertEqual(result, {"invoices": 3, "items": 6})
+        expected = self.expected(Decimal("18.00"), Decimal("12.35"))
+        for invoice in self.open:
+            self.assertEqual(self.totals(invoice), expected)
+        self.assertEqual(self.totals(self.final), final_before)
+        self.assertEqual(set(self.final.items.values_list("unit_cost", flat=True)), {Decimal("10.00")})
+        # Nothing stale is left, so a second run finds nothing.
+        self.assertEqual(recompute(invoices_for_product(self.product), product=self.product), {"invoices": 0, "items": 0})
+
+    def test_queries_do_not_grow_with_invoice_count(self):
+        Tax.objects.filter(pk=self.tax.pk).update(percentage=Decimal("5.00"))
+        self.tax.refresh_from_db()
+        with CaptureQueriesContext(connection) as few:
+            recompute(invoices_for_tax(self.tax).filter(pk=self.open[0].pk), tax=self.tax)
+        with CaptureQueriesContext(connection) as many:
+            recompute(invoices_for_tax(self.tax), tax=self.tax)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_rejects_ambiguous_request(self):
+        response = self.client.post(
+            "/api/invoices/invoices/recompute/", {"tax": self.tax.pk, "product": self.product.pk},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ExchangeRateMigrationTests(TransactionTestCase):
+    before = [('invoice', '0010_image_variants')]
+    after = [('invoice', '0011_seed_exchange_rates')]
+
+    def test_foreign_currency_invoice_is_priced_in_inr(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        invoice = apps.get_model('invoice', 'Invoice').objects.create(
+            invoice_number="MB-01", invoice_type="service",
+            client=apps.get_model('clients', 'Client').objects.create(client_name="Acme"),
+            branch_address=apps.get_model('branch', 'Branch').objects.create(branch_name="Head Office"),
+            bank_account=apps.get_model('bank', 'BankAccount').objects.create(bank_name="Bank", account_number="001"),
+            invoice_date=date(2024, 5, 1), due_date=date(2024, 5, 31), currency_type="USD",
+            payment_terms="Net 30", total_due=Decimal("100.00"), is_final=True, is_saved_final=True,
+        )
+        self.assertIsNone(invoice.total_due_inr)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        invoice = Invoice.objects.get(pk=invoice.pk)
+        self.assertEqual(invoice.exchange_rate, Decimal("83.500000"))
+        self.assertEqual(invoice.total_due_inr, Decimal("8350.00"))
@@ -1,14 +1,25 @@
 from django.urls import path
-from .views import TaxListCreateView, TaxDetailView, InvoiceListCreateView, InvoiceDetailView, InvoiceItemListCreateView, InvoiceItemDetailView, FinalInvoiceListCreateView, FinalInvoiceDetailView, LogoUploadView
+from invoice_backend.async_support import async_read_view
+from . import async_views
+from .views import TaxListCreateView, TaxDetailView, InvoiceListCreateView, InvoiceDetailView, InvoiceItemListCreateView, InvoiceItemDetailView, FinalInvoiceListCreateView, FinalInvoiceDetailView, LogoUploadView, InvoiceStatsView, InvoicePdfView, InvoiceImportView, InvoiceDocumentView, InvoiceExportView, GstSummaryView, InvoiceEmailView, InvoiceRecomputeView
 
 urlpatterns = [
     path('taxes/', TaxListCreateView.as_view(), name='tax-list-create'),
     path('taxes/<int:pk>/', TaxDetailView.as_view(), name='tax-detail'),
-    path('invoices/', InvoiceListCreateView.as_view(), name='invoice-list-create'),
-    path('invoices/<int:pk>/', InvoiceDetailView.as_view(), name='invoice-detail'),
+    path('invoices/', async_read_view(async_views.invoice_list, InvoiceListCreateView.as_view()), name='invoice-list-create'),
+    path('invoices/<int:pk>/', async_read_view(async_views.invoice_detail, InvoiceDetailView.as_view()), name='invoice-detail'),
+    path('invoices/<int:pk>/document/', InvoiceDocumentView.as_view(), name='invoice-document'),
+    path('invoices/<int:pk>/pdf/', InvoicePdfView.as_view(), name='invoice-pdf'),
+    path('invoices/<int:pk>/email/', InvoiceEmailView.as_view(), name='invoice-email'),
+    path('invoices/import/', InvoiceImportView.as_view(), name='invoice-import'),
+    path('invoices/export/', InvoiceExportView.as_view(), name='invoice-export'),
+    path('invoices/recompute/', InvoiceRecomputeView.as_view(), name='invoice-recompute'),
+    path('stats/', async_read_view(async_views.invoice_stats, InvoiceStatsView.as_view()), name='invoice-stats'),
+    path('reports/gst-summary/', GstSummaryView.as_view(), name='gst-summary'),
     path('invoice-items/', InvoiceItemListCreateView.as_view(), name='invoice-item-list-create'),
+    path('invoice-items/export/', InvoiceExportView.as_view(items=True), name='invoice-item-export'),
     path('invoice-items/<int:pk>/', InvoiceItemDetailView.as_view(), name='invoice-item-detail'),
-    path('final-invoices/', FinalInvoiceListCreateView.as_view(), name='final-invoice-list-create'),
-    path('final-invoices/<int:pk>/', FinalInvoiceDetailView.as_view(), name='final-invoice-detail'),
+    path('final-invoices/', async_read_view(async_views.final_invoice_list, FinalInvoiceListCreateView.as_view()), name='final-invoice-list-create'),
+    path('final-invoices/<int:pk>/', async_read_view(async_views.final_invoice_detail, FinalInvoiceDetailView.as_view()), name='final-invoice-detail'),
     path('settings/logo/', LogoUploadView.as_view(), name='logo-upload'), 
 ]
\ No newline at end of file
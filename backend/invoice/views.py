@@ -1,17 +1,38 @@
+import codecs
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import api_view
-from django.http import JsonResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.parsers import FormParser, MultiPartParser
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from reference.mixins import ConditionalListMixin
+from mailer.outbox import enqueue
+from mailer.serializers import OutgoingEmailSerializer
 from .models import Tax, Invoice, InvoiceItem, Logo
-from .serializers import TaxSerializer, InvoiceSerializer, InvoiceItemSerializer, LogoSerializer
+from .serializers import TaxSerializer, InvoiceSerializer, InvoiceItemSerializer, LogoSerializer, InvoiceDocumentSerializer, InvoiceEmailSerializer, InvoiceRecomputeSerializer
+from .pagination import InvoiceCursorPagination
+from .recompute import invoices_for_product, invoices_for_tax, recompute
+from .stats import get_invoice_stats
+from .reports import DIMENSIONS, DEFAULT_GROUP_BY, FINANCIAL_YEAR_PATTERN, STATUS_FILTERS, get_gst_summary
+from .formatting import format_invoice_number
+from .logo import current_logo
+from .importer import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, import_invoices, iter_csv, iter_jsonl
+from .export import CHUNK_SIZE, INVOICE_COLUMNS, ITEM_COLUMNS, iter_rows, stream_csv, stream_xlsx
+from .pdf import (
+    UnsupportedTextError, get_cache_dir, invoice_print_data, pdf_cache_key, pdf_filename, render_invoice_pdf, render_to_cache,
+)
 
 # Existing Views
-class TaxListCreateView(generics.ListCreateAPIView):
+class TaxListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
+    change_kind = 'taxes'
     queryset = Tax.objects.all()
     serializer_class = TaxSerializer
 
@@ -20,12 +41,55 @@ class TaxDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Tax.objects.all()
     serializer_class = TaxSerializer
 
-class InvoiceListCreateView(generics.ListCreateAPIView):
+INVOICE_STATUS_FILTERS = {
+    'final': {'is_saved_final': True},
+    'proforma': {'is_final': False},
+}
+INVOICE_FILTER_LOOKUPS = {
+    'branch': 'branch_address_id',
+    'client': 'client_id',
+    'financial_year': 'financial_year',
+    'year': 'invoice_date__year',
+    'month': 'invoice_date__month',
+    'date_from': 'invoice_date__gte',
+    'date_to': 'invoice_date__lte',
+    'amount_min': 'total_due__gte',
+    'amount_max': 'total_due__lte',
+}
+
+def filter_invoices(queryset, params, prefix=''):
+    """Apply the query-string filters; `prefix` points at the invoice from a related model (e.g. 'invoice__')."""
+    status_filter = INVOICE_STATUS_FILTERS.get(params.get('status'))
+    if status_filter:
+        queryset = queryset.filter(**{prefix + lookup: value for lookup, value in status_filter.items()})
+    filters = {prefix + lookup: params[param] for param, lookup in INVOICE_FILTER_LOOKUPS.items() if params.get(param)}
+    try:
+        return queryset.filter(**filters)
+    except (ValueError, ValidationError) as exc:
+        raise ParseError(f"Invalid filter value: {exc}")
+
+class InvoiceQuerysetMixin:
+    """
+    Joins the relations the invoice serializer reads and applies the list
+    filters: status, branch, client, financial_year, year/month and
+    date_from/date_to (invoice_date) and amount_min/amount_max (total_due).
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('client', 'branch_address', 'bank_account').prefetch_related('items')
+        if self.request.method != 'GET':
+            return queryset
+        return self.apply_invoice_filters(queryset)
+
+    def apply_invoice_filters(self, queryset, prefix=''):
+        return filter_invoices(queryset, self.request.query_params, prefix)
+
+class InvoiceListCreateView(InvoiceQuerysetMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
+    pagination_class = InvoiceCursorPagination
 
-class InvoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InvoiceDetailView(InvoiceQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [AllowAny]
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
@@ -35,21 +99,268 @@ class InvoiceItemListCreateView(generics.ListCreateAPIView):
     queryset = InvoiceItem.objects.all()
     serializer_class = InvoiceItemSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        # A JSON array of items is written in bulk with one totals recompute
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
 class InvoiceItemDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [AllowAny]
     queryset = InvoiceItem.objects.all()
     serializer_class = InvoiceItemSerializer
 
-class FinalInvoiceListCreateView(generics.ListCreateAPIView):
+class FinalInvoiceListCreateView(InvoiceQuerysetMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     queryset = Invoice.objects.filter(is_saved_final=True)
     serializer_class = InvoiceSerializer
+    pagination_class = InvoiceCursorPagination
 
-class FinalInvoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class FinalInvoiceDetailView(InvoiceQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [AllowAny]
     queryset = Invoice.objects.filter(is_saved_final=True)
     serializer_class = InvoiceSerializer
 
+class InvoiceDocumentView(InvoiceQuerysetMixin, generics.RetrieveAPIView):
+    """
+    Render-ready invoice for the print views: the invoice, client, branch
+    and bank come from one joined query, items from one more, plus the
+    logo and the amount in words.
+    """
+    permission_classes = [AllowAny]
+    queryset = Invoice.objects.all()
+    serializer_class = InvoiceDocumentSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['logo'] = current_logo()
+        return context
+
+class InvoiceStatsView(generics.GenericAPIView):
+    """
+    Dashboard aggregates (counts, totals and monthly/branch series grouped
+    by currency and finalisation status), optionally narrowed with
+    `financial_year` (e.g. 2025-2026) and `branch`.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        financial_year = request.query_params.get('financial_year') or None
+        branch = request.query_params.get('branch') or None
+        if financial_year and not FINANCIAL_YEAR_PATTERN.fullmatch(financial_year):
+            raise ParseError("financial_year must look like 2025-2026")
+        if branch and not branch.isdigit():
+            raise ParseError("branch must be an id")
+        return Response(get_invoice_stats(financial_year, branch))
+
+class GstSummaryView(generics.GenericAPIView):
+    """
+    GST summary for one `financial_year` (e.g. 2025-2026): invoice count,
+    taxable value and tax in INR, grouped by `group_by` (comma-separated
+    from branch_gstin, branch_state, client_state, tax_rate, month; defaults
+    to branch GSTIN, client state, rate and month). Rows grouped by client
+    state also carry the CGST/SGST/IGST split. Optional `branch`, and
+    `status` (final, proforma or all; final by default).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        financial_year = request.query_params.get('financial_year') or ''
+        match = FINANCIAL_YEAR_PATTERN.fullmatch(financial_year)
+        if not match or int(match.group(2)) != int(match.group(1)) + 1:
+            raise ParseError("financial_year must look like 2025-2026")
+        branch = request.query_params.get('branch') or None
+        if branch and not branch.isdigit():
+            raise ParseError("branch must be an id")
+        report_status = request.query_params.get('status') or 'final'
+        if report_status not in STATUS_FILTERS:
+            raise ParseError(f"status must be one of {', '.join(STATUS_FILTERS)}")
+        group_by = request.query_params.get('group_by')
+        group_by = tuple(name.strip() for name in group_by.split(',') if name.strip()) if group_by else DEFAULT_GROUP_BY
+        unknown = [name for name in group_by if name not in DIMENSIONS]
+        if unknown or not group_by or len(set(group_by)) != len(group_by):
+            raise ParseError(f"group_by must be distinct values from {', '.join(DIMENSIONS)}")
+        return Response(get_gst_summary(financial_year, branch, report_status, group_by))
+
+class InvoiceImportView(generics.GenericAPIView):
+    """
+    Bulk import from an uploaded `file`: JSON lines (one invoice payload with
+    `items` per line) or CSV (one row per item, rows grouped on `ref`).
+    `format` (jsonl/csv) defaults from the file extension; `batch_size`
+    sets how many invoices are committed per transaction. Rows that fail
+    validation or saving are reported with their line number (the first 100;
+    `errors_truncated` counts the rest).
+    """
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ParseError("Upload the invoices as `file`.")
+        file_format = request.data.get('format') or ('csv' if upload.name.lower().endswith('.csv') else 'jsonl')
+        if file_format not in ('csv', 'jsonl'):
+            raise ParseError("format must be jsonl or csv")
+        try:
+            batch_size = int(request.data.get('batch_size') or DEFAULT_BATCH_SIZE)
+        except ValueError:
+            raise ParseError("batch_size must be a number")
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ParseError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+
+        lines = codecs.iterdecode(upload, 'utf-8-sig')
+        documents = iter_csv(lines) if file_format == 'csv' else iter_jsonl(lines)
+        try:
+            result = import_invoices(documents, batch_size=batch_size)
+        except UnicodeDecodeError:
+            raise ParseError("The file must be UTF-8 encoded.")
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+
+class InvoiceExportView(InvoiceQuerysetMixin, generics.GenericAPIView):
+    """
+    Streams the filtered invoices (or, with `items=True`, their line items)
+    as CSV or XLSX, with client and branch columns joined in. Takes the list
+    filters plus `file_format` (csv/xlsx) and `chunk_size` (rows per query).
+    """
+    permission_classes = [AllowAny]
+    items = False
+    MAX_CHUNK_SIZE = 10000
+    CONTENT_TYPES = {
+        'csv': 'text/csv; charset=utf-8',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format') or 'csv'
+        if file_format not in self.CONTENT_TYPES:
+            raise ParseError("file_format must be csv or xlsx")
+        try:
+            chunk_size = int(request.query_params.get('chunk_size') or CHUNK_SIZE)
+        except ValueError:
+            raise ParseError("chunk_size must be a number")
+        if not 1 <= chunk_size <= self.MAX_CHUNK_SIZE:
+            raise ParseError(f"chunk_size must be between 1 and {self.MAX_CHUNK_SIZE}")
+
+        if self.items:
+            queryset = self.apply_invoice_filters(InvoiceItem.objects.all(), prefix='invoice__')
+            columns, name = ITEM_COLUMNS, 'invoice-items'
+        else:
+            queryset = self.apply_invoice_filters(Invoice.objects.all())
+            columns, name = INVOICE_COLUMNS, 'invoices'
+        # Evaluate the filters now so a bad value is a 400, not a broken stream.
+        try:
+            queryset.exists()
+        except (ValueError, ValidationError) as exc:
+            raise ParseError(f"Invalid filter value: {exc}")
+
+        headers = [title for title, _ in columns]
+        rows = iter_rows(queryset, columns, chunk_size=chunk_size)
+        if file_format == 'xlsx':
+            content = stream_xlsx(headers, rows, title='Invoice Items' if self.items else 'Invoices')
+        else:
+            content = stream_csv(headers, rows)
+        response = StreamingHttpResponse(content, content_type=self.CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{name}.{file_format}"'
+        return response
+
+class PDFRenderer(BaseRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+class InvoicePdfView(InvoiceQuerysetMixin, generics.RetrieveAPIView):
+    """
+    The invoice as a PDF. Finalised invoices are served from the on-disk
+    cache (rendered on first request); proformas are rendered every time.
+    The ETag is the hash of the print data, so unchanged copies get a 304.
+    Pass `download=1` to get it as an attachment. Invoices with text the PDF
+    fonts cannot draw get a 422.
+    """
+    permission_classes = [AllowAny]
+    queryset = Invoice.objects.all()
+    renderer_classes = [JSONRenderer, PDFRenderer]
+
+    def get(self, request, *args, **kwargs):
+        invoice = self.get_object()
+        data = invoice_print_data(invoice)
+        etag = f'"{pdf_cache_key(data)}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        as_attachment = request.query_params.get('download') in ('1', 'true')
+        try:
+            if invoice.is_saved_final:
+                path = render_to_cache(data, get_cache_dir())
+            else:
+                content = render_invoice_pdf(data)
+        except UnsupportedTextError as exc:
+            return JsonResponse({'detail': str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if invoice.is_saved_final:
+            response = FileResponse(
+                open(path, 'rb'), content_type='application/pdf', as_attachment=as_attachment, filename=pdf_filename(data)
+            )
+        else:
+            response = HttpResponse(content, content_type='application/pdf')
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f'{disposition}; filename="{pdf_filename(data)}"'
+        response['ETag'] = etag
+        return response
+
+class InvoiceEmailView(InvoiceQuerysetMixin, generics.GenericAPIView):
+    """
+    POST queues the invoice PDF for emailing to `to` and answers 202 right
+    away; the send_queued_mail worker renders and sends it. GET lists the
+    emails queued for the invoice with their delivery status.
+    """
+    permission_classes = [AllowAny]
+    queryset = Invoice.objects.all()
+    serializer_class = InvoiceEmailSerializer
+
+    def get(self, request, *args, **kwargs):
+        invoice = self.get_object()
+        return Response(OutgoingEmailSerializer(invoice.emails.order_by('-id'), many=True).data)
+
+    def post(self, request, *args, **kwargs):
+        invoice = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        number = format_invoice_number(
+            invoice.final_invoice_number or invoice.invoice_number, invoice.branch_address.proforma_prefix,
+        )
+        email = enqueue(
+            serializer.validated_data.get('subject') or f"Invoice {number}",
+            serializer.validated_data.get('message') or f"Please find attached invoice {number}.",
+            serializer.validated_data['to'],
+            kind='invoice',
+            invoice=invoice,
+        )
+        return Response(OutgoingEmailSerializer(email).data, status=status.HTTP_202_ACCEPTED)
+
+class InvoiceRecomputeView(generics.GenericAPIView):
+    """
+    POST {"tax": id} or {"product": id} applies that Tax's current rate or
+    Product's current price to the open invoices still using the old one,
+    with set-based UPDATEs in chunks (see invoice.recompute). Finalised
+    invoices are never changed. With "dry_run": true nothing is written and
+    the response lists each invoice's before/after totals.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = InvoiceRecomputeSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        tax, product = data.get('tax'), data.get('product')
+        invoices = invoices_for_tax(tax, data.get('previous_rate')) if tax else invoices_for_product(product)
+        return Response(recompute(invoices, tax, product, dry_run=data['dry_run']))
+
 # New View for Logo Upload, Retrieval, and Update
 class LogoUploadView(generics.CreateAPIView, generics.RetrieveAPIView, generics.UpdateAPIView):
     permission_classes = [AllowAny]
@@ -57,7 +368,7 @@ class LogoUploadView(generics.CreateAPIView, generics.RetrieveAPIView, generics.
     serializer_class = LogoSerializer
 
     def get(self, request, *args, **kwargs):
-        logo = self.get_queryset().last()
+        logo = current_logo()
         if logo:
             serializer = self.get_serializer(logo)
             return Response(serializer.data)
@@ -0,0 +1,74 @@
+"""
+Plumbing for the async read endpoints served in ASGI mode.
+
+The hot GET endpoints have native async implementations; every other
+method on the same URL still goes to the existing DRF view, which Django
+runs in its sync thread. Responses are rendered with DRF's JSONRenderer so
+both paths produce identical bodies.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+_renderer = JSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type='application/json')
+
+
+def async_read_view(async_get, sync_view):
+    """
+    One URL handler: GET/HEAD run `async_get(request, **kwargs)`, anything
+    else is passed to `sync_view`. Without ASYNC_READ_VIEWS the sync view
+    handles everything, as under WSGI an async view costs an extra event
+    loop per request.
+    """
+    if not settings.ASYNC_READ_VIEWS:
+        return sync_view
+    run_sync_view = sync_to_async(sync_view)
+
+    @wraps(async_get)
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await run_sync_view(request, *args, **kwargs)
+        try:
+            return await async_get(request, *args, **kwargs)
+        except ParseError as exc:
+            return json_response({'detail': str(exc.detail)}, status=400)
+        except Http404 as exc:
+            return json_response({'detail': str(exc) or 'Not found.'}, status=404)
+
+    # DRF views are csrf-exempt; keep that for the writes passed through.
+    view.csrf_exempt = True
+    return view
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can sit in an async middleware chain. The stock one is
+    sync-only, which makes Django run every view below it, async ones
+    included, in a worker thread under ASGI.
+    """
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
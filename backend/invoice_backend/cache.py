@@ -0,0 +1,116 @@
+"""
+Two-level cache: a per-process LocMemCache (L1) in front of the shared
+cache every worker sees (L2, another CACHES alias).
+
+Only keys starting with one of LOCAL_PREFIXES are kept in L1. Those must
+name content that never changes under the same key (payloads keyed by a
+version or generation, like the reference bundle or the dashboard
+stats), because another worker's write cannot evict this process's copy.
+Everything else (OTPs, the version and generation pointers) goes straight
+to L2, so all workers agree on it.
+
+L2 holds local-prefixed values together with their absolute expiry, so a
+copy taken into L1 after a miss expires no later than the L2 entry does.
+"""
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+
+
+class _Expiring:
+    """A local-prefixed value as stored in L2: the value and its expiry (a time.time(), None for never)."""
+    __slots__ = ('value', 'expires_at')
+
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.local = LocMemCache(
+            location or 'tiered-l1',
+            {'TIMEOUT': self.local_timeout, 'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 500)}},
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        if not self.is_local(key):
+            return self.shared.get(key, default, version)
+        value = self.local.get(key, _MISSING, version)
+        if value is _MISSING:
+            entry = self.shared.get(key, _MISSING, version)
+            if entry is _MISSING:
+                return default
+            if not isinstance(entry, _Expiring):
+                # Written before expiries were stored alongside; fall back to the L1 timeout.
+                entry = _Expiring(entry, None)
+            timeout = self.local_timeout
+            if entry.expires_at is not None:
+                remaining = entry.expires_at - time.time()
+                if remaining <= 0:
+                    return default
+                timeout = min(remaining, timeout)
+            value = entry.value
+            self.local.set(key, value, timeout, version)
+        return value
+
+    def _shared_value(self, key, value, timeout):
+        return _Expiring(value, self.get_backend_timeout(timeout)) if self.is_local(key) else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, self._shared_value(key, value, timeout), timeout, version)
+        if self.is_local(key):
+            self.local.set(key, value, self._local_timeout(timeout), version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # The shared value decides; L1 picks it up on the next get().
+        self.local.delete(key, version)
+        return self.shared.add(key, self._shared_value(key, value, timeout), timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.is_local(key):
+            return self.shared.touch(key, timeout, version)
+        # The stored expiry has to move with the entry's, so it is written again.
+        self.local.delete(key, version)
+        entry = self.shared.get(key, _MISSING, version)
+        if entry is _MISSING:
+            return False
+        value = entry.value if isinstance(entry, _Expiring) else entry
+        self.shared.set(key, self._shared_value(key, value, timeout), timeout, version)
+        return True
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version)
+        return self.shared.delete(key, version)
+
+    def has_key(self, key, version=None):
+        return (self.is_local(key) and self.local.has_key(key, version)) or self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
@@ -0,0 +1,169 @@
+"""
+A small asyncio HTTP/1.1 client and latency statistics (percentiles and
+histograms) for the benchmark and load-test commands. Standard library
+only, so it runs wherever the backend runs; each client keeps one
+keep-alive connection, like a browser tab talking to the API.
+"""
+import asyncio
+import json
+import math
+import ssl
+import time
+from urllib.parse import urlsplit
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpClient:
+    def __init__(self, base_url, headers=None, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, json_body=None, headers=None):
+        """(status, headers, body bytes); the connection is reopened once if the server dropped it."""
+        body = b'' if json_body is None else json.dumps(json_body).encode()
+        lines = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        if json_body is not None:
+            lines.append('Content-Type: application/json')
+        lines += [f'{name}: {value}' for name, value in {**self.headers, **(headers or {})}.items()]
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+        for attempt in (1, 2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout
+                )
+            try:
+                self.writer.write(payload)
+                await self.writer.drain()
+                return await asyncio.wait_for(self._read_response(method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, HttpError):
+                await self.close()
+                if fresh or attempt == 2:
+                    raise
+            except BaseException:
+                await self.close()
+                raise
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError("connection closed")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"bad status line {status_line!r}")
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one run."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered) + errors,
+        'errors': errors,
+        'rps': round((len(ordered) + errors) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(ordered, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+        'max_ms': round((ordered[-1] if ordered else 0) * 1000, 2),
+    }
+
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket is open.
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def histogram(latencies, bounds_ms=HISTOGRAM_BOUNDS_MS):
+    """[(bucket label, count)] for latencies in seconds."""
+    counts = [0] * (len(bounds_ms) + 1)
+    for latency in latencies:
+        ms = latency * 1000
+        index = next((n for n, bound in enumerate(bounds_ms) if ms <= bound), len(bounds_ms))
+        counts[index] += 1
+    labels = [f'<= {bound} ms' for bound in bounds_ms] + [f'> {bounds_ms[-1]} ms']
+    return list(zip(labels, counts))
+
+
+async def hammer(base_url, path, total, concurrency, headers=None, expect=(200,)):
+    """
+    Closed-loop load: `concurrency` clients issue GET `path` back to back
+    until `total` requests are done. Returns summarize() of the run.
+    """
+    remaining = total
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal remaining, errors
+        client = HttpClient(base_url, headers=headers)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    status, _, _ = await client.request('GET', path)
+                except (OSError, HttpError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    errors += 1
+                    continue
+                if status in expect:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
@@ -0,0 +1,133 @@
+"""
+Serving of uploaded media (logos, avatars and their variants).
+
+With MEDIA_SENDFILE set, Django only checks the request and hands the
+transfer to the front proxy: nginx via `X-Accel-Redirect` to an internal
+location, Apache/lighttpd via `X-Sendfile`. Otherwise the file is sent with
+a FileResponse, which gunicorn passes to sendfile(2); `Range`, `ETag` and
+`If-Modified-Since`/`If-None-Match` are honoured either way.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)$')
+# Content-hashed variant names never change meaning (see invoice.images).
+IMMUTABLE_PREFIXES = ('variants/',)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class _FileRange:
+    """Read-only view of bytes [start, start + length) of an open file."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range; None to send the whole file; ValueError if unsatisfiable."""
+    match = RANGE_PATTERN.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: ignoring the header is allowed.
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def _cache_control(path):
+    if path.startswith(IMMUTABLE_PREFIXES):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _offload(path, full_path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'nginx':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Not found")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Not found")
+
+    size = stat.st_size
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{size:x}')
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        if settings.MEDIA_SENDFILE:
+            # The proxy applies Range itself, so it always gets the whole file.
+            response = _offload(path, full_path, content_type)
+        else:
+            response = _file_response(request, full_path, size, etag, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = _cache_control(path)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _file_response(request, full_path, size, etag, content_type):
+    byte_range = None
+    range_header = request.headers.get('Range')
+    # If-Range: only honour the range while the client's copy is current.
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    response = FileResponse(_FileRange(open(full_path, 'rb'), start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,175 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware measures, for every request, the wall time, the SQL
+queries run (count and total time, through an execute wrapper on the
+database connection) and the time spent rendering the response body, and
+reports them in a `Server-Timing` header, which browsers show in the
+network panel. Requests slower than PERF_SLOW_REQUEST_MS and queries
+slower than PERF_SLOW_QUERY_MS are logged to `invoice_backend.performance`.
+
+With PERF_PROFILE_SAMPLE_RATE above zero, that fraction of (sync) requests
+runs under cProfile, and the profile of any sampled request that turns out
+slow is written to PERF_PROFILE_DIR for `python -m pstats` or snakeviz.
+Unsampled requests only pay for a few perf_counter() calls.
+"""
+import cProfile
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('invoice_backend.performance')
+
+# The metrics of the request being handled. A context variable rather than
+# a thread-local, so queries the async views run through sync_to_async are
+# still counted against their request.
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('request', 'queries', 'sql_time', 'render_time')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.sql_time += elapsed
+        if elapsed * 1000 >= settings.PERF_SLOW_QUERY_MS:
+            logger.warning(
+                "Slow query (%.1f ms) during %s %s: %s",
+                elapsed * 1000, metrics.request.method, metrics.request.path, sql[:2000],
+            )
+
+
+def install_query_timer(connection, **kwargs):
+    # Kept on the connection for its whole life; it does nothing outside a request.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '-'
+    return match.view_name or match.route
+
+
+class PerformanceMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed connection_created.
+        install_query_timer(connection)
+        metrics = RequestMetrics(request)
+        token = _current.set(metrics)
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            _current.reset(token)
+        self._finish(request, response, metrics, total, profiler)
+        return response
+
+    async def __acall__(self, request):
+        # cProfile only sees the event-loop thread, so async requests are never profiled.
+        metrics = RequestMetrics(request)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            total = time.perf_counter() - started
+            _current.reset(token)
+        self._finish(request, response, metrics, total, None)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time that rendering.
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _start_profiler(self):
+        rate = settings.PERF_PROFILE_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process.
+            return None
+        return profiler
+
+    def _finish(self, request, response, metrics, total, profiler):
+        total_ms = total * 1000
+        sql_ms = metrics.sql_time * 1000
+        render_ms = metrics.render_time * 1000
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={sql_ms:.1f};desc="{metrics.queries} queries", '
+                f'render;dur={render_ms:.1f}, '
+                f'app;dur={max(total_ms - sql_ms - render_ms, 0):.1f}, '
+                f'total;dur={total_ms:.1f}'
+            )
+        if total_ms < settings.PERF_SLOW_REQUEST_MS:
+            return
+        name = view_name(request)
+        logger.warning(
+            "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, render %.0f ms, status %s",
+            request.method, request.get_full_path(), name, total_ms, metrics.queries, sql_ms, render_ms,
+            response.status_code,
+        )
+        if profiler is not None:
+            self._dump(profiler, request, name, total_ms)
+
+    def _dump(self, profiler, request, name, total_ms):
+        os.makedirs(settings.PERF_PROFILE_DIR, exist_ok=True)
+        safe_name = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in name)
+        path = os.path.join(
+            settings.PERF_PROFILE_DIR,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{safe_name}-{total_ms:.0f}ms.prof',
+        )
+        profiler.dump_stats(path)
+        logger.warning("Profile of slow request written to %s", path)
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders', 
     'drf_yasg',
     'authapp',
@@ -48,11 +49,15 @@ INSTALLED_APPS = [
     'clients',
     'invoice',
     'branch',
+    'search',
+    'reference',
+    'mailer',
 ]
 
 MIDDLEWARE = [
+    'invoice_backend.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'invoice_backend.async_support.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,6 +110,18 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite runs against a local file with no database server, for
+# the benchmark suite (`manage.py run_benchmarks`) and quick local checks.
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts, so concurrent
+        # writers queue for it instead of failing with "database is locked"
+        # when a read lock cannot be upgraded.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+    }
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.mysql',
@@ -117,6 +134,36 @@ DATABASES = {
 # }
 
 
+# Cache shared by every gunicorn worker (OTP and verification state must
+# be, or a check lands on a worker that never saw the code). CACHE_BACKEND:
+#   db     - a table in the main database, shared across hosts (created
+#            by `createcachetable`, see entrypoint.sh)
+#   file   - files under CACHE_LOCATION, shared by the workers of one host
+#   locmem - per process; only correct with a single worker
+# The default alias adds a per-process L1 for version-keyed payloads (see
+# invoice_backend.cache); `manage.py bench_cache` measures the hit latency.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'db')
+SHARED_CACHE_BACKENDS = {
+    'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'},
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+    },
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'invoice_backend.cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_PREFIXES': ['reference_bundle:', 'list:', 'invoice_stats:', 'gst_summary:'],
+            'LOCAL_TIMEOUT': int(os.getenv('CACHE_LOCAL_TIMEOUT', '300')),
+            'LOCAL_MAX_ENTRIES': 500,
+        },
+    },
+    'shared': {**SHARED_CACHE_BACKENDS[CACHE_BACKEND], 'OPTIONS': {'MAX_ENTRIES': 10000}},
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -158,6 +205,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Let the front proxy send media files: 'nginx' (X-Accel-Redirect to the
+# internal location below, aliased to MEDIA_ROOT) or 'sendfile' (X-Sendfile).
+# Empty: Django streams them itself.
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Browser cache lifetime (seconds) for uploads; content-hashed variants are cached for a year
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '3600'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -170,7 +224,7 @@ AUTH_USER_MODEL = 'authapp.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authapp.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -186,17 +240,63 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Revoked token ids and authenticated users are kept in memory per process
+# (authapp.authentication); other workers' logouts and user changes are
+# picked up every AUTH_STATE_SYNC_INTERVAL seconds
+AUTH_STATE_SYNC_INTERVAL = int(os.getenv('AUTH_STATE_SYNC_INTERVAL', '5'))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
 # CORS settings (for frontend-backend communication)
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS').split(',')
 # CORS_ALLOWED_ORIGINS = ["http://localhost:5176"]
 
 CORS_ALLOW_CREDENTIALS = True
 
+# SERVER_MODE=asgi runs uvicorn workers (see entrypoint.sh) and serves the hot
+# GET endpoints (invoice lists/details, stats, reference bundle) from async views
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', str(SERVER_MODE == 'asgi')) == 'True'
+
+# Dashboard statistics cache lifetime (seconds)
+INVOICE_STATS_CACHE_TIMEOUT = int(os.getenv('INVOICE_STATS_CACHE_TIMEOUT', '60'))
+
+# Rendered PDFs of finalised invoices, keyed by a hash of their print data
+INVOICE_PDF_CACHE_DIR = os.getenv('INVOICE_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'pdf_cache'))
+
 # Email settings 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
\ No newline at end of file
+DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
+
+# Email outbox (mailer app): the send_queued_mail worker claims this many
+# messages per batch and retries temporary failures after MAIL_RETRY_DELAY
+# seconds, doubling up to MAIL_RETRY_MAX_DELAY, for at most MAIL_MAX_ATTEMPTS
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', '50'))
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', '6'))
+MAIL_RETRY_DELAY = int(os.getenv('MAIL_RETRY_DELAY', '60'))
+MAIL_RETRY_MAX_DELAY = int(os.getenv('MAIL_RETRY_MAX_DELAY', '3600'))
+
+# Request instrumentation (invoice_backend.performance): a Server-Timing header
+# on every response, warnings for slow requests and queries, and cProfile
+# dumps of slow requests from a sampled fraction of traffic
+PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', 'True') == 'True'
+PERF_SLOW_REQUEST_MS = float(os.getenv('PERF_SLOW_REQUEST_MS', '500'))
+PERF_SLOW_QUERY_MS = float(os.getenv('PERF_SLOW_QUERY_MS', '100'))
+PERF_PROFILE_SAMPLE_RATE = float(os.getenv('PERF_PROFILE_SAMPLE_RATE', '0'))
+PERF_PROFILE_DIR = os.getenv('PERF_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'invoice_backend.performance': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
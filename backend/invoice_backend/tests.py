@@ -0,0 +1,179 @@
+import os
+import pstats
+import re
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from .cache import TieredCache
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name, MEDIA_SENDFILE='')
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media.name, 'logos'))
+        os.makedirs(os.path.join(media.name, 'variants'))
+        self.content = bytes(range(256)) * 40
+        for name in ('logos/logo.png', 'variants/abc.webp'):
+            with open(os.path.join(media.name, name), 'wb') as file:
+                file.write(self.content)
+
+    def get(self, path, **headers):
+        response = self.client.get(f'/media/{path}', headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_serves_file_with_validators(self):
+        response, body = self.get('logos/logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertIn('ETag', response)
+
+        self.assertEqual(self.get('logos/logo.png', if_none_match=response['ETag'])[0].status_code, 304)
+        self.assertEqual(self.get('logos/logo.png', if_modified_since=response['Last-Modified'])[0].status_code, 304)
+        self.assertEqual(self.get('logos/logo.png', if_modified_since=http_date(0))[0].status_code, 200)
+
+    def test_variants_are_immutable(self):
+        response, _ = self.get('variants/abc.webp')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_ranges(self):
+        response, body = self.get('logos/logo.png', range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+
+        response, body = self.get('logos/logo.png', range='bytes=-10')
+        self.assertEqual(body, self.content[-10:])
+        response, body = self.get('logos/logo.png', range='bytes=10000-')
+        self.assertEqual(body, self.content[10000:])
+
+        response, _ = self.get('logos/logo.png', range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        # A stale If-Range gets the whole file
+        response, body = self.get('logos/logo.png', range='bytes=0-9', if_range='"old"')
+        self.assertEqual((response.status_code, len(body)), (200, len(self.content)))
+
+    def test_missing_and_outside_paths_are_404(self):
+        self.assertEqual(self.get('logos/missing.png')[0].status_code, 404)
+        self.assertEqual(self.get('logos')[0].status_code, 404)
+        self.assertEqual(self.get('../settings.py')[0].status_code, 404)
+        self.assertEqual(self.client.post('/media/logos/logo.png').status_code, 405)
+
+    def test_offloads_to_proxy(self):
+        with override_settings(MEDIA_SENDFILE='nginx'):
+            response, body = self.get('logos/logo.png', range='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/logos/logo.png')
+        self.assertEqual(body, b'')
+        with override_settings(MEDIA_SENDFILE='sendfile'):
+            response, _ = self.get('logos/logo.png')
+        self.assertTrue(response['X-Sendfile'].endswith(os.path.join('logos', 'logo.png')))
+
+
+class TieredCacheTests(TestCase):
+    """Two TieredCache instances over the test database's cache table stand in for two workers."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.worker_a = TieredCache('a', settings.CACHES['default'])
+        self.worker_b = TieredCache('b', settings.CACHES['default'])
+
+    def test_shared_keys_are_seen_by_every_worker(self):
+        self.worker_a.set('otp_ann@example.com', '123456', 300)
+        self.assertEqual(self.worker_b.get('otp_ann@example.com'), '123456')
+        self.worker_b.delete('otp_ann@example.com')
+        self.assertIsNone(self.worker_a.get('otp_ann@example.com'))
+        self.assertFalse(self.worker_a.local.has_key('otp_ann@example.com'))
+
+    def test_versioned_keys_are_served_from_the_local_copy(self):
+        self.worker_a.set('reference_bundle:7:testserver', {'version': 7}, 300)
+        self.assertEqual(self.worker_b.get('reference_bundle:7:testserver'), {'version': 7})
+        caches['shared'].delete('reference_bundle:7:testserver')
+        self.assertEqual(self.worker_b.get('reference_bundle:7:testserver'), {'version': 7})
+        self.assertIsNone(self.worker_b.get('reference_bundle:8:testserver'))
+
+    def test_local_copy_expires_with_the_shared_entry(self):
+        # 10s left of the shared entry, well under LOCAL_TIMEOUT: worker b's copy must not outlive it.
+        self.worker_a.set('invoice_stats:3:all:all', {'count': 1}, 10)
+        now = time.time()
+        with mock.patch('time.time', return_value=now + 5):
+            self.assertEqual(self.worker_b.get('invoice_stats:3:all:all'), {'count': 1})
+        with mock.patch('time.time', return_value=now + 11):
+            self.assertFalse(self.worker_b.local.has_key('invoice_stats:3:all:all'))
+            self.assertIsNone(self.worker_b.get('invoice_stats:3:all:all'))
+        self.worker_a.set('invoice_stats:4:all:all', {'count': 2}, 0)
+        self.assertIsNone(self.worker_b.get('invoice_stats:4:all:all'))
+        self.assertFalse(self.worker_b.local.has_key('invoice_stats:4:all:all'))
+
+    def test_counters_live_in_the_shared_cache(self):
+        self.worker_a.set('invoice_stats_generation', 1, None)
+        self.worker_b.incr('invoice_stats_generation')
+        self.assertEqual(self.worker_a.get('invoice_stats_generation'), 2)
+
+    def test_password_reset_flow_across_workers(self):
+        get_user_model().objects.create_user(username='ann', email='ann@example.com', password='old-password')
+        self.client.post(reverse('forgot_password'), {'email': 'ann@example.com'}, content_type='application/json')
+        otp = self.worker_b.get('otp_ann@example.com')
+        self.assertEqual(len(otp), 6)
+        self.assertFalse(caches['default'].local.has_key('otp_ann@example.com'))
+        response = self.client.post(reverse('otp_verification'), {'email': 'ann@example.com', 'otp': otp}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.worker_a.get('verified_ann@example.com'))
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def test_server_timing_reports_queries(self):
+        response = self.client.get('/api/invoices/taxes/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        match = re.fullmatch(
+            r'db;dur=[\d.]+;desc="(\d+) queries", render;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+', timing
+        )
+        self.assertIsNotNone(match, timing)
+        self.assertGreaterEqual(int(match.group(1)), 1)
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_header_can_be_turned_off(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/invoices/taxes/'))
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0, PERF_SLOW_QUERY_MS=0)
+    def test_slow_requests_and_queries_are_logged(self):
+        with self.assertLogs('invoice_backend.performance', 'WARNING') as logs:
+            self.client.get('/api/invoices/taxes/')
+        self.assertTrue(any('Slow query' in line and 'SELECT' in line for line in logs.output))
+        self.assertTrue(any('Slow request GET /api/invoices/taxes/ (tax-list-create)' in line for line in logs.output))
+
+    def test_sampled_slow_requests_dump_a_profile(self):
+        profiles = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles.cleanup)
+        with override_settings(PERF_PROFILE_SAMPLE_RATE=1, PERF_SLOW_REQUEST_MS=0, PERF_PROFILE_DIR=profiles.name):
+            with self.assertLogs('invoice_backend.performance', 'WARNING'):
+                self.client.get('/api/invoices/taxes/')
+        [name] = os.listdir(profiles.name)
+        self.assertIn('GET-tax-list-create', name)
+        self.assertGreater(pstats.Stats(os.path.join(profiles.name, name)).total_calls, 0)
+
+    def test_fast_requests_are_not_profiled_to_disk(self):
+        profiles = tempfile.TemporaryDirectory()
+        self.addCleanup(profiles.cleanup)
+        with override_settings(PERF_PROFILE_SAMPLE_RATE=1, PERF_SLOW_REQUEST_MS=60000, PERF_PROFILE_DIR=profiles.name):
+            self.client.get('/api/invoices/taxes/')
+        self.assertEqual(os.listdir(profiles.name), [])
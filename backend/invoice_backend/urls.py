@@ -1,7 +1,9 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,6 +14,9 @@ urlpatterns = [
     path('api/clients/', include('clients.urls')),
     path('api/branch/', include('branch.urls')),
     path('api/invoices/', include('invoice.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/reference-bundle/', include('reference.urls')),
     path('documentation/', include('documentation.urls')), 
     
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', serve_media, name='media'),
+]
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "kind", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "kind", "created_at")
+    search_fields = ("subject",)
+    ordering = ("-created_at",)
+    readonly_fields = ("created_at", "sent_at", "send_before", "attempts", "last_error")
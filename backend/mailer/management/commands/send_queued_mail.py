@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from mailer.outbox import deliver_due, purge_finished
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver the email outbox: send due messages in batches over one SMTP connection, "
+        "retrying temporary failures with backoff. Runs until stopped unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send what is due now and exit.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait when nothing is due.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Messages claimed per batch (default: MAIL_BATCH_SIZE).")
+        parser.add_argument('--keep-days', type=int, default=30, help="Delete sent and failed messages older than this many days.")
+
+    def handle(self, *args, **options):
+        while True:
+            # A long-running worker must not hold on to a connection the database has dropped.
+            close_old_connections()
+            sent, failed = deliver_due(options['batch_size'])
+            purged = purge_finished(timedelta(days=options['keep_days']))
+            if sent or failed or purged:
+                self.stdout.write(f"Sent {sent}, failed {failed}, purged {purged} old message(s).")
+            if options['once']:
+                return
+            if not sent and not failed:
+                time.sleep(options['interval'])
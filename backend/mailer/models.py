@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """
+    One queued email. Requests only insert rows; the send_queued_mail
+    worker delivers them. `next_attempt_at` is when the row is next due:
+    the retry time after a failure, or the end of a worker's lease while
+    it is being sent, so a crashed worker's batch is picked up again.
+    A message still unsent at `send_before` fails instead of going out late.
+    """
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (SENDING, 'Sending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    KIND_CHOICES = [('otp', 'Password reset OTP'), ('invoice', 'Invoice'), ('other', 'Other')]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    # kind 'invoice' is sent with this invoice's PDF attached, rendered by the worker
+    invoice = models.ForeignKey('invoice.Invoice', on_delete=models.SET_NULL, blank=True, null=True, related_name='emails')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    send_before = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='mailer_due_idx')]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,172 @@
+"""
+Database-backed outbox for outgoing email.
+
+Request handlers call `enqueue()`, which is a single INSERT. The
+send_queued_mail worker claims due messages in batches and sends a whole
+batch over one SMTP connection from `get_connection()`. A message that
+fails with a temporary error is retried with exponential backoff
+(MAIL_RETRY_DELAY, doubling, capped at MAIL_RETRY_MAX_DELAY) until
+MAIL_MAX_ATTEMPTS; permanent errors (5xx replies, refused recipients,
+a deleted invoice) fail it straight away, as does passing its
+`send_before` deadline. Messages of a REDACTED_KINDS kind (OTPs) have
+their body cleared once they are sent or have failed.
+"""
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+# How long a worker owns a claimed batch before another worker may take it over.
+CLAIM_LEASE = timedelta(minutes=10)
+
+# Bodies of these kinds hold secrets; they are only kept while the message may still go out.
+REDACTED_KINDS = {'otp'}
+REDACTED_BODY = '[redacted]'
+
+
+class PermanentError(Exception):
+    """The message can never be delivered as it stands; don't retry it."""
+
+
+def enqueue(subject, body, to, from_email=None, kind='other', invoice=None, send_within=None):
+    """Queue a message; with the timedelta `send_within` it fails rather than being sent after that."""
+    if isinstance(to, str):
+        to = [to]
+    return OutgoingEmail.objects.create(
+        kind=kind, subject=subject, body=body, to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '', invoice=invoice,
+        send_before=timezone.now() + send_within if send_within is not None else None,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.MAIL_RETRY_DELAY * 2 ** (attempts - 1), settings.MAIL_RETRY_MAX_DELAY))
+
+
+def claim_batch(limit):
+    """Lease up to `limit` due messages to this worker, oldest due first."""
+    now = timezone.now()
+    lease_until = now + CLAIM_LEASE
+    with transaction.atomic():
+        due = OutgoingEmail.objects.filter(status__in=[OutgoingEmail.QUEUED, OutgoingEmail.SENDING], next_attempt_at__lte=now)
+        if db_connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers skip each other's rows instead of waiting on them.
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+        # The due condition is repeated so rows another worker leased meanwhile are not taken twice.
+        OutgoingEmail.objects.filter(id__in=ids, next_attempt_at__lte=now).update(
+            status=OutgoingEmail.SENDING, next_attempt_at=lease_until
+        )
+    return list(
+        OutgoingEmail.objects.filter(id__in=ids, status=OutgoingEmail.SENDING, next_attempt_at=lease_until)
+        .select_related('invoice__client', 'invoice__branch_address', 'invoice__bank_account')
+        .order_by('id')
+    )
+
+
+def build_message(outgoing, connection):
+    message = EmailMessage(
+        outgoing.subject, outgoing.body, outgoing.from_email or None, outgoing.to, connection=connection
+    )
+    if outgoing.kind == 'invoice':
+        if outgoing.invoice is None:
+            raise PermanentError("The invoice was deleted before the email was sent.")
+        # Imported here: the PDF renderer is only needed by the worker.
+        from invoice.pdf import (
+            UnsupportedTextError, get_cache_dir, invoice_print_data, pdf_filename, render_invoice_pdf, render_to_cache,
+        )
+
+        data = invoice_print_data(outgoing.invoice)
+        try:
+            if outgoing.invoice.is_saved_final:
+                with open(render_to_cache(data, get_cache_dir()), 'rb') as pdf:
+                    content = pdf.read()
+            else:
+                content = render_invoice_pdf(data)
+        except UnsupportedTextError as exc:
+            # Retrying cannot help until the invoice text changes.
+            raise PermanentError(str(exc))
+        message.attach(pdf_filename(data), content, 'application/pdf')
+    return message
+
+
+def _is_permanent(exc):
+    if isinstance(exc, (PermanentError, smtplib.SMTPRecipientsRefused)):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def send_batch(messages, connection=None):
+    """
+    Send claimed messages over one connection; returns (sent, failed)
+    counts. A connection passed in is left open for the caller to reuse.
+    """
+    owns_connection = connection is None
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        for outgoing in messages:
+            outgoing.attempts += 1
+            try:
+                if outgoing.send_before is not None and timezone.now() >= outgoing.send_before:
+                    raise PermanentError("Not sent before its deadline.")
+                # Reopens after a dropped connection; a no-op while it is open.
+                connection.open()
+                connection.send_messages([build_message(outgoing, connection)])
+            except Exception as exc:
+                if isinstance(exc, (smtplib.SMTPException, OSError)):
+                    # The session may be unusable; start a fresh one for the next message.
+                    connection.close()
+                outgoing.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                next_attempt_at = timezone.now() + retry_delay(outgoing.attempts)
+                if (
+                    _is_permanent(exc) or outgoing.attempts >= settings.MAIL_MAX_ATTEMPTS
+                    or (outgoing.send_before is not None and next_attempt_at >= outgoing.send_before)
+                ):
+                    outgoing.status = OutgoingEmail.FAILED
+                    failed += 1
+                else:
+                    outgoing.status = OutgoingEmail.QUEUED
+                    outgoing.next_attempt_at = next_attempt_at
+            else:
+                outgoing.status = OutgoingEmail.SENT
+                outgoing.sent_at = timezone.now()
+                outgoing.last_error = ''
+                sent += 1
+            if outgoing.kind in REDACTED_KINDS and outgoing.status in (OutgoingEmail.SENT, OutgoingEmail.FAILED):
+                outgoing.body = REDACTED_BODY
+            outgoing.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body'])
+    finally:
+        if owns_connection:
+            connection.close()
+    return sent, failed
+
+
+def deliver_due(batch_size=None):
+    """Send every message that is due, one batch at a time; returns (sent, failed) counts."""
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                return sent, failed
+            batch_sent, batch_failed = send_batch(batch, connection)
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        connection.close()
+
+
+def purge_finished(older_than):
+    """Delete sent and failed messages older than the timedelta `older_than`; returns the count."""
+    cutoff = timezone.now() - older_than
+    finished = Q(status=OutgoingEmail.SENT, sent_at__lt=cutoff) | Q(status=OutgoingEmail.FAILED, created_at__lt=cutoff)
+    return OutgoingEmail.objects.filter(finished).delete()[0]
@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import OutgoingEmail
+
+
+class OutgoingEmailSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutgoingEmail
+        fields = ['id', 'kind', 'to', 'subject', 'status', 'attempts', 'last_error', 'next_attempt_at', 'created_at', 'sent_at']
@@ -0,0 +1,210 @@
+import socketserver
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from invoice.tests import InvoiceFixtureMixin
+from .models import OutgoingEmail
+from .outbox import REDACTED_BODY, claim_batch, deliver_due, enqueue
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: replies to DATA are taken from server.data_replies, else 250."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 localhost stand-in')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250-localhost\r\n250 8BITMIME')
+            elif command == b'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                while (line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    lines.append(line)
+                reply = server.data_replies.pop(0) if server.data_replies else '250 queued'
+                if reply.startswith('250'):
+                    server.messages.append(b''.join(lines))
+                self.reply(reply)
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SmtpHandler)
+        self.connections = 0
+        self.messages = []
+        self.data_replies = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def settings(self):
+        return override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server_address[1], EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+
+
+class OutboxTests(InvoiceFixtureMixin, TestCase):
+    def test_forgot_password_only_enqueues(self):
+        get_user_model().objects.create_user(username='ann', email='ann@example.com', password='x')
+        response = self.client.post(reverse('forgot_password'), {'email': 'ann@example.com'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual((queued.kind, queued.to, queued.status), ('otp', ['ann@example.com'], OutgoingEmail.QUEUED))
+
+        self.assertEqual(deliver_due(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['ann@example.com'])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (OutgoingEmail.SENT, 1))
+        self.assertIsNotNone(queued.sent_at)
+        self.assertEqual(queued.body, REDACTED_BODY)
+        self.assertLessEqual(queued.send_before, queued.created_at + timedelta(seconds=300))
+
+    def test_otp_past_its_deadline_fails_unsent(self):
+        email = enqueue("OTP", "Your OTP is 123456", "a@example.com", kind='otp', send_within=timedelta(seconds=300))
+        OutgoingEmail.objects.filter(pk=email.pk).update(send_before=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(deliver_due(), (0, 1))
+        self.assertEqual(mail.outbox, [])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.body), (OutgoingEmail.FAILED, REDACTED_BODY))
+        self.assertIn("deadline", email.last_error)
+
+    def test_no_retry_is_scheduled_past_the_deadline(self):
+        email = enqueue("OTP", "Your OTP is 123456", "a@example.com", kind='otp', send_within=timedelta(seconds=30))
+        with SmtpStandIn() as smtp, smtp.settings():
+            smtp.data_replies = ['451 try again later']
+            self.assertEqual(deliver_due(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.body), (OutgoingEmail.FAILED, 1, REDACTED_BODY))
+
+    def test_worker_purges_old_sent_and_failed_messages(self):
+        old = timezone.now() - timedelta(days=31)
+        sent = enqueue("Sent", "Body", "a@example.com")
+        failed = enqueue("Failed", "Body", "a@example.com")
+        recent = enqueue("Recent", "Body", "a@example.com")
+        waiting = enqueue("Waiting", "Body", "a@example.com")
+        OutgoingEmail.objects.filter(pk=sent.pk).update(status=OutgoingEmail.SENT, sent_at=old, created_at=old)
+        OutgoingEmail.objects.filter(pk=failed.pk).update(status=OutgoingEmail.FAILED, created_at=old)
+        OutgoingEmail.objects.filter(pk=recent.pk).update(status=OutgoingEmail.FAILED)
+        OutgoingEmail.objects.filter(pk=waiting.pk).update(created_at=old, next_attempt_at=timezone.now() + timedelta(hours=1))
+        out = StringIO()
+        call_command('send_queued_mail', '--once', stdout=out)
+        self.assertIn("purged 2", out.getvalue())
+        self.assertEqual(set(OutgoingEmail.objects.values_list('pk', flat=True)), {recent.pk, waiting.pk})
+
+    def test_batch_is_sent_over_one_smtp_connection(self):
+        for n in range(7):
+            enqueue(f"Hello {n}", "Body", f"user{n}@example.com")
+        with SmtpStandIn() as smtp, smtp.settings():
+            self.assertEqual(deliver_due(batch_size=3), (7, 0))
+        self.assertEqual(smtp.connections, 1)
+        self.assertEqual(len(smtp.messages), 7)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists())
+
+    def test_temporary_failure_is_retried_with_backoff(self):
+        first = enqueue("First", "Body", "a@example.com")
+        second = enqueue("Second", "Body", "b@example.com")
+        with SmtpStandIn() as smtp, smtp.settings():
+            smtp.data_replies = ['451 try again later']
+            before = timezone.now()
+            self.assertEqual(deliver_due(), (1, 0))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (OutgoingEmail.QUEUED, 1))
+        self.assertIn('451', first.last_error)
+        self.assertGreaterEqual(first.next_attempt_at, before + timedelta(seconds=60))
+        self.assertEqual(second.status, OutgoingEmail.SENT)
+        # Not due yet, so a second run leaves it alone.
+        self.assertEqual(deliver_due(), (0, 0))
+
+        with override_settings(MAIL_MAX_ATTEMPTS=2):
+            OutgoingEmail.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+            with SmtpStandIn() as smtp, smtp.settings():
+                smtp.data_replies = ['451 still busy']
+                self.assertEqual(deliver_due(), (0, 1))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (OutgoingEmail.FAILED, 2))
+
+    def test_permanent_failure_is_not_retried(self):
+        email = enqueue("Hello", "Body", "nobody@example.com")
+        with SmtpStandIn() as smtp, smtp.settings():
+            smtp.data_replies = ['550 mailbox unavailable']
+            self.assertEqual(deliver_due(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.FAILED, 1))
+
+    def test_unreachable_server_keeps_message_queued(self):
+        email = enqueue("Hello", "Body", "a@example.com")
+        with SmtpStandIn() as smtp:
+            port = smtp.server_address[1]
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+                               EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=2):
+            self.assertEqual(deliver_due(), (0, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.QUEUED, 1))
+
+    def test_expired_lease_is_claimed_again(self):
+        email = enqueue("Hello", "Body", "a@example.com")
+        self.assertEqual([e.pk for e in claim_batch(10)], [email.pk])
+        self.assertEqual(claim_batch(10), [])
+        OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual([e.pk for e in claim_batch(10)], [email.pk])
+
+    def test_invoice_email_is_queued_then_sent_with_pdf(self):
+        invoice = self.make_invoice()
+        invoice.add_items(self.items_data(2))
+        url = reverse('invoice-email', args=[invoice.pk])
+        response = self.client.post(url, {'to': ['billing@acme.test']}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(self.client.post(url, {'to': ['not-an-email']}, content_type='application/json').status_code, 400)
+
+        out = StringIO()
+        call_command('send_queued_mail', '--once', stdout=out)
+        self.assertIn("Sent 1", out.getvalue())
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['billing@acme.test'])
+        filename, content, mimetype = message.attachments[0]
+        self.assertTrue(filename.endswith('.pdf'))
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(self.client.get(url).json()[0]['status'], 'sent')
+
+    def test_deleted_invoice_fails_without_retry(self):
+        invoice = self.make_invoice()
+        email = enqueue("Invoice", "Body", "a@example.com", kind='invoice', invoice=invoice)
+        invoice.delete()
+        self.assertEqual(deliver_due(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
@@ -4,20 +4,20 @@ from rest_framework import status
 from .models import Product
 from .serializers import ProductSerializer
 from rest_framework.permissions import AllowAny
+from reference.mixins import ConditionalListMixin
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class ProductListCreateView(APIView):
+class ProductListCreateView(ConditionalListMixin, APIView):
     permission_classes = [AllowAny]
+    change_kind = 'products'
 
     @swagger_auto_schema(responses={200: ProductSerializer(many=True)})
     def get(self, request, *args, **kwargs):
         """
         Retrieve a list of all products.
         """
-        products = Product.objects.all()
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(request, lambda: ProductSerializer(Product.objects.all(), many=True).data)
 
     @swagger_auto_schema(request_body=ProductSerializer, responses={201: ProductSerializer})
     def post(self, request, *args, **kwargs):
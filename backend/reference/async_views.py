@@ -0,0 +1,34 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from rest_framework.exceptions import ParseError
+
+from invoice_backend.async_support import json_response
+from .bundle import delta_bundle, full_bundle, full_bundle_key
+from .mixins import is_not_modified
+from .models import ReferenceChange
+
+
+async def reference_bundle(request):
+    """Async counterpart of ReferenceBundleView: a version lookup and a cache read on the common path."""
+    since = request.GET.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            raise ParseError("since must be a version number")
+
+    version = (await ReferenceChange.alatest())[0]
+    etag = f'"{version}"'
+    if is_not_modified(request, etag):
+        response = json_response(None, status=304)
+    elif since is None or since > version:
+        data = await cache.aget(full_bundle_key(version, request))
+        if data is None:
+            data = await sync_to_async(full_bundle)(version, request)
+        response = json_response(data)
+    else:
+        response = json_response(await sync_to_async(delta_bundle)(since, version, request))
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
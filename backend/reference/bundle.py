@@ -0,0 +1,83 @@
+from django.apps import apps
+from django.core.cache import cache
+
+from bank.serializers import BankAccountSerializer
+from branch.serializers import BranchSerializer
+from clients.serializers import ClientSerializer
+from invoice.serializers import LogoSerializer, TaxSerializer
+from product.serializers import ProductSerializer
+from services.serializers import ServiceSerializer
+from .models import ReferenceChange
+
+# kind -> (model label, serializer); the serializers are the ones behind
+# the individual list endpoints, so the bundle has the same shapes.
+REFERENCE_SOURCES = {
+    'clients': ('clients.Client', ClientSerializer),
+    'branches': ('branch.Branch', BranchSerializer),
+    'bank_accounts': ('bank.BankAccount', BankAccountSerializer),
+    'taxes': ('invoice.Tax', TaxSerializer),
+    'products': ('product.Product', ProductSerializer),
+    'services': ('services.Service', ServiceSerializer),
+    'logo': ('invoice.Logo', LogoSerializer),
+}
+# Only the newest logo is in use, so it is sent as one object, not a list.
+SINGLETON_KINDS = {'logo'}
+EMPTY_LOGO = {'company_name': '', 'logo_image': None}
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def current_version():
+    return ReferenceChange.latest()[0]
+
+
+def _serialize(kind, queryset, context):
+    model_label, serializer_class = REFERENCE_SOURCES[kind]
+    if kind in SINGLETON_KINDS:
+        obj = queryset.last()
+        return serializer_class(obj, context=context).data if obj else EMPTY_LOGO
+    return serializer_class(queryset.order_by('pk'), many=True, context=context).data
+
+
+def full_bundle_key(version, request):
+    # Per host as well, since the bundle holds absolute media URLs
+    return f'reference_bundle:{version}:{request.get_host()}'
+
+
+def full_bundle(version, request):
+    """Every reference list at `version`; cached per version (and host, for absolute media URLs)."""
+    cache_key = full_bundle_key(version, request)
+    bundle = cache.get(cache_key)
+    if bundle is None:
+        context = {'request': request}
+        bundle = {
+            'version': version,
+            'data': {
+                kind: _serialize(kind, apps.get_model(model_label).objects.all(), context)
+                for kind, (model_label, _) in REFERENCE_SOURCES.items()
+            },
+        }
+        cache.set(cache_key, bundle, CACHE_TIMEOUT)
+    return bundle
+
+
+def delta_bundle(since, version, request):
+    """Objects changed and ids deleted after `since`, grouped by kind."""
+    changed_ids, deleted = {}, {}
+    for kind, object_id, is_deleted in (
+        ReferenceChange.objects.filter(version__gt=since, version__lte=version).values_list('kind', 'object_id', 'deleted')
+    ):
+        if kind not in REFERENCE_SOURCES:
+            continue
+        (deleted if is_deleted else changed_ids).setdefault(kind, []).append(object_id)
+
+    context = {'request': request}
+    changed = {}
+    for kind, ids in changed_ids.items():
+        queryset = apps.get_model(REFERENCE_SOURCES[kind][0]).objects.all()
+        changed[kind] = _serialize(kind, queryset if kind in SINGLETON_KINDS else queryset.filter(pk__in=ids), context)
+    for kind in SINGLETON_KINDS & deleted.keys():
+        if kind not in changed:
+            changed[kind] = _serialize(kind, apps.get_model(REFERENCE_SOURCES[kind][0]).objects.all(), context)
+        del deleted[kind]
+    return {'version': version, 'since': since, 'changed': changed, 'deleted': {k: sorted(v) for k, v in deleted.items()}}
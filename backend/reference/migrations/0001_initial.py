@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+
+SOURCES = {
+    'clients': ('clients', 'Client'),
+    'branches': ('branch', 'Branch'),
+    'bank_accounts': ('bank', 'BankAccount'),
+    'taxes': ('invoice', 'Tax'),
+    'products': ('product', 'Product'),
+    'services': ('services', 'Service'),
+    'logo': ('invoice', 'Logo'),
+}
+
+
+def seed_changes(apps, schema_editor):
+    ReferenceChange = apps.get_model('reference', 'ReferenceChange')
+    for kind, (app_label, model_name) in SOURCES.items():
+        ids = apps.get_model(app_label, model_name).objects.values_list('pk', flat=True)
+        ReferenceChange.objects.bulk_create(
+            [ReferenceChange(kind=kind, object_id=pk) for pk in ids.iterator()], batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bank', '0002_bankaccount_account_holder_name_and_more'),
+        ('branch', '0006_branch_proforma_prefix'),
+        ('clients', '0006_client_gstin'),
+        ('invoice', '0008_exchange_rates'),
+        ('product', '0001_initial'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'id'], name='reference_kind_version_idx')],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
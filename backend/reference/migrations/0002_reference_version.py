@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_versions(apps, schema_editor):
+    ReferenceChange = apps.get_model('reference', 'ReferenceChange')
+    ReferenceVersion = apps.get_model('reference', 'ReferenceVersion')
+    # Existing rows keep their id as version, so versions clients hold stay valid.
+    ReferenceChange.objects.update(version=F('id'))
+    last = ReferenceChange.objects.aggregate(last=Max('id'))['last'] or 0
+    ReferenceVersion.objects.create(name='reference', last_number=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('name', models.CharField(default='reference', max_length=20, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='referencechange',
+            name='version',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='referencechange',
+            name='version',
+            field=models.BigIntegerField(unique=True),
+        ),
+        migrations.RemoveIndex(
+            model_name='referencechange',
+            name='reference_kind_version_idx',
+        ),
+        migrations.AddIndex(
+            model_name='referencechange',
+            index=models.Index(fields=['kind', 'version'], name='reference_kind_version_idx'),
+        ),
+    ]
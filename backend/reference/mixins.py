@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ReferenceChange
+
+LIST_CACHE_TIMEOUT = 60 * 60
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """True when the request's validators match: If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in if_none_match or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(last_modified and if_modified_since and int(last_modified.timestamp()) <= if_modified_since)
+
+
+class ConditionalListMixin:
+    """
+    Conditional GETs for list endpoints over a change-tracked model.
+
+    The ETag and Last-Modified come from the newest ReferenceChange row of
+    `change_kind` (one index lookup, the listed table isn't read), a
+    matching If-None-Match / If-Modified-Since gets a 304, and the
+    serialised list is cached per version so repeat polls skip the query
+    and the serializer too.
+
+    Generic views get it on `list()`; other views call `conditional_list`.
+    """
+    change_kind = None
+
+    def conditional_list(self, request, build_data):
+        version, changed_at = ReferenceChange.latest(self.change_kind)
+        etag = f'"{self.change_kind}-{version}"'
+        if is_not_modified(request, etag, changed_at):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f'list:{self.change_kind}:{version}:{request.get_host()}:{request.get_full_path()}'
+            data = cache.get(cache_key)
+            if data is None:
+                data = build_data()
+                cache.set(cache_key, data, LIST_CACHE_TIMEOUT)
+            response = Response(data)
+        response['ETag'] = etag
+        if changed_at:
+            response['Last-Modified'] = http_date(changed_at.timestamp())
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list(request, lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs).data)
@@ -0,0 +1,77 @@
+from django.db import models, transaction
+from django.utils import timezone
+
+from branch.models import SequenceCounter
+
+
+class ReferenceVersion(SequenceCounter):
+    """The counter behind ReferenceChange versions (a single row)."""
+    name = models.CharField(max_length=20, unique=True, default='reference')
+
+    def __str__(self):
+        return f"{self.name}: {self.last_number}"
+
+    @classmethod
+    def reserve(cls, count=1):
+        """Must run in the transaction that writes the changes; see ReferenceChange."""
+        return cls.advance(count, name='reference')
+
+
+class ReferenceChange(models.Model):
+    """
+    Latest change to one reference-data object, stamped with a version from
+    ReferenceVersion. The counter row stays locked until the recording
+    transaction commits, so versions are handed out in commit order: the
+    bundle version is the highest one, and a client holding version N gets
+    every later change from the rows with version > N. (Auto-increment ids
+    give no such guarantee; a lower id can commit later.) Deleted objects
+    keep a tombstone row so deltas can report them.
+    """
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    version = models.BigIntegerField(unique=True)
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        indexes = [models.Index(fields=['kind', 'version'], name='reference_kind_version_idx')]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} v{self.version}"
+
+    @classmethod
+    def record(cls, kind, object_id, deleted=False):
+        with transaction.atomic():
+            # The counter first: concurrent recorders queue on its row lock
+            # before touching change rows, so they never deadlock on gaps.
+            version = ReferenceVersion.reserve()[0]
+            fields = {'version': version, 'deleted': deleted}
+            if not cls.objects.filter(kind=kind, object_id=object_id).update(changed_at=timezone.now(), **fields):
+                cls.objects.create(kind=kind, object_id=object_id, **fields)
+
+    @classmethod
+    def record_new(cls, kind, object_ids, batch_size=1000):
+        """record() for many objects that have no change row yet, such as a bulk insert."""
+        object_ids = list(object_ids)
+        if not object_ids:
+            return
+        with transaction.atomic():
+            versions = ReferenceVersion.reserve(len(object_ids))
+            cls.objects.bulk_create(
+                [cls(kind=kind, object_id=pk, version=v) for pk, v in zip(object_ids, versions)], batch_size=batch_size,
+            )
+
+    @classmethod
+    def _newest(cls, kind):
+        changes = cls.objects.filter(kind=kind) if kind else cls.objects.all()
+        return changes.order_by('-version').values_list('version', 'changed_at')
+
+    @classmethod
+    def latest(cls, kind=None):
+        """(version, changed_at) of the newest change, overall or for one kind; (0, None) before any."""
+        return cls._newest(kind).first() or (0, None)
+
+    @classmethod
+    async def alatest(cls, kind=None):
+        return await cls._newest(kind).afirst() or (0, None)
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .bundle import REFERENCE_SOURCES
+from .models import ReferenceChange
+
+
+def _connect(kind, model):
+    def changed(sender, instance, **kwargs):
+        ReferenceChange.record(kind, instance.pk)
+
+    def deleted(sender, instance, **kwargs):
+        ReferenceChange.record(kind, instance.pk, deleted=True)
+
+    post_save.connect(changed, sender=model, weak=False, dispatch_uid=f'reference_change_save_{kind}')
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=f'reference_change_delete_{kind}')
+
+
+for kind, (model_label, _) in REFERENCE_SOURCES.items():
+    _connect(kind, apps.get_model(model_label))
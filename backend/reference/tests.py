@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bank.models import BankAccount
+from branch.models import Branch, InvoiceSequence
+from clients.models import Client
+from invoice.models import Logo, Tax
+from product.models import Product
+from reference.models import ReferenceChange, ReferenceVersion
+
+
+class ReferenceBundleTests(TestCase):
+    URL = "/api/reference-bundle/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Client.objects.create(client_name="Acme")
+        cls.globex = Client.objects.create(client_name="Globex")
+        BankAccount.objects.create(bank_name="HDFC", account_number="001")
+        Tax.objects.create(name="GST", percentage=18)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_full_bundle_matches_list_endpoints(self):
+        response = self.client.get(self.URL)
+        bundle = response.json()
+        self.assertEqual(response["ETag"], f'"{bundle["version"]}"')
+        self.assertEqual(bundle["data"]["clients"], self.client.get("/api/clients/clients/").json())
+        self.assertEqual(bundle["data"]["taxes"], self.client.get("/api/invoices/taxes/").json())
+        self.assertEqual(bundle["data"]["logo"], {"company_name": "", "logo_image": None})
+        self.assertEqual(set(bundle["data"]), {"clients", "branches", "bank_accounts", "taxes", "products", "services", "logo"})
+
+    def test_conditional_get_returns_304_with_one_query(self):
+        etag = self.client.get(self.URL)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        Tax.objects.create(name="IGST", percentage=18)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_delta_since_version(self):
+        version = self.client.get(self.URL).json()["version"]
+        self.acme.client_name = "Acme Ltd"
+        self.acme.save()
+        globex_id = self.globex.pk
+        self.globex.delete()
+        Logo.objects.create(company_name="MarketBytes")
+
+        delta = self.client.get(self.URL, {"since": version}).json()
+        self.assertGreater(delta["version"], version)
+        self.assertEqual([c["client_name"] for c in delta["changed"]["clients"]], ["Acme Ltd"])
+        self.assertEqual(delta["deleted"], {"clients": [globex_id]})
+        self.assertEqual(delta["changed"]["logo"]["company_name"], "MarketBytes")
+        self.assertNotIn("taxes", delta["changed"])
+
+        latest = self.client.get(self.URL, {"since": delta["version"]}).json()
+        self.assertEqual((latest["changed"], latest["deleted"]), ({}, {}))
+
+    def test_changes_update_their_row_with_the_next_version(self):
+        before = ReferenceChange.objects.get(kind="clients", object_id=self.acme.pk)
+        version = ReferenceChange.latest()[0]
+        self.acme.client_name = "Acme Ltd"
+        self.acme.save()
+        after = ReferenceChange.objects.get(kind="clients", object_id=self.acme.pk)
+        self.assertEqual(after.pk, before.pk)
+        self.assertEqual(after.version, version + 1)
+        self.assertEqual(ReferenceVersion.objects.get().last_number, after.version)
+
+    def test_bad_since_is_rejected(self):
+        self.assertEqual(self.client.get(self.URL, {"since": "abc"}).status_code, 400)
+
+
+class ConditionalListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Client.objects.create(client_name="Acme")
+        Product.objects.create(name="Widget", unit_cost=10)
+        cls.branch = Branch.objects.create(branch_name="Head Office")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_validators_and_304_without_reading_the_table(self):
+        first = self.client.get("/api/clients/clients/")
+        self.assertEqual(first.status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            by_etag = self.client.get("/api/clients/clients/", HTTP_IF_NONE_MATCH=first["ETag"])
+            by_date = self.client.get("/api/clients/clients/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual((by_etag.status_code, by_date.status_code), (304, 304))
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn("clients_client", " ".join(q["sql"] for q in ctx.captured_queries))
+
+    def test_body_is_cached_per_version(self):
+        self.client.get("/api/products/products/")
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get("/api/products/products/")
+        self.assertEqual(len(ctx.captured_queries), 1)
+        Product.objects.create(name="Gadget", unit_cost=5)
+        fresh = self.client.get("/api/products/products/", HTTP_IF_NONE_MATCH=cached["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(len(fresh.json()), len(cached.json()) + 1)
+
+    def test_number_allocation_keeps_branch_list_version(self):
+        etag = self.client.get("/api/branch/branch_addresses/")["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            InvoiceSequence.reserve(self.branch, "2025-2026")
+        self.assertNotIn("reference_referencechange", " ".join(q["sql"] for q in ctx.captured_queries))
+        response = self.client.get("/api/branch/branch_addresses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_branch_edit_invalidates_branch_list(self):
+        etag = self.client.get("/api/branch/branch_addresses/")["ETag"]
+        self.branch.proforma_prefix = "HO"
+        self.branch.save()
+        response = self.client.get("/api/branch/branch_addresses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["proforma_prefix"], "HO")
@@ -0,0 +1,8 @@
+from django.urls import path
+from invoice_backend.async_support import async_read_view
+from .async_views import reference_bundle
+from .views import ReferenceBundleView
+
+urlpatterns = [
+    path('', async_read_view(reference_bundle, ReferenceBundleView.as_view()), name='reference-bundle'),
+]
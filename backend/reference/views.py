@@ -0,0 +1,40 @@
+from django.utils.cache import patch_cache_control
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .bundle import current_version, delta_bundle, full_bundle
+from .mixins import is_not_modified
+
+
+class ReferenceBundleView(APIView):
+    """
+    Clients, branches, bank accounts, taxes, products, services and the
+    logo in one response, stamped with a version that increases on every
+    change. The ETag is the version, so a conditional GET with an
+    unchanged version returns 304; `since=<version>` returns only what
+    changed or was deleted after that version.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ParseError("since must be a version number")
+
+        version = current_version()
+        etag = f'"{version}"'
+        if is_not_modified(request, etag):
+            response = Response(status=304)
+        elif since is None or since > version:
+            # A version from the future means the change log was reset; start over.
+            response = Response(full_bundle(version, request))
+        else:
+            response = Response(delta_bundle(since, version, request))
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,104 @@
+import re
+
+from django.apps import apps
+from django.db import connection, transaction
+
+KEY_LENGTH = 100
+WORD_START = re.compile(r'(?<!\w)\w')
+
+# kind -> (model label, fields indexed for search)
+SEARCH_SOURCES = {
+    'invoice': ('invoice.Invoice', ('final_invoice_number', 'invoice_number')),
+    'client': ('clients.Client', ('client_name',)),
+    'product': ('product.Product', ('name',)),
+    'service': ('services.Service', ('name',)),
+    'bank_account': ('bank.BankAccount', ('bank_name', 'account_holder_name', 'account_number')),
+    'branch': ('branch.Branch', ('branch_name', 'city', 'branch_address')),
+    'tax': ('invoice.Tax', ('name',)),
+}
+
+
+def normalise(text):
+    return ' '.join(str(text).lower().split())
+
+
+def build_entries(entry_model, kind, obj, fields):
+    entries = []
+    for field in fields:
+        value = getattr(obj, field, None)
+        if not value:
+            continue
+        label = ' '.join(str(value).split())[:255]
+        text = normalise(value)
+        for match in WORD_START.finditer(text):
+            entries.append(entry_model(
+                kind=kind,
+                object_id=obj.pk,
+                label=label,
+                key=text[match.start():match.start() + KEY_LENGTH],
+                position=0 if match.start() == 0 else 1,
+            ))
+    return entries
+
+
+def index_object(kind, obj):
+    SearchEntry = apps.get_model('search', 'SearchEntry')
+    with transaction.atomic():
+        SearchEntry.objects.filter(kind=kind, object_id=obj.pk).delete()
+        SearchEntry.objects.bulk_create(build_entries(SearchEntry, kind, obj, SEARCH_SOURCES[kind][1]))
+
+
+def unindex_object(kind, pk):
+    apps.get_model('search', 'SearchEntry').objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild_index(app_registry=apps, batch_size=2000):
+    """Rebuild every entry from the source tables. Returns the entry count."""
+    SearchEntry = app_registry.get_model('search', 'SearchEntry')
+    total = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for kind, (model_label, fields) in SEARCH_SOURCES.items():
+            model = app_registry.get_model(model_label)
+            entries = []
+            for obj in model.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+                entries.extend(build_entries(SearchEntry, kind, obj, fields))
+                if len(entries) >= batch_size:
+                    SearchEntry.objects.bulk_create(entries)
+                    total += len(entries)
+                    entries = []
+            SearchEntry.objects.bulk_create(entries)
+            total += len(entries)
+    return total
+
+
+def global_search(query, limit):
+    """
+    Ranked hits across the reference models. Label prefixes are looked up
+    first, word prefixes inside labels only if those run short; both are
+    index range scans on (position, key).
+    """
+    SearchEntry = apps.get_model('search', 'SearchEntry')
+    query = normalise(query)[:KEY_LENGTH]
+    if not query:
+        return []
+    # LIKE 'query%' is an index range scan on MySQL and follows the column's
+    # collation, which a hand-built upper bound would not (UCA does not put
+    # ':' right after '9' or '{' after 'z').
+    entries = SearchEntry.objects.filter(key__startswith=query)
+    if connection.vendor == 'sqlite':
+        # SQLite's LIKE is case-insensitive and so skips the index; its BINARY
+        # collation is code-point order, so the range is exact there.
+        entries = entries.filter(key__gte=query, key__lt=query[:-1] + chr(ord(query[-1]) + 1))
+    fields = ('kind', 'object_id', 'label')
+    hits = {}
+    for position in (0, 1):
+        for kind, object_id, label in entries.filter(position=position).values_list(*fields)[:limit * 3]:
+            score = 3 if normalise(label) == query else 2 if position == 0 else 1
+            best = hits.get((kind, object_id))
+            if best is None or score > best['score']:
+                hits[(kind, object_id)] = {'type': kind, 'id': object_id, 'label': label, 'score': score}
+        if len(hits) >= limit:
+            break
+    ranked = sorted(hits.values(), key=lambda hit: (-hit['score'], len(hit['label']), hit['label'].lower()))
+    return ranked[:limit]
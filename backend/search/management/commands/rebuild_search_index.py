@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index, e.g. after bulk imports that bypass model signals."
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} search entries."))
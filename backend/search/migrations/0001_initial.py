@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 18:23
+
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    from search.index import rebuild_index
+    rebuild_index(apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bank', '0002_bankaccount_account_holder_name_and_more'),
+        ('branch', '0006_branch_proforma_prefix'),
+        ('clients', '0006_client_gstin'),
+        ('invoice', '0008_exchange_rates'),
+        ('product', '0001_initial'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('label', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=100)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['position', 'key'], name='search_position_key_idx'), models.Index(fields=['kind', 'object_id'], name='search_object_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    One row per word start of a searchable label, so a prefix range scan on
+    `key` finds matches anywhere in the label using the index.
+    """
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    label = models.CharField(max_length=255)
+    key = models.CharField(max_length=100)
+    # 0 when the key starts at the beginning of the label, 1 for later words.
+    # An integer rather than a boolean so every backend compares it with `=`
+    # and can use the (position, key) index.
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['position', 'key'], name='search_position_key_idx'),
+            models.Index(fields=['kind', 'object_id'], name='search_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.key}"
@@ -0,0 +1,19 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .index import SEARCH_SOURCES, index_object, unindex_object
+
+
+def _connect(kind, model):
+    def update_entry(sender, instance, **kwargs):
+        index_object(kind, instance)
+
+    def remove_entry(sender, instance, **kwargs):
+        unindex_object(kind, instance.pk)
+
+    post_save.connect(update_entry, sender=model, weak=False, dispatch_uid=f'search_index_save_{kind}')
+    post_delete.connect(remove_entry, sender=model, weak=False, dispatch_uid=f'search_index_delete_{kind}')
+
+
+for kind, (model_label, fields) in SEARCH_SOURCES.items():
+    _connect(kind, apps.get_model(model_label))
@@ -0,0 +1,93 @@
+import time
+
+from django.db import connection
+from django.test import TestCase
+
+from bank.models import BankAccount
+from clients.models import Client
+from invoice.models import Tax
+from product.models import Product
+from .index import global_search, rebuild_index
+from .models import SearchEntry
+
+
+class GlobalSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Client.objects.create(client_name="Acme Corp")
+        Client.objects.create(client_name="Acme")
+        Client.objects.create(client_name="Northwind Acme")
+        Product.objects.create(name="Acme Widget", unit_cost=10)
+        BankAccount.objects.create(bank_name="HDFC", account_number="ACME-001")
+        Tax.objects.create(name="GST 18", percentage=18)
+
+    def search(self, q, **params):
+        return self.client.get("/api/search/", {"q": q, **params}).json()["results"]
+
+    def test_ranks_exact_then_prefix_then_word_match(self):
+        results = self.search("ACME")
+        self.assertEqual(results[0]["label"], "Acme")
+        self.assertEqual(results[0]["score"], 3)
+        self.assertEqual(results[-1]["label"], "Northwind Acme")
+        self.assertIn(("bank_account", "ACME-001"), [(hit["type"], hit["label"]) for hit in results])
+
+    def test_index_follows_saves_and_deletes(self):
+        client = Client.objects.get(client_name="Northwind Acme")
+        client.client_name = "Contoso"
+        client.save()
+        self.assertEqual([hit["label"] for hit in self.search("conto")], ["Contoso"])
+        client.delete()
+        self.assertEqual(self.search("conto"), [])
+
+    def test_rebuild_picks_up_rows_written_without_signals(self):
+        Product.objects.bulk_create([Product(name="Gizmo", unit_cost=5)])
+        self.assertEqual(self.search("gizmo"), [])
+        rebuild_index()
+        self.assertEqual([hit["label"] for hit in self.search("gizmo")], ["Gizmo"])
+
+    def test_queries_ending_in_9_or_z(self):
+        BankAccount.objects.create(bank_name="SBI", account_number="MBC/25-26/09")
+        Product.objects.create(name="Quartz", unit_cost=1)
+        self.assertEqual([hit["label"] for hit in self.search("mbc/25-26/09")], ["MBC/25-26/09"])
+        self.assertEqual([hit["label"] for hit in self.search("quartz")], ["Quartz"])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.search("acme", limit=2)), 2)
+        self.assertEqual(self.search("  "), [])
+        self.assertEqual(self.client.get("/api/search/", {"q": "gst", "limit": "x"}).status_code, 400)
+
+
+class GlobalSearchLatencyBenchmark(TestCase):
+    RECORDS = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        # Write the index rows directly: the benchmark is about lookups, and
+        # going through the ORM for 100k source rows dominates the run time.
+        table = SearchEntry._meta.db_table
+        rows = []
+        for i in range(cls.RECORDS):
+            label = f"Client {i:06d} Ltd"
+            text = label.lower()
+            rows += [
+                ("client", i, label, text, 0),
+                ("client", i, label, text[7:], 1),
+                ("client", i, label, text[14:], 1),
+            ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (kind, object_id, label, {connection.ops.quote_name('key')}, position) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def test_p99_latency(self):
+        timings = []
+        for i in range(200):
+            started = time.perf_counter()
+            global_search(f"{i * 997 % self.RECORDS:06d}" if i % 2 else "client", 8)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+        print(f"\nglobal search p99 over {self.RECORDS} records: {p99:.2f} ms")
+        self.assertLess(p99, 20)
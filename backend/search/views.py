@@ -0,0 +1,20 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .index import global_search
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 50
+
+
+class GlobalSearchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ParseError("limit must be an integer")
+        return Response({'results': global_search(request.query_params.get('q', ''), max(limit, 1))})
@@ -4,20 +4,20 @@ from rest_framework import status
 from .models import Service
 from .serializers import ServiceSerializer
 from rest_framework.permissions import AllowAny
+from reference.mixins import ConditionalListMixin
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class ServiceListCreateView(APIView):
+class ServiceListCreateView(ConditionalListMixin, APIView):
     permission_classes = [AllowAny]
+    change_kind = 'services'
 
     @swagger_auto_schema(responses={200: ServiceSerializer(many=True)})
     def get(self, request, *args, **kwargs):
         """
         Retrieve a list of all services.
         """
-        services = Service.objects.all()
-        serializer = ServiceSerializer(services, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(request, lambda: ServiceSerializer(Service.objects.all(), many=True).data)
 
     @swagger_auto_schema(request_body=ServiceSerializer, responses={201: ServiceSerializer})
     def post(self, request, *args, **kwargs):
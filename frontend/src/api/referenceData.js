@@ -0,0 +1,40 @@
+import apiClient from "./apiClient";
+
+/**
+ * Clients, branches, bank accounts, taxes, products, services and the logo
+ * from the versioned reference bundle. The first call downloads everything;
+ * later calls only fetch what changed since the version we already hold.
+ */
+let bundle = null;
+
+const mergeById = (rows, changed, deletedIds) => {
+  const byId = new Map(rows.map((row) => [row.id, row]));
+  (changed || []).forEach((row) => byId.set(row.id, row));
+  (deletedIds || []).forEach((id) => byId.delete(id));
+  return [...byId.values()].sort((a, b) => a.id - b.id);
+};
+
+export const fetchReferenceData = async () => {
+  if (!bundle) {
+    const { data } = await apiClient.get("reference-bundle/");
+    bundle = { version: data.version, ...data.data };
+    return bundle;
+  }
+
+  const { data } = await apiClient.get("reference-bundle/", {
+    params: { since: bundle.version },
+  });
+  if (data.data) {
+    bundle = { version: data.version, ...data.data };
+    return bundle;
+  }
+  const next = { ...bundle, version: data.version };
+  Object.keys(data.changed).forEach((kind) => {
+    next[kind] = kind === "logo" ? data.changed.logo : mergeById(next[kind] || [], data.changed[kind], []);
+  });
+  Object.keys(data.deleted).forEach((kind) => {
+    next[kind] = mergeById(next[kind] || [], [], data.deleted[kind]);
+  });
+  bundle = next;
+  return bundle;
+};
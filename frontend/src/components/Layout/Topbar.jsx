@@ -58,27 +58,25 @@ const Topbar = ({ toggleSidebar, isSidebarOpen }) => {
       setIsLoading(true);
       setIsSearchDropdownOpen(true);
       try {
-        const endpoints = [
-          "invoices/invoices/",
-          "products/products/",
-          "services/services/",
-          "clients/clients/",
-          "bank/bank-accounts/",
-          "branch/branch_addresses/",
-          "invoices/taxes/"
-        ];
+        const searchTypes = {
+          invoice: { type: "Invoice", path: "/invoice/proforma" },
+          product: { type: "Product", path: "/products/view" },
+          service: { type: "Service", path: "/services/view" },
+          client: { type: "Client", path: "/clients/view" },
+          bank_account: { type: "Bank Account", path: "/bank-account/view" },
+          branch: { type: "Address", path: "/address/view" },
+          tax: { type: "Tax", path: "/tax/view" },
+        };
 
-        const responses = await Promise.all(endpoints.map(ep => apiClient.get(ep)));
+        const response = await apiClient.get("search/", {
+          params: { q: debouncedSearchQuery, limit: 8 },
+        });
 
-        const results = [
-          ...responses[0].data.map(item => ({ type: "Invoice", name: item.invoice_number || `Inv #${item.id}`, path: `/invoice/proforma` })),
-          ...responses[1].data.map(item => ({ type: "Product", name: item.name, path: "/products/view" })),
-          ...responses[2].data.map(item => ({ type: "Service", name: item.name, path: "/services/view" })),
-          ...responses[3].data.map(item => ({ type: "Client", name: item.client_name, path: "/clients/view" })),
-          ...responses[4].data.map(item => ({ type: "Bank Account", name: item.bank_name, path: "/bank-account/view" })),
-          ...responses[5].data.map(item => ({ type: "Address", name: item.branch_address, path: "/address/view" })),
-          ...responses[6].data.map(item => ({ type: "Tax", name: item.name, path: "/tax/view" })),
-        ].filter(item => item.name.toLowerCase().includes(debouncedSearchQuery.toLowerCase()));
+        const results = response.data.results.map(hit => ({
+          type: searchTypes[hit.type].type,
+          name: hit.label,
+          path: searchTypes[hit.type].path,
+        }));
 
         setSearchResults(results.slice(0, 8));
       } catch (error) {
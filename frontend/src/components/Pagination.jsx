@@ -6,9 +6,12 @@ const Pagination = ({
   itemsPerPage, 
   currentPage, 
   onPageChange, 
-  onItemsPerPageChange 
+  onItemsPerPageChange,
+  hasNextPage
 }) => {
-  const totalPages = Math.ceil(totalItems / itemsPerPage);
+  // Cursor-paginated lists pass no total, only whether another page follows
+  const cursorMode = totalItems === undefined;
+  const totalPages = cursorMode ? currentPage + (hasNextPage ? 1 : 0) : Math.ceil(totalItems / itemsPerPage);
   const startItem = totalItems === 0 ? 0 : (currentPage - 1) * itemsPerPage + 1;
   const endItem = Math.min(currentPage * itemsPerPage, totalItems);
 
@@ -28,11 +31,17 @@ const Pagination = ({
           </select>
         </div>
         <div className="h-4 w-px bg-gray-200 hidden sm:block"></div>
-        <span className="text-[10px] font-bold text-gray-500 uppercase tracking-widest">
-          ({startItem} to {endItem} of {totalItems}) 
-          <span className="text-gray-300 mx-2">|</span>
-          Page {currentPage} of {Math.max(1, totalPages)}
-        </span>
+        {cursorMode ? (
+          <span className="text-[10px] font-bold text-gray-500 uppercase tracking-widest">
+            Page {currentPage}
+          </span>
+        ) : (
+          <span className="text-[10px] font-bold text-gray-500 uppercase tracking-widest">
+            ({startItem} to {endItem} of {totalItems}) 
+            <span className="text-gray-300 mx-2">|</span>
+            Page {currentPage} of {Math.max(1, totalPages)}
+          </span>
+        )}
       </div>
 
       <div className="flex items-center gap-2 mt-2 sm:mt-0">
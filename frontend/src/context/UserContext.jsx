@@ -20,7 +20,7 @@ export const UserProvider = ({ children }) => {
       const data = response.data;
       setUser({
         username: data.username || 'User',
-        avatar: data.avatar ? `${MEDIA_URL}${data.avatar}` : 'https://via.placeholder.com/80',
+        avatar: data.avatar ? `${MEDIA_URL}${data.avatar_variants?.thumbnail?.url || data.avatar}` : 'https://via.placeholder.com/80',
         firstName: data.first_name || '',
         lastName: data.last_name || '',
         email: data.email || ''
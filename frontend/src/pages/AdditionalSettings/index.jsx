@@ -45,7 +45,7 @@ const AdditionalSettings = () => {
       try {
         const logoRes = await apiClient.get("invoices/settings/logo/");
         if (logoRes.data?.logo_image) {
-          setLogoUrl(logoRes.data.logo_image);
+          setLogoUrl(logoRes.data.variants?.screen?.url || logoRes.data.logo_image);
         }
         if (logoRes.data?.company_name) {
           setCompanyName(logoRes.data.company_name);
@@ -76,7 +76,7 @@ const AdditionalSettings = () => {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
-      setLogoUrl(response.data.logo_image);
+      setLogoUrl(response.data.variants?.screen?.url || response.data.logo_image);
       alert("Invoice logo updated successfully!");
     } catch (error) {
       console.error("Logo upload error:", error);
@@ -30,7 +30,7 @@ import {
 import { motion } from "framer-motion";
 import apiClient from "../../api/apiClient";
 import { formatDate } from "../../utils/dateUtils";
-import { fetchExchangeRates, convertToINR, formatAmount } from "../../utils/currencyUtils";
+import { formatAmount } from "../../utils/currencyUtils";
 
 const MetricCard = ({ title, value, subtitle, icon: Icon, trend, color }) => (
   <motion.div
@@ -48,18 +48,21 @@ const MetricCard = ({ title, value, subtitle, icon: Icon, trend, color }) => (
   </motion.div>
 );
 
+// "2025-05" -> "2025-2026": the financial year starts in April.
+const financialYearOf = (month) => {
+  const [year, monthNumber] = month.split('-').map(Number);
+  return monthNumber >= 4 ? `${year}-${year + 1}` : `${year - 1}-${year}`;
+};
+
 const Dashboard = () => {
   const navigate = useNavigate();
+  // Aggregates come from the stats endpoint, so the dashboard never downloads the full invoice list.
   const [data, setData] = useState({
-    invoices: [],
-    products: 0,
-    services: 0,
-    clients: 0,
-    accounts: 0,
+    stats: null,
+    recentInvoices: [],
     loading: true,
     error: null
   });
-  const [exchangeRates, setExchangeRates] = useState(null);
 
   const currentYear = new Date().getFullYear();
   const currentMonth = new Date().getMonth();
@@ -74,30 +77,14 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
-        // Fetch exchange rates first
-        const rates = await fetchExchangeRates();
-        setExchangeRates(rates);
-
-        const [
-          invoicesRes,
-          productsRes,
-          servicesRes,
-          clientsRes,
-          accountsRes
-        ] = await Promise.all([
-          apiClient.get("invoices/invoices/"),
-          apiClient.get("products/products/"),
-          apiClient.get("services/services/"),
-          apiClient.get("clients/clients/"),
-          apiClient.get("bank/bank-accounts/")
+        const [statsRes, recentRes] = await Promise.all([
+          apiClient.get("invoices/stats/"),
+          apiClient.get("invoices/invoices/", { params: { page_size: 5 } })
         ]);
 
         setData({
-          invoices: invoicesRes.data.sort((a, b) => b.id - a.id),
-          products: productsRes.data.length,
-          services: servicesRes.data.length,
-          clients: clientsRes.data.length,
-          accounts: accountsRes.data.length,
+          stats: statsRes.data,
+          recentInvoices: recentRes.data.results,
           loading: false,
           error: null
         });
@@ -110,117 +97,52 @@ const Dashboard = () => {
   }, []);
 
   const stats = useMemo(() => {
-    const now = new Date();
-    const currentMonth = now.getMonth();
-    const currentYear = now.getFullYear();
-    const lastMonth = currentMonth === 0 ? 11 : currentMonth - 1;
-    const lastMonthYear = currentMonth === 0 ? currentYear - 1 : currentYear;
-
-    const finalInvoices = data.invoices.filter(inv => inv.is_final);
-    const proformaInvoices = data.invoices.filter(inv => !inv.is_final);
-
-    // Revenue logic
-    const totalRevenue = finalInvoices.reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-    const currentMonthRev = finalInvoices
-      .filter(inv => {
-        const d = new Date(inv.invoice_date);
-        return d.getMonth() === currentMonth && d.getFullYear() === currentYear;
-      })
-      .reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-
-    const lastMonthRev = finalInvoices
-      .filter(inv => {
-        const d = new Date(inv.invoice_date);
-        return d.getMonth() === lastMonth && d.getFullYear() === lastMonthYear;
-      })
-      .reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-
-    const revenueTrend = lastMonthRev === 0 ? (currentMonthRev > 0 ? 100 : 0) : Math.round(((currentMonthRev - lastMonthRev) / lastMonthRev) * 100);
-
-    // Pending logic (Total Sum of Proforma Invoices) - converted to INR
-    const pendingAmount = proformaInvoices.reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-    const currentMonthPending = proformaInvoices
-      .filter(inv => {
-        const d = new Date(inv.invoice_date);
-        return d.getMonth() === currentMonth && d.getFullYear() === currentYear;
-      })
-      .reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-
-    const lastMonthPending = proformaInvoices
-      .filter(inv => {
-        const d = new Date(inv.invoice_date);
-        return d.getMonth() === lastMonth && d.getFullYear() === lastMonthYear;
-      })
-      .reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
-
-    const pendingTrend = lastMonthPending === 0 ? (currentMonthPending > 0 ? 100 : 0) : Math.round(((currentMonthPending - lastMonthPending) / lastMonthPending) * 100);
-
-    // Clients logic
-    const totalClients = data.clients;
-
-    // Drafts
-    const draftCount = proformaInvoices.length;
-
+    const counts = data.stats?.counts || {};
     return {
-      totalRevenue,
-      revenueTrend,
-      pendingAmount,
-      pendingTrend,
-      totalClients,
-      draftCount,
-      totalCount: data.invoices.length
+      totalRevenue: Number(data.stats?.revenue_inr || 0),
+      pendingAmount: Number(data.stats?.pending_inr || 0),
+      totalClients: counts.clients || 0,
+      products: counts.products || 0,
+      services: counts.services || 0,
+      accounts: counts.bank_accounts || 0,
+      draftCount: counts.proforma || 0,
+      totalCount: counts.invoices || 0
     };
-  }, [data.invoices, exchangeRates]);
+  }, [data.stats]);
+
+  // Final invoices' INR revenue per calendar month ("2025-05" -> amount).
+  const finalMonthly = useMemo(() => {
+    const months = {};
+    (data.stats?.monthly || [])
+      .filter(row => row.is_final)
+      .forEach(row => {
+        months[row.month] = (months[row.month] || 0) + Number(row.total_due_inr || 0);
+      });
+    return months;
+  }, [data.stats]);
 
   const chartData = useMemo(() => {
-    const finalInvoices = data.invoices.filter(inv => inv.is_final);
     const finMonths = ["Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Jan", "Feb", "Mar"];
     const monthMap = { "Apr": 3, "May": 4, "Jun": 5, "Jul": 6, "Aug": 7, "Sep": 8, "Oct": 9, "Nov": 10, "Dec": 11, "Jan": 0, "Feb": 1, "Mar": 2 };
 
-    let filteredInvoices = finalInvoices;
-
-    if (selectedYear !== "Lifetime") {
-      const parts = selectedYear.split('-');
-      if (parts.length === 2) {
-        const startYear = parseInt(parts[0]);
-        const endYear = parseInt(parts[1]);
-        filteredInvoices = finalInvoices.filter(inv => {
-          const d = new Date(inv.invoice_date);
-          const m = d.getMonth();
-          const y = d.getFullYear();
-
-          if (m >= 3) return y === startYear;
-          return y === endYear;
-        });
-      }
-    }
-
-    if (selectedMonth !== "") {
-      filteredInvoices = filteredInvoices.filter(inv => new Date(inv.invoice_date).getMonth() === parseInt(selectedMonth));
-    }
-
     return finMonths.map(monthName => {
       const targetMonth = monthMap[monthName];
-      const monthRevenue = filteredInvoices
-        .filter(inv => new Date(inv.invoice_date).getMonth() === targetMonth)
-        .reduce((sum, inv) => sum + convertToINR(inv.total_due, inv.currency_type, exchangeRates), 0);
+      const monthRevenue = Object.entries(finalMonthly)
+        .filter(([month]) => selectedYear === "Lifetime" || financialYearOf(month) === selectedYear)
+        .filter(([month]) => Number(month.split('-')[1]) - 1 === targetMonth)
+        .filter(() => selectedMonth === "" || parseInt(selectedMonth) === targetMonth)
+        .reduce((sum, [, amount]) => sum + amount, 0);
 
       return { name: monthName, revenue: monthRevenue };
     });
-  }, [data.invoices, selectedYear, selectedMonth, exchangeRates]);
+  }, [finalMonthly, selectedYear, selectedMonth]);
 
-  // Get available years from invoices
+  // Financial years that have invoices, from the monthly series
   const availableYears = useMemo(() => {
-    const years = data.invoices.map(inv => {
-      const d = new Date(inv.invoice_date);
-      const m = d.getMonth();
-      const y = d.getFullYear();
-      // April is 3. If m >= 3, FY is Y-(Y+1). If m < 3, FY is (Y-1)-Y.
-      return m >= 3 ? `${y}-${y + 1}` : `${y - 1}-${y}`;
-    });
+    const years = (data.stats?.monthly || []).map(row => financialYearOf(row.month));
     const uniqueFYs = [...new Set(years)].sort((a, b) => b.localeCompare(a));
     return ["Lifetime", ...uniqueFYs];
-  }, [data.invoices]);
+  }, [data.stats]);
 
   if (data.loading) {
     return (
@@ -263,7 +185,7 @@ const Dashboard = () => {
         />
         <MetricCard
           title="Total Clients"
-          value={data.clients.toString()}
+          value={stats.totalClients.toString()}
           subtitle="Active registered clients"
           color="bg-blue-500"
         />
@@ -360,21 +282,21 @@ const Dashboard = () => {
                   <Package className="w-5 h-5 mr-3 text-gray-400" />
                   <span className="text-sm font-medium">Products</span>
                 </div>
-                <span className="text-lg font-bold">{data.products}</span>
+                <span className="text-lg font-bold">{stats.products}</span>
               </div>
               <div className="flex items-center justify-between p-4 bg-white/5 rounded-2xl">
                 <div className="flex items-center">
                   <Briefcase className="w-5 h-5 mr-3 text-gray-400" />
                   <span className="text-sm font-medium">Services</span>
                 </div>
-                <span className="text-lg font-bold">{data.services}</span>
+                <span className="text-lg font-bold">{stats.services}</span>
               </div>
               <div className="flex items-center justify-between p-4 bg-white/5 rounded-2xl">
                 <div className="flex items-center">
                   <CreditCard className="w-5 h-5 mr-3 text-gray-400" />
                   <span className="text-sm font-medium">Bank Accounts</span>
                 </div>
-                <span className="text-lg font-bold">{data.accounts}</span>
+                <span className="text-lg font-bold">{stats.accounts}</span>
               </div>
             </div>
           </div>
@@ -420,7 +342,7 @@ const Dashboard = () => {
               </tr>
             </thead>
             <tbody className="divide-y divide-gray-50">
-              {data.invoices.slice(0, 5).map((inv, idx) => (
+              {data.recentInvoices.map((inv, idx) => (
                 <tr key={idx} className="group hover:bg-gray-50/50 transition-colors">
                   <td className="px-8 py-5 whitespace-nowrap">
                     <span className="text-sm font-bold text-gray-900 whitespace-nowrap">{inv.is_final ? (inv.final_invoice_number || inv.invoice_number) : inv.invoice_number}</span>
@@ -445,7 +367,7 @@ const Dashboard = () => {
             </tbody>
           </table>
         </div>
-        {data.invoices.length === 0 && (
+        {data.recentInvoices.length === 0 && (
           <div className="p-12 text-center">
             <p className="text-gray-400 text-sm italic">No invoices found yet.</p>
           </div>
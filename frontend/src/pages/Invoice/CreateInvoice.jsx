@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useForm, Controller } from "react-hook-form";
 import { useNavigate } from "react-router-dom";
 import apiClient from "../../api/apiClient";
+import { fetchReferenceData } from "../../api/referenceData";
 import SearchableSelect from "../../components/SearchableSelect";
 import ConfirmationModal from "../../components/ConfirmationModal";
 import { formatAmount } from "../../utils/currencyUtils";
@@ -94,27 +95,11 @@ const CustomInput = ({
 const CreateInvoice = () => {
   const navigate = useNavigate();
 
-  // Calculate current financial year based on date
-  const getCurrentFinancialYear = () => {
-    const today = new Date();
-    const year = today.getFullYear();
-    const month = today.getMonth() + 1; // 1-12
-    // Financial year in India: April 1 to March 31
-    if (month >= 4) {
-      return `${year}-${year + 1}`;
-    } else {
-      return `${year - 1}-${year}`;
-    }
-  };
-
-  // Generate financial year options (current year and -5 years)
-  const getFinancialYearOptions = () => {
-    const currentYear = new Date().getFullYear();
-    const years = [];
-    for (let i = currentYear - 5; i <= currentYear; i++) {
-      years.push({ value: `${i}-${i + 1}`, label: `${i}-${i + 1}` });
-    }
-    return years.reverse();
+  // Financial year in India (April 1 to March 31) of a YYYY-MM-DD date, as Invoice.save() derives it
+  const financialYearOf = (dateString) => {
+    const [year, month] = (dateString || "").split("-").map(Number);
+    if (!year || !month) return "N/A";
+    return month >= 4 ? `${year}-${year + 1}` : `${year - 1}-${year}`;
   };
 
   const today = new Date();
@@ -135,7 +120,6 @@ const CreateInvoice = () => {
       invoiceNumber: `INV-${Date.now()}`,
       invoiceDate: invoiceDateInit,
       dueDate: dueDateString,
-      financialYear: getCurrentFinancialYear(),
       taxable: "no",
       currencyType: "USD",
       paymentTerms: "Net 30",
@@ -163,20 +147,10 @@ const CreateInvoice = () => {
     const fetchData = async () => {
       try {
         const [
-          clientsResponse,
-          branchesResponse,
-          bankAccountsResponse,
-          taxesResponse,
-          productsResponse,
-          servicesResponse,
+          referenceData,
           currenciesResponse,
         ] = await Promise.all([
-          apiClient.get("clients/clients/"),
-          apiClient.get("branch/branch_addresses/"),
-          apiClient.get("bank/bank-accounts/"),
-          apiClient.get("invoices/taxes/"),
-          apiClient.get("products/products/"),
-          apiClient.get("services/services/"),
+          fetchReferenceData(),
           fetch("https://open.er-api.com/v6/latest/USD?apikey=bbc89a8a69d4fe2cca4524c2", {
             method: "GET",
             headers: {
@@ -188,13 +162,13 @@ const CreateInvoice = () => {
           }),
         ]);
 
-        const rawClients = clientsResponse.data || [];
+        const rawClients = referenceData.clients || [];
         setClients(rawClients);
-        setBranches(branchesResponse.data);
-        setBankAccounts(bankAccountsResponse.data);
-        setTaxes(taxesResponse.data);
-        setProducts(productsResponse.data);
-        setServices(servicesResponse.data);
+        setBranches(referenceData.branches);
+        setBankAccounts(referenceData.bank_accounts);
+        setTaxes(referenceData.taxes);
+        setProducts(referenceData.products);
+        setServices(referenceData.services);
 
         if (currenciesResponse.ok) {
           const currenciesData = await currenciesResponse.json();
@@ -317,7 +291,6 @@ const CreateInvoice = () => {
     try {
       const invoiceData = {
         invoice_type: data.invoiceType,
-        financial_year: data.financialYear,
         client: parseInt(data.clientName),
         branch_address: parseInt(data.branchAddress),
         bank_account: parseInt(data.bankAccount),
@@ -329,15 +302,7 @@ const CreateInvoice = () => {
         tax_rate: data.taxable === "yes" ? parseFloat(selectedTaxRate) : null,
         discount: parseFloat(data.discount).toString() || "0.00",
         amount_paid: parseFloat(data.amountPaid).toString() || "0.00",
-        items: [],
-      };
-
-      const invoiceResponse = await apiClient.post("invoices/invoices/", invoiceData);
-      const invoiceId = invoiceResponse.data.id;
-
-      const itemPromises = invoiceItems.map(async (item) => {
-        const itemData = {
-          invoice: invoiceId,
+        items: invoiceItems.map((item) => ({
           item_type: item.item_type || data.invoiceType,
           product:
             data.invoiceType === "product"
@@ -352,12 +317,11 @@ const CreateInvoice = () => {
           quantity: item.quantity,
           unit_cost: item.unitCost.toString(),
           description: (item.descriptions || []).filter((d) => d.trim() !== ""),
-        };
-        return apiClient.post("invoices/invoice-items/", itemData);
-      });
+        })),
+      };
 
-      await Promise.all(itemPromises);
-      await Promise.all(itemPromises);
+      // The invoice and its items are created together in one transaction.
+      await apiClient.post("invoices/invoices/", invoiceData);
       setShowSuccessModal(true);
     } catch (error) {
       console.error("Error submitting invoice or items:", error.response?.data || error.message);
@@ -449,22 +413,20 @@ const CreateInvoice = () => {
                   )}
                 />
 
-                <Controller
-                  name="financialYear"
-                  control={control}
-                  rules={{ required: "Financial Year is required" }}
-                  render={({ field: { value, onChange } }) => (
-                    <SearchableSelect
-                      label="Financial Year"
-                      options={getFinancialYearOptions()}
-                      value={value}
-                      onChange={onChange}
-                      placeholder="Select Financial Year"
-                      error={errors.financialYear}
-                      icon={CalendarDays}
-                    />
-                  )}
-                />
+                {/* Derived by the server from the invoice date, so it is shown rather than chosen */}
+                <div className="space-y-2">
+                  <label className="block text-xs font-semibold text-gray-800 uppercase tracking-widest px-1">
+                    Financial Year
+                  </label>
+                  <div className="relative">
+                    <div className="absolute inset-y-0 left-0 pl-4 flex items-center pointer-events-none z-10">
+                      <CalendarDays className="h-5 w-5 text-gray-400" />
+                    </div>
+                    <div className="w-full bg-gray-50 border border-gray-300 rounded-2xl pl-12 pr-4 py-3.5 text-sm">
+                      <span className="font-semibold text-black">{financialYearOf(watch("invoiceDate"))}</span>
+                    </div>
+                  </div>
+                </div>
               </div>
 
               <div className="grid grid-cols-1 md:grid-cols-2 gap-4 md:col-span-1">
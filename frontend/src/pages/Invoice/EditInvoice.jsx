@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useForm, Controller } from "react-hook-form";
 import { useNavigate, useLocation } from "react-router-dom";
 import apiClient from "../../api/apiClient";
+import { fetchReferenceData } from "../../api/referenceData";
 import SearchableSelect from "../../components/SearchableSelect";
 import ConfirmationModal from "../../components/ConfirmationModal";
 import { formatAmount } from "../../utils/currencyUtils";
@@ -87,26 +88,11 @@ const EditInvoice = () => {
   const location = useLocation();
   const invoice = location.state?.invoice;
 
-  // Calculate current financial year based on date
-  const getCurrentFinancialYear = () => {
-    const today = new Date();
-    const year = today.getFullYear();
-    const month = today.getMonth() + 1;
-    if (month >= 4) {
-      return `${year}-${year + 1}`;
-    } else {
-      return `${year - 1}-${year}`;
-    }
-  };
-
-  // Generate financial year options (current year and -5 years)
-  const getFinancialYearOptions = () => {
-    const currentYear = new Date().getFullYear();
-    const years = [];
-    for (let i = currentYear - 5; i <= currentYear; i++) {
-      years.push({ value: `${i}-${i + 1}`, label: `${i}-${i + 1}` });
-    }
-    return years.reverse();
+  // Financial year in India (April 1 to March 31) of a YYYY-MM-DD date, as Invoice.save() derives it
+  const financialYearOf = (dateString) => {
+    const [year, month] = (dateString || "").split("-").map(Number);
+    if (!year || !month) return "N/A";
+    return month >= 4 ? `${year}-${year + 1}` : `${year - 1}-${year}`;
   };
 
   const today = new Date();
@@ -127,7 +113,6 @@ const EditInvoice = () => {
       ? {
         invoiceNumber: invoice.invoice_number,
         invoiceType: invoice.invoice_type,
-        financialYear: invoice.financial_year || getCurrentFinancialYear(),
         clientName: invoice.client,
         branchAddress: invoice.branch_address,
         bankAccount: invoice.bank_account,
@@ -144,7 +129,6 @@ const EditInvoice = () => {
         invoiceNumber: `INV-${Date.now()}`,
         invoiceDate: invoiceDateInit,
         dueDate: dueDateString,
-        financialYear: getCurrentFinancialYear(),
         taxable: "no",
         currencyType: "USD",
         paymentTerms: "Net 30",
@@ -188,20 +172,10 @@ const EditInvoice = () => {
     const fetchData = async () => {
       try {
         const [
-          clientsResponse,
-          branchesResponse,
-          bankAccountsResponse,
-          taxesResponse,
-          productsResponse,
-          servicesResponse,
+          referenceData,
           currenciesResponse,
         ] = await Promise.all([
-          apiClient.get("clients/clients/"),
-          apiClient.get("branch/branch_addresses/"),
-          apiClient.get("bank/bank-accounts/"),
-          apiClient.get("invoices/taxes/"),
-          apiClient.get("products/products/"),
-          apiClient.get("services/services/"),
+          fetchReferenceData(),
           fetch("https://open.er-api.com/v6/latest/USD?apikey=bbc89a8a69d4fe2cca4524c2", {
             method: "GET",
             headers: {
@@ -213,13 +187,13 @@ const EditInvoice = () => {
           }),
         ]);
 
-        const rawClients = clientsResponse.data || [];
+        const rawClients = referenceData.clients || [];
         setClients(rawClients);
-        setBranches(branchesResponse.data);
-        setBankAccounts(bankAccountsResponse.data);
-        setTaxes(taxesResponse.data);
-        setProducts(productsResponse.data);
-        setServices(servicesResponse.data);
+        setBranches(referenceData.branches);
+        setBankAccounts(referenceData.bank_accounts);
+        setTaxes(referenceData.taxes);
+        setProducts(referenceData.products);
+        setServices(referenceData.services);
 
         if (currenciesResponse.ok) {
           const currenciesData = await currenciesResponse.json();
@@ -355,7 +329,6 @@ const EditInvoice = () => {
     try {
       const invoiceData = {
         invoice_type: data.invoiceType,
-        financial_year: data.financialYear,
         client: parseInt(data.clientName),
         branch_address: parseInt(data.branchAddress),
         bank_account: parseInt(data.bankAccount),
@@ -488,22 +461,20 @@ const EditInvoice = () => {
                   )}
                 />
 
-                <Controller
-                  name="financialYear"
-                  control={control}
-                  rules={{ required: "Financial Year is required" }}
-                  render={({ field: { value, onChange } }) => (
-                    <SearchableSelect
-                      label="Financial Year"
-                      options={getFinancialYearOptions()}
-                      value={value}
-                      onChange={onChange}
-                      placeholder="Select Financial Year"
-                      error={errors.financialYear}
-                      icon={CalendarDays}
-                    />
-                  )}
-                />
+                {/* Derived by the server from the invoice date, so it is shown rather than chosen */}
+                <div className="space-y-2">
+                  <label className="block text-xs font-semibold text-gray-800 uppercase tracking-widest px-1">
+                    Financial Year
+                  </label>
+                  <div className="relative">
+                    <div className="absolute inset-y-0 left-0 pl-4 flex items-center pointer-events-none z-10">
+                      <CalendarDays className="h-5 w-5 text-gray-400" />
+                    </div>
+                    <div className="w-full bg-gray-50 border border-gray-300 rounded-2xl pl-12 pr-4 py-3.5 text-sm">
+                      <span className="font-semibold text-black">{financialYearOf(watch("invoiceDate"))}</span>
+                    </div>
+                  </div>
+                </div>
               </div>
 
               <div className="grid grid-cols-1 md:grid-cols-2 gap-4 md:col-span-1">
@@ -4,57 +4,6 @@ import apiClient from "../../api/apiClient";
 import { formatDate } from "../../utils/dateUtils";
 import { formatAmount } from "../../utils/currencyUtils";
 
-const numberToWords = (num, currency) => {
-  const ones = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine"];
-  const teens = ["Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen", "Eighteen", "Nineteen"];
-  const tens = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"];
-
-  const absNum = Math.abs(Math.round(num));
-  if (absNum === 0) return "Zero " + currency + " Only";
-
-  const convertBelowHundred = (n) =>
-    n < 10 ? ones[n] : n < 20 ? teens[n - 10] : `${tens[Math.floor(n / 10)]} ${ones[n % 10]}`.trim();
-
-  const convertBelowThousand = (n) => {
-    if (n < 100) return convertBelowHundred(n);
-    const hundreds = ones[Math.floor(n / 100)];
-    const remainder = n % 100;
-    if (remainder === 0) return `${hundreds} Hundred`;
-    return `${hundreds} Hundred ${convertBelowHundred(remainder)}`;
-  };
-
-  const convertToIndianWords = (n) => {
-    if (n < 1000) return convertBelowThousand(n);
-    
-    let result = "";
-    
-    if (n >= 10000000) {
-      result += convertBelowThousand(Math.floor(n / 10000000)) + " Crore ";
-      n %= 10000000;
-    }
-    
-    if (n >= 100000) {
-      result += convertBelowThousand(Math.floor(n / 100000)) + " Lakh ";
-      n %= 100000;
-    }
-    
-    if (n >= 1000) {
-      result += convertBelowThousand(Math.floor(n / 1000)) + " Thousand ";
-      n %= 1000;
-    }
-    
-    if (n > 0) {
-      result += convertBelowThousand(n);
-    }
-    
-    return result.trim();
-  };
-
-  const result = `${convertToIndianWords(absNum)} ${currency} Only`;
-  return num < 0 ? `Negative ${result}` : result;
-};
-
-
 const formatInvoiceNumber = (num) => {
   if (!num) return "N/A";
   if (num.startsWith("MB-")) {
@@ -96,41 +45,23 @@ const PrintedProformaInvoice = () => {
     }
   }, [id, proformaInvoice]);
 
-  const [clients, setClients] = useState([]);
-  const [branches, setBranches] = useState([]);
-  const [bankAccounts, setBankAccounts] = useState([]);
-  const [taxes, setTaxes] = useState([]);
-  const [logoUrl, setLogoUrl] = useState("");
-  const [companyName, setCompanyName] = useState("");
+  const [invoiceDocument, setInvoiceDocument] = useState(null);
+  const documentId = proformaInvoice?.id || id;
 
+  // Client, branch, bank, tax label, logo and total in words come embedded
+  // in the invoice document, so the page needs no reference-list downloads.
   useEffect(() => {
-    const fetchData = async () => {
+    if (!documentId) return;
+    const fetchDocument = async () => {
       try {
-        const [
-          clientsRes,
-          branchesRes,
-          bankAccountsRes,
-          taxesRes,
-          logoRes,
-        ] = await Promise.all([
-          apiClient.get("clients/clients/"),
-          apiClient.get("branch/branch_addresses/"),
-          apiClient.get("bank/bank-accounts/"),
-          apiClient.get("invoices/taxes/"),
-          apiClient.get("invoices/settings/logo/"),
-        ]);
-        setClients(clientsRes.data || []);
-        setBranches(branchesRes.data || []);
-        setBankAccounts(bankAccountsRes.data || []);
-        setTaxes(taxesRes.data || []);
-        setLogoUrl(logoRes.data.logo_image);
-        setCompanyName(logoRes.data.company_name);
-      } catch (e) {
-        console.error("Error fetching data:", e);
+        const response = await apiClient.get(`invoices/invoices/${documentId}/document/`);
+        setInvoiceDocument(response.data);
+      } catch (error) {
+        console.error("Error fetching invoice document:", error);
       }
     };
-    fetchData();
-  }, []);
+    fetchDocument();
+  }, [documentId]);
 
   useEffect(() => {
     if (proformaInvoice?.invoice_number || proformaInvoice?.final_invoice_number) {
@@ -164,9 +95,6 @@ const PrintedProformaInvoice = () => {
     final_invoice_number,
     invoice_date,
     due_date,
-    client,
-    branch_address,
-    bank_account,
     items = [],
     total_due,
     currency_type,
@@ -176,21 +104,19 @@ const PrintedProformaInvoice = () => {
     discount,
     amount_paid,
     tax_option,
-    tax_rate,
     tax_name,
   } = proformaInvoice;
 
-  const clientDetails = clients.find((c) => c.id === client) || {};
-  const branchDetails = branches.find((b) => b.id === branch_address) || {};
-  const bankDetails = bankAccounts.find((ba) => ba.id === bank_account) || {};
+  const clientDetails = invoiceDocument?.client_details || {};
+  const branchDetails = invoiceDocument?.branch_details || {};
+  const bankDetails = invoiceDocument?.bank_details || {};
+  const logoUrl = invoiceDocument?.logo?.variants?.print?.url || invoiceDocument?.logo?.logo_image;
+  const companyName = invoiceDocument?.logo?.company_name;
 
-  const displayTaxName =
-    tax_name ||
-    (tax_rate && taxes.find((t) => t.percentage === tax_rate)?.name) ||
-    "Tax";
+  const displayTaxName = invoiceDocument?.tax_display_name || tax_name || "Tax";
 
   const displayInvoiceNumber = formatInvoiceNumber(invoice_number || final_invoice_number);
-  const totalInWords = numberToWords(total_due, currency_type) || "N/A";
+  const totalInWords = invoiceDocument?.total_in_words || "N/A";
 
   return (
     <div className="flex flex-col items-center bg-white min-h-screen print:min-h-0 print:h-auto print:bg-white">
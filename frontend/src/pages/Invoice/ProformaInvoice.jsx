@@ -249,6 +249,8 @@ const ProformaInvoice = () => {
   const [filterMonth, setFilterMonth] = useState("");
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10);
+  // Cursor of every page reached so far; the first page has none
+  const [cursors, setCursors] = useState([null]);
 
   /* New import at top if needed, but I will just modify this block first and ensure imports are there */
   const location = useLocation();
@@ -257,18 +259,12 @@ const ProformaInvoice = () => {
     const fetchData = async () => {
       try {
         setLoading(true); // Ensure loading state is reset
-        const [invoicesRes, clientsRes, branchesRes, banksRes] = await Promise.all([
-          apiClient.get("invoices/invoices/"),
+        const [clientsRes, branchesRes, banksRes] = await Promise.all([
           apiClient.get("clients/clients/"),
           apiClient.get("branch/branch_addresses/"),
           apiClient.get("bank/bank-accounts/"),
         ]);
 
-        // Filter and sort only proforma invoices (LIFO - Newest first)
-        const proformaInvoices = invoicesRes.data
-          .filter(inv => !inv.is_final)
-          .sort((a, b) => b.id - a.id);
-        setInvoices(proformaInvoices);
         setClients(clientsRes.data);
         setBranches(branchesRes.data);
         setBankAccounts(banksRes.data);
@@ -281,6 +277,41 @@ const ProformaInvoice = () => {
     fetchData();
   }, [location.key]);
 
+  // One cursor page at a time, filtered by the server (newest first)
+  useEffect(() => {
+    const fetchInvoices = async () => {
+      try {
+        const res = await apiClient.get("invoices/invoices/", {
+          params: {
+            status: "proforma",
+            year: filterYear || undefined,
+            month: filterMonth || undefined,
+            page_size: itemsPerPage,
+            cursor: cursors[currentPage - 1] || undefined,
+          },
+        });
+        const next = res.data.next && new URL(res.data.next).searchParams.get("cursor");
+        setCursors(prev => next ? [...prev.slice(0, currentPage), next] : prev.slice(0, currentPage));
+        setInvoices(res.data.results);
+      } catch (err) {
+        console.error("Failed to fetch invoices", err);
+      }
+    };
+    fetchInvoices();
+  }, [filterYear, filterMonth, itemsPerPage, currentPage, location.key]);
+
+  // Filters and page size start again from the first page
+  const resetPages = () => {
+    setCursors([null]);
+    setCurrentPage(1);
+  };
+
+  // Years offered by the filter: this year and the five before it
+  const availableYears = useMemo(() => {
+    const currentYear = new Date().getFullYear();
+    return Array.from({ length: 6 }, (_, i) => currentYear - i);
+  }, []);
+
   const getClientName = (id) => clients.find(c => c.id === id)?.client_name || "N/A";
   const getBranchName = (id) => {
     const branch = branches.find(b => b.id === id);
@@ -291,28 +322,6 @@ const ProformaInvoice = () => {
     return bank ? `${bank.bank_name} - ${bank.account_number}` : "N/A";
   };
 
-  // Filter Logic
-  const filteredInvoices = useMemo(() => {
-    setCurrentPage(1); // Reset to first page when filtering
-    return invoices.filter(inv => {
-      const date = new Date(inv.invoice_date);
-      const yearMatch = filterYear ? date.getFullYear().toString() === filterYear : true;
-      const monthMatch = filterMonth ? (date.getMonth() + 1).toString().padStart(2, '0') === filterMonth : true;
-      return yearMatch && monthMatch;
-    });
-  }, [invoices, filterYear, filterMonth]);
-
-  const paginatedInvoices = useMemo(() => {
-    const startIndex = (currentPage - 1) * itemsPerPage;
-    return filteredInvoices.slice(startIndex, startIndex + itemsPerPage);
-  }, [filteredInvoices, currentPage, itemsPerPage]);
-
-  // Available Years for Filter
-  const availableYears = useMemo(() => {
-    const years = invoices.map(inv => new Date(inv.invoice_date).getFullYear());
-    return [...new Set(years)].sort((a, b) => b - a);
-  }, [invoices]);
-
   // Actions
   // Modal State
   const [confirmModalOpen, setConfirmModalOpen] = useState(false);
@@ -408,7 +417,7 @@ const ProformaInvoice = () => {
             <SearchableSelect
               options={[{ label: "All Years", value: "" }, ...availableYears.map(year => ({ label: year.toString(), value: year.toString() }))]}
               value={filterYear}
-              onChange={(val) => setFilterYear(val)}
+              onChange={(val) => { setFilterYear(val); resetPages(); }}
               placeholder="All Years"
               icon={Calendar}
             />
@@ -427,7 +436,7 @@ const ProformaInvoice = () => {
                 }))
               ]}
               value={filterMonth}
-              onChange={(val) => setFilterMonth(val)}
+              onChange={(val) => { setFilterMonth(val); resetPages(); }}
               placeholder="All Months"
               icon={Filter}
             />
@@ -452,8 +461,8 @@ const ProformaInvoice = () => {
               </tr>
             </thead>
             <tbody className="divide-y divide-gray-100">
-              {paginatedInvoices.length > 0 ? (
-                paginatedInvoices.map((inv, index) => (
+              {invoices.length > 0 ? (
+                invoices.map((inv, index) => (
                   <tr key={inv.id} className="group border-b border-gray-100 hover:bg-gray-50/50 transition-colors">
                     <td className="p-5 text-gray-400 font-bold text-xs text-center whitespace-nowrap">
                       {((currentPage - 1) * itemsPerPage + index + 1).toString().padStart(2, '0')}
@@ -534,11 +543,11 @@ const ProformaInvoice = () => {
 
         {/* Pagination Component */}
         <Pagination 
-          totalItems={filteredInvoices.length}
           itemsPerPage={itemsPerPage}
           currentPage={currentPage}
+          hasNextPage={cursors.length > currentPage}
           onPageChange={setCurrentPage}
-          onItemsPerPageChange={setItemsPerPage}
+          onItemsPerPageChange={(size) => { setItemsPerPage(size); resetPages(); }}
         />
       </div>
 
@@ -66,7 +66,7 @@ const Profile = () => {
 
       // Set Logo Data
       if (logoRes.data.logo_image) {
-        setLogoUrl(logoRes.data.logo_image);
+        setLogoUrl(logoRes.data.variants?.screen?.url || logoRes.data.logo_image);
       }
     } catch (error) {
       console.error("Error fetching data:", error);
@@ -90,8 +90,9 @@ const Profile = () => {
       });
 
       if (response.data.avatar) {
-        setUserProfile(prev => ({ ...prev, avatar: response.data.avatar }));
-        updateUserAvatar(response.data.avatar);
+        const { avatar, avatar_variants } = response.data;
+        setUserProfile(prev => ({ ...prev, avatar, avatar_variants }));
+        updateUserAvatar(response.data.avatar_variants?.thumbnail?.url || response.data.avatar);
       }
       alert("Profile picture updated!");
     } catch (error) {
@@ -116,7 +117,7 @@ const Profile = () => {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
-      setLogoUrl(response.data.logo_image);
+      setLogoUrl(response.data.variants?.screen?.url || response.data.logo_image);
       alert("Invoice logo updated!");
     } catch (error) {
       console.error("Logo upload error:", error);
@@ -192,7 +193,7 @@ const Profile = () => {
 
   const getAvatarUrl = () => {
     if (userProfile?.avatar) {
-      return `${BASE_URL}${userProfile.avatar}`;
+      return `${BASE_URL}${userProfile.avatar_variants?.screen?.url || userProfile.avatar}`;
     }
     return profilePic;
   };